@@ -3,6 +3,7 @@ Django settings for grocery_project.
 Secrets and environment-specific values loaded from environment.
 """
 
+import json
 import os
 from pathlib import Path
 
@@ -144,6 +145,12 @@ if os.environ.get("REDIS_URL"):
         "CONFIG": {"hosts": [os.environ["REDIS_URL"]]},
     }
 
+# In-process caches (keyword matcher, sections) check the DB generation counters at most
+# once per interval (seconds) to pick up edits made by other workers or the admin.
+CACHE_GENERATION_CHECK_INTERVAL = float(
+    os.environ.get("CACHE_GENERATION_CHECK_INTERVAL", "1.0")
+)
+
 # Optional LLM for section assignment and import normalization (French)
 LLM_API_KEY = os.environ.get("LLM_API_KEY", "")
 LLM_API_URL = os.environ.get(
@@ -152,6 +159,65 @@ LLM_API_URL = os.environ.get(
 )
 LLM_MODEL = os.environ.get("LLM_MODEL", "Meta-Llama-3_3-70B-Instruct")
 LLM_TIMEOUT = int(os.environ.get("LLM_TIMEOUT", "30"))
+# Keep-alive pool size and retries (connection errors, 429/5xx) within each call's timeout
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "10"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.environ.get("LLM_RETRY_BACKOFF", "0.5"))
+# Circuit breaker: fail fast for LLM_BREAKER_COOLDOWN seconds after N consecutive failures
+LLM_BREAKER_FAILURE_THRESHOLD = int(
+    os.environ.get("LLM_BREAKER_FAILURE_THRESHOLD", "5")
+)
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+LLM_BREAKER_HALF_OPEN_PROBES = int(os.environ.get("LLM_BREAKER_HALF_OPEN_PROBES", "1"))
+# Several OpenAI-compatible endpoints/models, as a JSON list of
+# {"url", "model", "api_key" (default LLM_API_KEY), "name"}; empty: LLM_API_URL + LLM_MODEL.
+LLM_ENDPOINTS = json.loads(os.environ.get("LLM_ENDPOINTS", "") or "[]")
+# Hedging: the next endpoint is called when the previous one has not answered within this
+# percentile of its recent latencies (LLM_HEDGE_DELAY seconds until enough samples).
+# 0 disables hedging (the next endpoint is only tried after a failure).
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_DELAY = float(os.environ.get("LLM_HEDGE_DELAY", "2"))
+# Micro-batching of single-name classifications across concurrent requests: wait up to
+# LLM_BATCH_WINDOW_MS for more names (0 disables), at most LLM_BATCH_MAX_SIZE per prompt
+LLM_BATCH_WINDOW_MS = float(os.environ.get("LLM_BATCH_WINDOW_MS", "0"))
+LLM_BATCH_MAX_SIZE = int(os.environ.get("LLM_BATCH_MAX_SIZE", "20"))
+# Pasted imports are split into chunks of whole lines normalized in parallel
+LLM_IMPORT_CHUNK_LENGTH = int(os.environ.get("LLM_IMPORT_CHUNK_LENGTH", "1500"))
+LLM_IMPORT_MAX_PARALLEL = int(os.environ.get("LLM_IMPORT_MAX_PARALLEL", "4"))
+# Well-formed pasted lines ("2 oeufs", "farine : 500 g") are parsed without the LLM
+IMPORT_LOCAL_PARSER = os.environ.get("IMPORT_LOCAL_PARSER", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Cache of parse-import results keyed by text + sections (seconds; 0 disables)
+IMPORT_CACHE_TTL = int(os.environ.get("IMPORT_CACHE_TTL", str(7 * 24 * 3600)))
+IMPORT_CACHE_MAX_ENTRIES = int(os.environ.get("IMPORT_CACHE_MAX_ENTRIES", "500"))
+# Opt-in: add_item over WebSocket inserts items needing the LLM into "autre" at once and
+# moves them (item_updated broadcast) once background classification finishes.
+PROVISIONAL_SECTION_ASSIGNMENT = os.environ.get(
+    "PROVISIONAL_SECTION_ASSIGNMENT", "false"
+).lower() in ("1", "true", "yes")
+# Cache of LLM section classifications per normalized item name (seconds / max rows).
+# Negative results (LLM failure or default section) expire sooner so they get retried.
+LLM_CLASSIFICATION_CACHE_TTL = int(
+    os.environ.get("LLM_CLASSIFICATION_CACHE_TTL", str(30 * 24 * 3600))
+)
+LLM_CLASSIFICATION_NEGATIVE_TTL = int(
+    os.environ.get("LLM_CLASSIFICATION_NEGATIVE_TTL", str(6 * 3600))
+)
+LLM_CLASSIFICATION_CACHE_MAX_ENTRIES = int(
+    os.environ.get("LLM_CLASSIFICATION_CACHE_MAX_ENTRIES", "10000")
+)
+
+# Local section classifier (char n-gram naive Bayes) between keywords and the LLM.
+# Trained with `manage.py train_section_classifier`; disabled while the file does not exist.
+LOCAL_CLASSIFIER_PATH = os.environ.get(
+    "LOCAL_CLASSIFIER_PATH", str(BASE_DIR / "local_classifier.json")
+)
+LOCAL_CLASSIFIER_MIN_CONFIDENCE = float(
+    os.environ.get("LOCAL_CLASSIFIER_MIN_CONFIDENCE", "0.9")
+)
 
 # Quitoque recipe import (Selenium + headless Firefox); credentials required for server-side login
 QUITOQUE_EMAIL = os.environ.get("QUITOQUE_EMAIL", "").strip()
@@ -163,6 +229,29 @@ QUITOQUE_ALLOWED_HOST = os.environ.get(
     "QUITOQUE_ALLOWED_HOST", "www.quitoque.fr"
 ).lower()
 QUITOQUE_IMPORT_TIMEOUT = int(os.environ.get("QUITOQUE_IMPORT_TIMEOUT", "60"))
+# Warm pool of logged-in browsers (0: one browser started per import). A browser is replaced
+# after MAX_USES imports or when its memory grew by more than MAX_RSS_GROWTH_MB (0: never).
+QUITOQUE_DRIVER_POOL_SIZE = int(os.environ.get("QUITOQUE_DRIVER_POOL_SIZE", "1"))
+QUITOQUE_DRIVER_MAX_USES = int(os.environ.get("QUITOQUE_DRIVER_MAX_USES", "50"))
+QUITOQUE_DRIVER_MAX_RSS_GROWTH_MB = float(
+    os.environ.get("QUITOQUE_DRIVER_MAX_RSS_GROWTH_MB", "300")
+)
+# Browserless fetch: recipe pages are requested over HTTPS with the cookies of the last
+# browser login, stored in QUITOQUE_COOKIE_FILE (mode 600); the browser is the fallback.
+QUITOQUE_HTTP_FETCH = os.environ.get("QUITOQUE_HTTP_FETCH", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+QUITOQUE_COOKIE_FILE = os.environ.get(
+    "QUITOQUE_COOKIE_FILE", str(BASE_DIR / "quitoque_cookies.json")
+)
+# Cache of parsed recipe ingredient lists per recipe URL (seconds, 0 disables)
+QUITOQUE_CACHE_TTL = int(os.environ.get("QUITOQUE_CACHE_TTL", str(30 * 24 * 3600)))
+# Recipes fetched at once by the multi-recipe import
+QUITOQUE_IMPORT_MAX_PARALLEL = int(os.environ.get("QUITOQUE_IMPORT_MAX_PARALLEL", "4"))
+# Background threads running Quitoque import jobs
+QUITOQUE_IMPORT_WORKERS = int(os.environ.get("QUITOQUE_IMPORT_WORKERS", "2"))
 
 # Configurable logging: set LOG_LEVEL=INFO or LOG_LEVEL=DEBUG to enable informational/debug logs
 # Set LOG_FILE (e.g. /var/log/grocery_list/app.log) to also write logs to a file (production).
@@ -1,7 +1,18 @@
 from django.contrib import admin
 from django.contrib import messages
 
-from .models import AccessToken, GroceryList, Item, Section, SectionKeyword
+from .models import (
+    AccessToken,
+    GroceryList,
+    ImportLine,
+    ImportNormalization,
+    Item,
+    LLMClassification,
+    RecipeIngredients,
+    Section,
+    SectionKeyword,
+)
+from .services.recipe_cache import invalidate_recipe
 
 
 @admin.register(Section)
@@ -20,6 +31,62 @@ class SectionKeywordAdmin(admin.ModelAdmin):
     ordering = ("keyword",)
 
 
+@admin.register(LLMClassification)
+class LLMClassificationAdmin(admin.ModelAdmin):
+    list_display = ("normalized_name", "section_slug", "created_at", "expires_at")
+    search_fields = ("normalized_name",)
+    list_filter = ("section_slug",)
+    ordering = ("normalized_name",)
+    readonly_fields = ("created_at",)
+
+
+@admin.register(ImportLine)
+class ImportLineAdmin(admin.ModelAdmin):
+    list_display = ("pattern", "name", "quantity_template", "section_slug", "hits")
+    search_fields = ("pattern", "name")
+    list_filter = ("section_slug",)
+    ordering = ("pattern",)
+    readonly_fields = ("created_at", "hits")
+
+
+@admin.register(ImportNormalization)
+class ImportNormalizationAdmin(admin.ModelAdmin):
+    list_display = ("key", "item_count", "created_at", "last_used_at", "expires_at")
+    search_fields = ("key",)
+    ordering = ("-last_used_at",)
+    readonly_fields = ("created_at",)
+
+    @admin.display(description="Articles")
+    def item_count(self, obj):
+        return len(obj.items)
+
+
+def invalidate_recipes_action(modeladmin, request, queryset):
+    urls = queryset.values_list("url", flat=True)
+    n = sum(invalidate_recipe(url) for url in urls)
+    modeladmin.message_user(
+        request,
+        f"{n} recette(s) invalidée(s) : elles seront relues au prochain import.",
+        messages.SUCCESS,
+    )
+
+
+invalidate_recipes_action.short_description = "Invalider les recettes sélectionnées"
+
+
+@admin.register(RecipeIngredients)
+class RecipeIngredientsAdmin(admin.ModelAdmin):
+    list_display = ("url", "item_count", "hits", "created_at", "expires_at")
+    search_fields = ("url",)
+    ordering = ("-created_at",)
+    readonly_fields = ("created_at", "hits")
+    actions = [invalidate_recipes_action]
+
+    @admin.display(description="Ingrédients")
+    def item_count(self, obj):
+        return len(obj.items)
+
+
 class ItemInline(admin.TabularInline):
     model = Item
     extra = 0
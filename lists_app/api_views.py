@@ -2,14 +2,15 @@
 REST API views for lists and items. JSON only; no DRF.
 """
 
+import json
 import logging
-import re
 import uuid
 from collections import defaultdict
 
+from channels.db import database_sync_to_async
 from django.db.models import Count, Q
 from django.forms import ValidationError
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
@@ -24,12 +25,23 @@ from lists_app.serializers import (
     validate_recipe_links,
 )
 from lists_app.services import item_service as item_svc
+from lists_app.services.llm_client import llm_status
 from lists_app.services.quitoque_scraper import (
     QuitoqueScraperError,
-    fetch_quitoque_ingredients,
     validate_recipe_url,
 )
-from lists_app.services.section_assigner import normalize_import_with_llm
+from lists_app.services.import_jobs import (
+    get_import_job,
+    job_to_dict,
+    start_import_job,
+)
+from lists_app.services.item_merge import dedup_name_key, merge_quantities
+from lists_app.services.recipe_cache import get_cached_recipe
+from lists_app.services.import_normalizer import (
+    astream_import_with_llm,
+    normalize_import_with_llm,
+)
+from lists_app.services.section_assigner import fill_missing_sections
 from lists_app.utils import parse_uuid, get_request_json
 
 logger = logging.getLogger(__name__)
@@ -143,7 +155,12 @@ def _delete_list(request, list_id):
 @require_http_methods(["POST"])
 @csrf_exempt
 def _parse_import(request, list_id):
-    """POST /api/lists/<uuid>/parse-import/ - normalize pasted text via LLM. Body: { \"text\": \"...\" }."""
+    """
+    POST /api/lists/<uuid>/parse-import/ - normalize pasted text via LLM. Body: { \"text\": \"...\" }.
+    With \"stream\": true the answer is NDJSON, one {\"item\": ...} line per item as the LLM
+    produces it, then {\"done\": true, \"count\": n}. The stream body is an async iterator:
+    under ASGI (daphne) a sync one would be drained in a thread before anything is sent.
+    """
     gl = _get_list_or_404(list_id)
     if isinstance(gl, JsonResponse):
         return gl
@@ -151,6 +168,13 @@ def _parse_import(request, list_id):
     if err is not None:
         return err
     text = body.get("text") or ""
+    if body.get("stream"):
+        response = StreamingHttpResponse(
+            _stream_import_lines(text), content_type="application/x-ndjson"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
     items = normalize_import_with_llm(text)
     if not items:
         return JsonResponse(
@@ -160,13 +184,50 @@ def _parse_import(request, list_id):
             },
             status=503,
         )
+    # The normalization prompt already asked the LLM for sections. The rest are resolved
+    # here, with one batched LLM call for the names no keyword matches: left unset, the
+    # client's add_item would classify each of them with its own LLM call.
+    fill_missing_sections(items)
     return JsonResponse({"items": items})
 
 
+async def _stream_import_lines(text: str):
+    count = 0
+    unresolved = []
+    async for item in astream_import_with_llm(text):
+        await database_sync_to_async(fill_missing_sections)([item], use_llm=False)
+        if not item.get("section_slug"):
+            unresolved.append(item)
+            continue
+        count += 1
+        yield json.dumps({"item": item}, ensure_ascii=False) + "\n"
+    # Items no keyword matched are held back and classified with one batched LLM call.
+    if unresolved:
+        await database_sync_to_async(fill_missing_sections)(unresolved)
+    for item in unresolved:
+        count += 1
+        yield json.dumps({"item": item}, ensure_ascii=False) + "\n"
+    if not count:
+        yield (
+            json.dumps(
+                {
+                    "error": "llm_unavailable",
+                    "message": "LLM indisponible ou échec de l'analyse.",
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+    yield json.dumps({"done": True, "count": count}) + "\n"
+
+
 @require_http_methods(["POST"])
 @csrf_exempt
 def _import_quitoque(request, list_id):
-    """POST /api/lists/<uuid>/import-quitoque/ - Body: {\"url\": \"https://...\" }."""
+    """
+    POST /api/lists/<uuid>/import-quitoque/ - Body: {\"url\": \"https://...\" }.
+    200 with the items of a cached recipe, else 202 with an import job (see import_jobs).
+    """
     gl = _get_list_or_404(list_id)
     if isinstance(gl, JsonResponse):
         return gl
@@ -175,87 +236,29 @@ def _import_quitoque(request, list_id):
         return err
     url = (body.get("url") or "").strip()
     try:
-        validate_recipe_url(url)
+        url = validate_recipe_url(url)
     except QuitoqueScraperError as e:
         return JsonResponse(
             {"error": "bad_url", "message": str(e)}, status=e.status_hint
         )
+    items = get_cached_recipe(url)
+    if items is not None:
+        # One batch classification instead of one LLM call per add_item.
+        fill_missing_sections(items)
+        logger.info(
+            "api import_quitoque list_id=%s items_count=%d cached=True",
+            list_id,
+            len(items),
+        )
+        return JsonResponse({"items": items, "cached": True})
     try:
-        items = fetch_quitoque_ingredients(url)
+        job = start_import_job(gl, [url])
     except QuitoqueScraperError as e:
         return JsonResponse(
             {"error": "quitoque_import_failed", "message": str(e)},
             status=e.status_hint,
         )
-    logger.info(
-        "api import_quitoque list_id=%s items_count=%d",
-        list_id,
-        len(items),
-    )
-    return JsonResponse({"items": items})
-
-
-def _parse_quantity_with_unit(s: str) -> tuple[float, str] | None:
-    """Parse '100 g' or '1.5 l' into (number, unit). Unit lowercase. Returns None if not matched."""
-    s = (s or "").strip()
-    if not s:
-        return None
-    # Match number (int or decimal) optionally followed by unit (letters, maybe with spaces)
-    m = re.match(r"^([\d.,]+)\s*([a-zA-Z\u00e0-\u024f]+)?\s*$", s)
-    if not m:
-        return None
-    num_str, unit = m.group(1), (m.group(2) or "").strip().lower()
-    num_str = num_str.replace(",", ".")
-    try:
-        val = float(num_str)
-    except ValueError:
-        return None
-    return (val, unit or "")
-
-
-def _merge_quantities(quantities: list[str]) -> str:
-    """Sum when all numeric or all same unit (e.g. 100 g + 100 g -> 200 g); else concatenate with ' + '. Capped at 80 chars."""
-    qs = [q.strip() for q in quantities if q and str(q).strip()]
-    if not qs:
-        return ""
-    # Try parse as "number unit" for each
-    parsed = [_parse_quantity_with_unit(q) for q in qs]
-    if all(p is not None for p in parsed) and parsed:
-        units = [p[1] for p in parsed]
-        if len(set(units)) == 1:
-            total = sum(p[0] for p in parsed)
-            unit = units[0]
-            if unit:
-                result = (
-                    f"{int(total) if total == int(total) else total} {unit}".strip()
-                )
-            else:
-                result = str(int(total) if total == int(total) else total)
-            return result[:80]
-    # Fallback: plain numbers only
-    numeric_vals = []
-    for q in qs:
-        try:
-            v = int(q)
-        except ValueError:
-            try:
-                v = float(q.replace(",", "."))
-            except ValueError:
-                return " + ".join(qs)[:80]
-        numeric_vals.append(v)
-    total = sum(numeric_vals)
-    return str(int(total) if total == int(total) else total)[:80]
-
-
-def _dedup_name_key(name: str) -> str:
-    """Normalize name for deduplication: strip, lower, then singularize so 'pomme' and 'pommes' merge."""
-    key = (name or "").strip().lower()
-    if len(key) >= 3:
-        if key.endswith("s") and not key.endswith("ss"):
-            key = key[:-1]
-        elif key.endswith("x"):
-            key = key[:-1]
-    return key
+    return JsonResponse({"job": job_to_dict(job)}, status=202)
 
 
 def deduplicate_list_items(list_id: uuid.UUID) -> GroceryList:
@@ -266,14 +269,14 @@ def deduplicate_list_items(list_id: uuid.UUID) -> GroceryList:
     )
     groups = defaultdict(list)
     for it in items:
-        key = _dedup_name_key(it.name or "")
+        key = dedup_name_key(it.name or "")
         groups[key].append(it)
     for key, group in groups.items():
         if len(group) <= 1:
             continue
         first, rest = group[0], group[1:]
         quantities = [first.quantity or ""] + [it.quantity or "" for it in rest]
-        first.quantity = _merge_quantities(quantities)[:80]
+        first.quantity = merge_quantities(quantities)[:80]
         notes_parts = [first.notes or ""] + [it.notes or "" for it in rest]
         first.notes = " ; ".join(p for p in notes_parts if (p or "").strip())[:2000]
         first.checked = any(it.checked for it in group)
@@ -283,6 +286,60 @@ def deduplicate_list_items(list_id: uuid.UUID) -> GroceryList:
     return gl
 
 
+# Recipes per batch import request
+QUITOQUE_BATCH_MAX_URLS = 20
+
+
+@require_http_methods(["POST"])
+@csrf_exempt
+def _import_quitoque_batch(request, list_id):
+    """
+    POST /api/lists/<uuid>/import-quitoque-batch/ - Body: {"urls": ["https://...", ...]}
+    or {} for the Quitoque links of the list (recipe_links). 202 with an import job whose
+    result holds per-URL results and the merged ingredient list (sections filled).
+    """
+    gl = _get_list_or_404(list_id)
+    if isinstance(gl, JsonResponse):
+        return gl
+    body, err = get_request_json(request)
+    if err is not None:
+        return err
+    urls = body.get("urls")
+    if urls is None:
+        urls = []
+        for link in gl.recipe_links or []:
+            try:
+                urls.append(validate_recipe_url(str(link)))
+            except QuitoqueScraperError:
+                continue
+    elif not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+        return _json_400("urls doit être une liste d'URL.")
+    if not urls:
+        return _json_400("Aucune URL de recette Quitoque.")
+    if len(urls) > QUITOQUE_BATCH_MAX_URLS:
+        return _json_400(f"{QUITOQUE_BATCH_MAX_URLS} recettes au maximum.")
+    try:
+        job = start_import_job(gl, urls, batch=True)
+    except QuitoqueScraperError as e:
+        return JsonResponse(
+            {"error": "quitoque_import_failed", "message": str(e)},
+            status=e.status_hint,
+        )
+    return JsonResponse({"job": job_to_dict(job)}, status=202)
+
+
+@require_http_methods(["GET"])
+def _import_job_status(request, list_id, job_id):
+    """GET /api/lists/<uuid>/import-jobs/<uuid>/ - status, progress and result of a job."""
+    gl = _get_list_or_404(list_id)
+    if isinstance(gl, JsonResponse):
+        return gl
+    job = get_import_job(gl, job_id)
+    if job is None:
+        return _json_404("Import introuvable.")
+    return JsonResponse(job_to_dict(job))
+
+
 @require_http_methods(["POST"])
 @csrf_exempt
 def _deduplicate(request, list_id):
@@ -422,6 +479,15 @@ def _reorder(request, list_id):
     return JsonResponse(result)
 
 
+# ---------- LLM backend ----------
+
+
+@require_http_methods(["GET"])
+def _llm_status(request):
+    """GET /api/llm-status/ - circuit breakers, counters and latencies of the LLM endpoints."""
+    return JsonResponse(llm_status())
+
+
 # ---------- Dispatchers (same path, different methods) ----------
 
 
@@ -463,6 +529,9 @@ def api_item_detail(request, list_id, item_id):
 # URL route names (urls.py references these)
 api_parse_import = _parse_import
 api_import_quitoque = _import_quitoque
+api_import_quitoque_batch = _import_quitoque_batch
+api_import_job_status = _import_job_status
 api_deduplicate = _deduplicate
 api_create_item = _create_item
 api_reorder = _reorder
+api_llm_status = _llm_status
@@ -5,3 +5,6 @@ class ListsAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "lists_app"
     verbose_name = "Listes de courses"
+
+    def ready(self):
+        from lists_app import signals  # noqa: F401
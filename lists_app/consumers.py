@@ -1,19 +1,24 @@
 """
 WebSocket consumer for real-time list updates.
 Connect to /ws/list/<list_id>/; receive actions and broadcast to group.
+DB work runs through database_sync_to_async; LLM section assignment is awaited on the event
+loop (aassign_section) so slow LLM calls do not hold worker threads.
 """
 
+import asyncio
 import json
 import logging
 import uuid
 
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.forms import ValidationError
 
 from lists_app.models import AccessToken, GroceryList, Item
-from lists_app.serializers import list_detail_to_dict
+from lists_app.serializers import list_detail_to_dict, validate_item_name
 from lists_app.services import item_service as item_svc
+from lists_app.services.section_assigner import aassign_section
 from lists_app.utils import parse_uuid
 from lists_app.views import SESSION_ACCESS_TOKEN_ID_KEY
 
@@ -42,16 +47,69 @@ def _do_add_item(list_id, name, quantity="", notes="", section_slug=None):
         return (None, None)
     try:
         item_dict = item_svc.create_item(
-            gl, name, quantity=quantity, notes=notes, section_slug=section_slug
+            gl,
+            name,
+            quantity=quantity,
+            notes=notes,
+            section_slug=section_slug,
+            defer_classification=getattr(
+                settings, "PROVISIONAL_SECTION_ASSIGNMENT", False
+            ),
         )
         return (item_dict, None)
     except ValidationError:
         return (None, "Nom invalide.")
 
 
-@database_sync_to_async
-def ws_add_item(list_id, name, quantity="", notes="", section_slug=None):
-    return _do_add_item(list_id, name, quantity, notes, section_slug)
+async def ws_add_item(list_id, name, quantity="", notes="", section_slug=None):
+    """
+    Without an explicit section, assign it first with aassign_section (LLM awaited on the
+    event loop), then create the item in a worker thread. In provisional mode the LLM runs
+    later, in _reclassify_in_background. An unknown list is reported before any LLM call.
+    """
+    provisional = getattr(settings, "PROVISIONAL_SECTION_ASSIGNMENT", False)
+    if not provisional and not (section_slug and str(section_slug).strip()):
+        if not await get_list_exists(list_id):
+            return (None, None)
+        try:
+            section = await aassign_section(validate_item_name(name))
+        except ValidationError:
+            return (None, "Nom invalide.")
+        section_slug = section.name_slug if section else None
+    return await database_sync_to_async(_do_add_item)(
+        list_id, name, quantity, notes, section_slug
+    )
+
+
+def _do_get_item_name(list_id, item_id):
+    try:
+        gl = GroceryList.objects.get(pk=list_id)
+    except GroceryList.DoesNotExist:
+        return None
+    return item_svc.item_name(gl, item_id)
+
+
+def _do_apply_reclassification(list_id, item_id, section):
+    try:
+        gl = GroceryList.objects.get(pk=list_id)
+    except GroceryList.DoesNotExist:
+        return None
+    return item_svc.apply_reclassification(gl, item_id, section)
+
+
+async def ws_reclassify_item(list_id, item_id):
+    """Final section of a provisional item (LLM awaited on the event loop), then move it."""
+    name = await database_sync_to_async(_do_get_item_name)(list_id, item_id)
+    if name is None:
+        return None
+    section = await aassign_section(name)
+    return await database_sync_to_async(_do_apply_reclassification)(
+        list_id, item_id, section
+    )
+
+
+# Strong references to background reclassification tasks (asyncio keeps only weak ones).
+_background_tasks: set[asyncio.Task] = set()
 
 
 def _do_update_item(list_id, item_id, **kwargs):
@@ -122,8 +180,6 @@ class ListConsumer(AsyncWebsocketConsumer):
         self.room_name = None
 
     async def connect(self):
-        from django.conf import settings
-
         if getattr(settings, "SECRET_URL_AUTH_REQUIRED", True):
             token_id = await get_token_id_from_scope(self.scope)
             if not await check_access_token(token_id):
@@ -253,6 +309,33 @@ class ListConsumer(AsyncWebsocketConsumer):
                 self.room_name,
                 {"type": "broadcast_message", "payload": payload},
             )
+            if action == "add_item" and payload["item"].get("section_pending"):
+                task = asyncio.ensure_future(
+                    self._reclassify_in_background(uid, payload["item"]["id"])
+                )
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+
+    async def _reclassify_in_background(self, list_uid, item_id):
+        """Assign the final section of a provisional item, then broadcast item_updated."""
+        try:
+            item = await ws_reclassify_item(list_uid, item_id)
+        except Exception:
+            logger.exception(
+                "ws reclassify failed list_id=%s item_id=%s", list_uid, item_id
+            )
+            return
+        if item:
+            logger.debug(
+                "ws broadcast list_id=%s action=item_updated (reclassified)", list_uid
+            )
+            await self.channel_layer.group_send(
+                self.room_name,
+                {
+                    "type": "broadcast_message",
+                    "payload": {"action": "item_updated", "item": item},
+                },
+            )
 
     async def broadcast_message(self, event):
         """Send payload to this client (from group_send)."""
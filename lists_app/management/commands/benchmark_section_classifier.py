@@ -0,0 +1,120 @@
+"""
+Compare section assignment with and without the local classifier tier on item history:
+hit rate (names resolved without the LLM), accuracy and per-lookup latency.
+No LLM call is made; names the local tiers cannot resolve are counted as LLM escalations.
+"""
+
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from lists_app.models import Item, SectionKeyword
+from lists_app.services.keyword_matcher import KeywordMatcher
+from lists_app.services.local_classifier import (
+    get_local_classifier,
+    train_classifier,
+    training_samples,
+)
+from lists_app.services.section_assigner import _normalize
+
+
+def _timed(fn, arg):
+    start = time.perf_counter()
+    result = fn(arg)
+    return result, (time.perf_counter() - start) * 1e6
+
+
+def _latency(samples_us: list[float]) -> str:
+    if not samples_us:
+        return "n/a"
+    ordered = sorted(samples_us)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"moy. {statistics.fmean(ordered):.1f} µs, p95 {p95:.1f} µs"
+
+
+class Command(BaseCommand):
+    help = "Mesure taux de résolution et latence du classifieur local face au pipeline actuel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--holdout",
+            type=float,
+            default=0.2,
+            help="Part de l'historique tenue à l'écart pour l'évaluation (0 = modèle enregistré, tout l'historique).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        history = {}
+        for name, slug in Item.objects.values_list("name", "section__name_slug"):
+            normalized = _normalize(name)
+            if normalized and slug != "autre":
+                history[normalized] = slug
+        if not history:
+            self.stdout.write(self.style.WARNING("Aucun article dans l'historique."))
+            return
+        names = sorted(history)
+        holdout = options["holdout"]
+        if holdout > 0:
+            random.Random(options["seed"]).shuffle(names)
+            test_names = set(names[: max(1, int(len(names) * holdout))])
+            # Train on everything except the held-out names (keywords learned from them too).
+            train = [(n, s) for n, s in training_samples() if n not in test_names]
+            classifier = train_classifier(train)
+        else:
+            test_names = set(names)
+            classifier = get_local_classifier()
+            if classifier is None:
+                self.stdout.write(
+                    self.style.ERROR(
+                        "Aucun modèle : lancez d'abord train_section_classifier."
+                    )
+                )
+                return
+        # Keywords learned from held-out names would make the keyword tier look perfect.
+        matcher = KeywordMatcher(
+            (k, s)
+            for k, s in SectionKeyword.objects.values_list(
+                "keyword", "section__name_slug"
+            )
+            if holdout <= 0 or k not in test_names
+        )
+        threshold = float(getattr(settings, "LOCAL_CLASSIFIER_MIN_CONFIDENCE", 0.9))
+
+        keyword_hits = keyword_ok = local_hits = local_ok = 0
+        keyword_us, local_us = [], []
+        for name in sorted(test_names):
+            expected = history[name]
+            slug, us = _timed(matcher.match, name)
+            keyword_us.append(us)
+            if slug:
+                keyword_hits += 1
+                keyword_ok += slug == expected
+                continue
+            (slug, confidence), us = _timed(classifier.predict, name)
+            local_us.append(us)
+            if slug and confidence >= threshold:
+                local_hits += 1
+                local_ok += slug == expected
+
+        total = len(test_names)
+        before_llm = total - keyword_hits
+        after_llm = before_llm - local_hits
+        self.stdout.write(
+            f"Articles évalués : {total} (seuil de confiance {threshold})"
+        )
+        self.stdout.write(
+            f"Mots-clés : {keyword_hits}/{total} résolus, "
+            f"{keyword_ok} corrects, {_latency(keyword_us)}"
+        )
+        self.stdout.write(
+            f"Classifieur local : {local_hits}/{before_llm} résolus parmi les inconnus, "
+            f"{local_ok} corrects, {_latency(local_us)}"
+        )
+        self.stdout.write(
+            f"Appels LLM : {before_llm} (pipeline actuel) → {after_llm} (avec classifieur), "
+            f"taux de résolution locale {100 * (total - after_llm) / total:.1f} %"
+        )
@@ -0,0 +1,42 @@
+"""
+Remove section keywords made redundant by a shorter keyword of the same section, without
+changing the section any name can get. Safe to run periodically (cron).
+"""
+
+from django.core.management.base import BaseCommand
+
+from lists_app.services.keyword_compaction import compact_keywords
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacte les mots-clés de section : supprime ceux couverts par un mot-clé plus "
+        "court de la même section, sans changer aucune attribution."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Afficher les mots-clés supprimables sans les supprimer.",
+        )
+
+    def handle(self, *args, **options):
+        report = compact_keywords(dry_run=options["dry_run"])
+        if options["verbosity"] >= 2 or options["dry_run"]:
+            for keyword in report["removed"]:
+                self.stdout.write(f"  - {keyword}")
+        if report["kept"]:
+            self.stdout.write(
+                f"{len(report['kept'])} mot(s)-clé(s) couvert(s) conservé(s) : "
+                "leur suppression pourrait changer une attribution."
+            )
+        summary = (
+            f"{len(report['removed'])} mot(s)-clé(s) "
+            f"{'supprimable(s)' if options['dry_run'] else 'supprimé(s)'} : "
+            f"{report['keywords_before']} → {report['keywords_after']} mots-clés, "
+            f"{report['nodes_before']} → {report['nodes_after']} nœuds de l'automate, "
+            f"{report['bytes_saved']} octets."
+        )
+        style = self.style.WARNING if options["dry_run"] else self.style.SUCCESS
+        self.stdout.write(style(summary))
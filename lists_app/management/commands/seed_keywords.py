@@ -0,0 +1,88 @@
+"""
+Pre-seed SectionKeyword rows: classify common item names with the LLM in large batches,
+offline, so live traffic rarely needs the LLM for them.
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lists_app.services.keyword_seeding import (
+    BUNDLED_CORPUS,
+    classify_names,
+    insert_keywords,
+    item_history_names,
+    read_corpus,
+    unknown_names,
+)
+from lists_app.services.llm_client import is_llm_configured
+from lists_app.services.section_assigner import LLM_BATCH_MAX_NAMES
+
+
+class Command(BaseCommand):
+    help = (
+        "Pré-remplit les mots-clés de section en classant par lots, via le LLM, "
+        "une liste de noms d'articles courants ou l'historique des articles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corpus",
+            help=f"Fichier de noms, un par ligne (défaut : {BUNDLED_CORPUS.name} fourni).",
+        )
+        parser.add_argument(
+            "--from-items",
+            action="store_true",
+            help="Utiliser les noms des articles existants (avec --corpus : les deux).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=LLM_BATCH_MAX_NAMES,
+            help=f"Noms par appel au LLM (max {LLM_BATCH_MAX_NAMES}).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Afficher les mots-clés sans les enregistrer.",
+        )
+
+    def handle(self, *args, **options):
+        if not is_llm_configured():
+            raise CommandError("LLM non configuré (LLM_API_KEY).")
+        names = []
+        if options["corpus"] or not options["from_items"]:
+            path = Path(options["corpus"]) if options["corpus"] else BUNDLED_CORPUS
+            try:
+                names += read_corpus(path)
+            except OSError as e:
+                raise CommandError(f"Corpus illisible : {e}") from e
+        if options["from_items"]:
+            names += item_history_names()
+        unknown = unknown_names(names)
+        self.stdout.write(
+            f"{len(names)} noms, {len(unknown)} sans mot-clé à classer par le LLM."
+        )
+        if not unknown:
+            return
+
+        def progress(done, total):
+            self.stdout.write(f"  {done}/{total} classés")
+
+        slugs = classify_names(unknown, options["batch_size"], on_batch=progress)
+        if options["dry_run"]:
+            for keyword, slug in sorted(slugs.items()):
+                self.stdout.write(f"  {keyword} → {slug}")
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Simulation : {len(slugs)} mots-clés non enregistrés."
+                )
+            )
+            return
+        created = insert_keywords(slugs)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{created} mots-clés ajoutés ({len(unknown) - len(slugs)} noms "
+                "laissés au LLM ou à la section par défaut)."
+            )
+        )
@@ -0,0 +1,37 @@
+"""
+Retrain the local section classifier from SectionKeyword rows and item history.
+"""
+
+from django.core.management.base import BaseCommand
+
+from lists_app.services.local_classifier import (
+    model_path,
+    save_classifier,
+    train_classifier,
+    training_samples,
+)
+
+
+class Command(BaseCommand):
+    help = "Entraîne le classifieur local de sections (mots-clés + historique des articles)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="Chemin du modèle JSON (défaut : LOCAL_CLASSIFIER_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        samples = training_samples()
+        if not samples:
+            self.stdout.write(self.style.WARNING("Aucune donnée d'entraînement."))
+            return
+        classifier = train_classifier(samples)
+        path = save_classifier(classifier, options.get("output") or model_path())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Modèle entraîné : {classifier.sample_count} exemples, "
+                f"{len(classifier.class_counts)} sections, "
+                f"{classifier.vocab_size} n-grammes → {path}"
+            )
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("lists_app", "0007_add_cache_generation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LLMClassification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("normalized_name", models.CharField(max_length=200, unique=True)),
+                ("section_slug", models.CharField(blank=True, max_length=80)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "ordering": ["normalized_name"],
+            },
+        ),
+    ]
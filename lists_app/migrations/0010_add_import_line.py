@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("lists_app", "0009_add_import_normalization"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportLine",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("pattern", models.CharField(max_length=255, unique=True)),
+                ("name", models.CharField(max_length=200)),
+                ("quantity_template", models.CharField(blank=True, max_length=120)),
+                ("section_slug", models.CharField(blank=True, max_length=80)),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["pattern"],
+            },
+        ),
+    ]
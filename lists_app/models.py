@@ -1,5 +1,5 @@
 """
-Models for lists_app: Section, GroceryList, Item, AccessToken.
+Models for lists_app: Section, GroceryList, Item, AccessToken, caches.
 """
 
 import secrets
@@ -37,6 +37,83 @@ class SectionKeyword(models.Model):
         return f"{self.keyword} → {self.section.label_fr}"
 
 
+class LLMClassification(models.Model):
+    """Cached LLM section classification for a normalized item name. Empty slug = negative result."""
+
+    normalized_name = models.CharField(max_length=200, unique=True)
+    section_slug = models.CharField(max_length=80, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["normalized_name"]
+
+    def __str__(self):
+        return f"{self.normalized_name} → {self.section_slug or '∅'}"
+
+
+class ImportNormalization(models.Model):
+    """Cached LLM normalization of a pasted list, keyed by sha256 of the text and section set."""
+
+    key = models.CharField(max_length=64, unique=True)
+    items = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["-last_used_at"]
+
+    def __str__(self):
+        return f"{self.key[:12]}… ({len(self.items)} articles)"
+
+
+class ImportLine(models.Model):
+    """
+    Pasted line learned from LLM imports: pattern (normalized line, numbers replaced by "#")
+    -> canonical name, quantity template ({0} = first number of the line) and section.
+    """
+
+    pattern = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=200)
+    quantity_template = models.CharField(max_length=120, blank=True)
+    section_slug = models.CharField(max_length=80, blank=True)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["pattern"]
+
+    def __str__(self):
+        return f"{self.pattern} → {self.name}"
+
+
+class RecipeIngredients(models.Model):
+    """Cached ingredient list of a Quitoque recipe, keyed by its normalized URL."""
+
+    url = models.URLField(max_length=500, unique=True)
+    items = models.JSONField(default=list)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.url} ({len(self.items)} ingrédients)"
+
+
+class CacheGeneration(models.Model):
+    """Version counter for in-process caches. Bumped on writes so every worker reloads lazily."""
+
+    key = models.CharField(max_length=50, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}={self.value}"
+
+
 class GroceryList(models.Model):
     """A single grocery list. One URL = one list."""
 
@@ -78,6 +155,33 @@ class Item(models.Model):
         return self.name
 
 
+class ImportJob(models.Model):
+    """Quitoque import run in the background; progress is pushed to the list's WebSocket group."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    grocery_list = models.ForeignKey(
+        GroceryList, on_delete=models.CASCADE, related_name="import_jobs"
+    )
+    urls = models.JSONField(default=list)
+    batch = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, default=PENDING, db_index=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.CharField(max_length=300, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.status} {', '.join(self.urls)[:80]}"
+
+
 class AccessToken(models.Model):
     """Secret URL token for app access. Admin generates; visiting the URL grants a session until revoked."""
 
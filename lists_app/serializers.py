@@ -8,6 +8,7 @@ from urllib.parse import urlparse
 from django.forms import ValidationError
 
 from lists_app.models import GroceryList, Item, Section
+from lists_app.services.section_registry import get_section_registry
 
 # Max lengths (must match model or be stricter)
 MAX_LIST_NAME = 200
@@ -59,9 +60,9 @@ def item_to_dict(item: Item) -> dict:
 def list_detail_to_dict(grocery_list: GroceryList) -> dict:
     """List with items grouped by section (ordered)."""
     data = list_to_dict(grocery_list)
-    sections_order = list(
-        Section.objects.order_by("position").values_list("id", "name_slug", "label_fr")
-    )
+    sections_order = [
+        (s.id, s.name_slug, s.label_fr) for s in get_section_registry().sections
+    ]
     items_by_section: dict[int, list] = {sid: [] for sid, _, _ in sections_order}
     for item in grocery_list.items.select_related("section").order_by(
         "section", "position"
@@ -0,0 +1,107 @@
+"""
+Cross-worker cache invalidation through generation counters stored in the DB (CacheGeneration).
+Writers bump a counter; each worker compares its cached generation at most once per
+CACHE_GENERATION_CHECK_INTERVAL seconds and reloads stale values lazily on next use.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+from django.conf import settings
+from django.db.models import F
+
+from lists_app.models import CacheGeneration
+
+logger = logging.getLogger(__name__)
+
+# Generation keys: one per family of DB-derived in-process state.
+SECTIONS = "sections"
+KEYWORDS = "keywords"
+
+T = TypeVar("T")
+
+_snapshot: Optional[dict[str, int]] = None
+_snapshot_at = 0.0
+_snapshot_lock = threading.Lock()
+_caches: list["GenerationCache"] = []
+
+
+def _check_interval() -> float:
+    return float(getattr(settings, "CACHE_GENERATION_CHECK_INTERVAL", 1.0))
+
+
+def current_generations() -> dict[str, int]:
+    """Return {key: generation}; re-read from the DB at most once per check interval."""
+    global _snapshot, _snapshot_at
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and now - _snapshot_at < _check_interval():
+        return snapshot
+    with _snapshot_lock:
+        if _snapshot is None or now - _snapshot_at >= _check_interval():
+            _snapshot = dict(CacheGeneration.objects.values_list("key", "value"))
+            _snapshot_at = now
+        return _snapshot
+
+
+def bump_generation(*keys: str) -> None:
+    """Mark every cache built from these keys as stale, in this worker and all others."""
+    global _snapshot
+    for key in keys:
+        updated = CacheGeneration.objects.filter(key=key).update(value=F("value") + 1)
+        if not updated:
+            _, created = CacheGeneration.objects.get_or_create(
+                key=key, defaults={"value": 1}
+            )
+            if not created:
+                CacheGeneration.objects.filter(key=key).update(value=F("value") + 1)
+        logger.debug("cache generation bumped: key=%s", key)
+    with _snapshot_lock:
+        _snapshot = None
+    for cache in list(_caches):
+        if set(cache.keys) & set(keys):
+            cache.invalidate()
+
+
+def reset_local_caches() -> None:
+    """Forget every cached value and generation in this worker (no DB write)."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+    for cache in list(_caches):
+        cache.invalidate()
+
+
+class GenerationCache(Generic[T]):
+    """Process-local value built by loader(), reloaded when one of its generation keys moves."""
+
+    def __init__(self, keys: tuple[str, ...], loader: Callable[[], T]):
+        self.keys = keys
+        self._loader = loader
+        self._value: Optional[T] = None
+        self._generation: Optional[tuple[int, ...]] = None
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def _generation_now(self) -> tuple[int, ...]:
+        gens = current_generations()
+        return tuple(gens.get(key, 0) for key in self.keys)
+
+    def get(self) -> T:
+        generation = self._generation_now()
+        value = self._value
+        if value is not None and generation == self._generation:
+            return value
+        with self._lock:
+            if self._value is None or generation != self._generation:
+                # Generation is read before loading so a concurrent write is never missed.
+                self._value = self._loader()
+                self._generation = generation
+            return self._value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+            self._generation = None
@@ -0,0 +1,128 @@
+"""
+Circuit breaker for an unreliable backend (the LLM API). After failure_threshold consecutive
+failures it opens: calls are refused at once for `cooldown` seconds, then up to
+half_open_probes trial calls decide whether it closes again or re-opens.
+Thread-safe; also usable from coroutines (no blocking inside the lock).
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.half_open_probes = max(1, half_open_probes)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._counters = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "trips": 0,
+        }
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._counters["trips"] += 1
+        logger.warning(
+            "circuit breaker %s open: consecutive_failures=%d cooldown=%.0fs",
+            self.name,
+            self._consecutive_failures,
+            self.cooldown,
+        )
+
+    def allow(self) -> bool:
+        """True if a call may proceed; False means fail fast (counted as rejected)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == OPEN and now - self._opened_at >= self.cooldown:
+                self._state = HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info("circuit breaker %s half-open", self.name)
+            if self._state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self._counters["rejected"] += 1
+                    return False
+                self._probes_in_flight += 1
+            elif self._state == OPEN:
+                self._counters["rejected"] += 1
+                return False
+            self._counters["calls"] += 1
+            return True
+
+    def is_open(self) -> bool:
+        """True while calls would be refused (no state change, not counted)."""
+        with self._lock:
+            if self._state == OPEN:
+                return time.monotonic() - self._opened_at < self.cooldown
+            if self._state == HALF_OPEN:
+                return self._probes_in_flight >= self.half_open_probes
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._counters["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                logger.info("circuit breaker %s closed", self.name)
+            self._state = CLOSED
+            self._probes_in_flight = 0
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._counters["failures"] += 1
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN:
+                self._open(now)
+            elif (
+                self._state == CLOSED
+                and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._open(now)
+
+    def release(self) -> None:
+        """An allowed call ended without an outcome (e.g. cancelled): free its probe slot."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def snapshot(self) -> dict:
+        """State and counters, JSON-serializable."""
+        with self._lock:
+            retry_in = 0.0
+            if self._state == OPEN:
+                retry_in = max(
+                    0.0, self.cooldown - (time.monotonic() - self._opened_at)
+                )
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown": self.cooldown,
+                "retry_in": round(retry_in, 1),
+                **self._counters,
+            }
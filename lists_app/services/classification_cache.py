@@ -0,0 +1,133 @@
+"""
+Cache of LLM section classifications keyed by normalized item name.
+Positive results (slug) and negative ones (LLM failure or default section) are both kept,
+each with its own TTL: a bounded in-process LRU in front of the LLMClassification table.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from lists_app.models import LLMClassification
+
+logger = logging.getLogger(__name__)
+
+# LLMClassification.normalized_name max_length: longer names share their prefix's entry
+MAX_NAME_LENGTH = 200
+# The table is pruned once every PRUNE_EVERY writes, not on each one
+PRUNE_EVERY = 50
+
+_local: "OrderedDict[str, tuple[float, Optional[str]]]" = OrderedDict()
+_local_lock = threading.Lock()
+_writes = 0  # DB writes since the last prune
+
+
+def _positive_ttl() -> int:
+    return int(getattr(settings, "LLM_CLASSIFICATION_CACHE_TTL", 30 * 24 * 3600))
+
+
+def _negative_ttl() -> int:
+    return int(getattr(settings, "LLM_CLASSIFICATION_NEGATIVE_TTL", 6 * 3600))
+
+
+def _max_entries() -> int:
+    return int(getattr(settings, "LLM_CLASSIFICATION_CACHE_MAX_ENTRIES", 10000))
+
+
+def _local_get(name: str) -> tuple[bool, Optional[str]]:
+    with _local_lock:
+        entry = _local.get(name)
+        if entry is None:
+            return (False, None)
+        expires, slug = entry
+        if expires <= time.monotonic():
+            del _local[name]
+            return (False, None)
+        _local.move_to_end(name)
+        return (True, slug)
+
+
+def _local_put(name: str, slug: Optional[str], ttl: float) -> None:
+    if ttl <= 0:
+        return
+    with _local_lock:
+        _local[name] = (time.monotonic() + ttl, slug)
+        _local.move_to_end(name)
+        while len(_local) > _max_entries():
+            _local.popitem(last=False)
+
+
+def get_cached_classification(normalized: str) -> tuple[bool, Optional[str]]:
+    """
+    Return (found, slug). found=False means the LLM must be asked;
+    found=True with slug=None is a cached negative result.
+    """
+    if not normalized:
+        return (False, None)
+    normalized = normalized[:MAX_NAME_LENGTH]
+    found, slug = _local_get(normalized)
+    if found:
+        return (True, slug)
+    entry = (
+        LLMClassification.objects.filter(
+            normalized_name=normalized, expires_at__gt=timezone.now()
+        )
+        .values_list("section_slug", "expires_at")
+        .first()
+    )
+    if entry is None:
+        return (False, None)
+    slug = entry[0] or None
+    _local_put(normalized, slug, (entry[1] - timezone.now()).total_seconds())
+    return (True, slug)
+
+
+def cache_classification(normalized: str, slug: Optional[str]) -> None:
+    """Remember an LLM outcome; slug=None records a negative result with the shorter TTL."""
+    global _writes
+    if not normalized:
+        return
+    ttl = _positive_ttl() if slug else _negative_ttl()
+    if ttl <= 0:
+        return
+    normalized = normalized[:MAX_NAME_LENGTH]
+    _local_put(normalized, slug, ttl)
+    LLMClassification.objects.update_or_create(
+        normalized_name=normalized,
+        defaults={
+            "section_slug": slug or "",
+            "expires_at": timezone.now() + timedelta(seconds=ttl),
+        },
+    )
+    logger.debug("classification cached: name=%r slug=%s ttl=%d", normalized, slug, ttl)
+    with _local_lock:
+        _writes += 1
+        due = _writes >= PRUNE_EVERY
+        if due:
+            _writes = 0
+    if due:
+        _prune()
+
+
+def _prune() -> None:
+    """Drop expired rows, then the oldest ones beyond LLM_CLASSIFICATION_CACHE_MAX_ENTRIES."""
+    LLMClassification.objects.filter(expires_at__lte=timezone.now()).delete()
+    excess = LLMClassification.objects.count() - _max_entries()
+    if excess > 0:
+        ids = list(
+            LLMClassification.objects.order_by("expires_at").values_list(
+                "id", flat=True
+            )[:excess]
+        )
+        LLMClassification.objects.filter(id__in=ids).delete()
+
+
+def clear_local_classification_cache() -> None:
+    with _local_lock:
+        _local.clear()
@@ -0,0 +1,220 @@
+"""
+Bounded pool of long-lived WebDriver sessions (Quitoque import). A driver is started and
+logged in once by `create`, then lent to the following imports, so an import costs one page
+navigation instead of a browser start and a login. Drivers are health-checked when borrowed
+and quit after max_uses loans, when their browser memory grew by more than
+max_rss_growth_mb since creation, or when the borrower marks them broken.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPoolTimeout(Exception):
+    """No driver became free in time (all `size` drivers are lent)."""
+
+
+def browser_pid(driver: Any) -> Optional[int]:
+    """Process id of the browser behind a Firefox WebDriver, if it reports one."""
+    capabilities = getattr(driver, "capabilities", None) or {}
+    pid = capabilities.get("moz:processID")
+    try:
+        return int(pid) if pid else None
+    except (TypeError, ValueError):
+        return None
+
+
+def process_tree_rss(pid: Optional[int]) -> Optional[int]:
+    """Resident memory in bytes of pid and its descendants (Linux /proc), or None."""
+    if pid is None:
+        return None
+    children: dict[int, list[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # "pid (comm) state ppid ...": comm may contain spaces and parentheses
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, stack, seen = 0, [pid], set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            if current == pid:
+                return None
+            continue
+        stack.extend(children.get(current, []))
+    return total
+
+
+def _is_alive(driver: Any) -> bool:
+    """Health check: one cheap WebDriver round trip."""
+    try:
+        driver.current_url
+    except Exception:
+        return False
+    return True
+
+
+def _quit(driver: Any) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        logger.debug("driver.quit() failed", exc_info=True)
+
+
+class PooledDriver:
+    """A pooled driver and its bookkeeping; set `broken` to have it quit on release."""
+
+    def __init__(self, driver: Any):
+        self.driver = driver
+        self.uses = 0
+        self.broken = False
+        self.created_at = time.monotonic()
+        self.pid = browser_pid(driver)
+        self.baseline_rss = process_tree_rss(self.pid)
+
+
+class DriverPool:
+    """
+    At most `size` drivers, created lazily by `create()` (which returns a ready, logged-in
+    driver). Idle drivers are reused most-recently-used first, so the freshest session
+    serves the next import. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        create: Callable[[], Any],
+        size: int = 1,
+        max_uses: int = 50,
+        max_rss_growth_mb: float = 0,
+    ):
+        self.name = name
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.max_rss_growth = max(0.0, max_rss_growth_mb) * 1024 * 1024
+        self._create = create
+        self._cond = threading.Condition()
+        self._idle: list[PooledDriver] = []
+        self._count = 0  # drivers created (or being created) and not quit yet
+        self._closed = False
+        self._counters = {"created": 0, "reused": 0, "recycled": 0, "discarded": 0}
+
+    @contextmanager
+    def driver(self, timeout: float) -> Iterator[PooledDriver]:
+        """Borrow a healthy driver for the block; waits up to `timeout` seconds for one."""
+        pooled = self._acquire(timeout)
+        try:
+            yield pooled
+        finally:
+            self._release(pooled)
+
+    def _acquire(self, timeout: float) -> PooledDriver:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"driver pool {self.name} is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._count < self.size:
+                    self._count += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DriverPoolTimeout(f"driver pool {self.name}: no free driver")
+                self._cond.wait(remaining)
+        if pooled is not None:
+            if _is_alive(pooled.driver):
+                with self._cond:
+                    self._counters["reused"] += 1
+                return pooled
+            # Dead browser (crash, killed by the OOM killer...): replace it in its slot
+            logger.warning("driver pool %s: health check failed, replacing", self.name)
+            _quit(pooled.driver)
+            with self._cond:
+                self._counters["discarded"] += 1
+        try:
+            pooled = PooledDriver(self._create())
+        except BaseException:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._counters["created"] += 1
+        logger.info("driver pool %s: driver started", self.name)
+        return pooled
+
+    def _retire_reason(self, pooled: PooledDriver) -> Optional[str]:
+        if pooled.broken:
+            return "broken"
+        if pooled.uses >= self.max_uses:
+            return "max uses"
+        if self.max_rss_growth and pooled.baseline_rss is not None:
+            rss = process_tree_rss(pooled.pid)
+            if rss is not None and rss - pooled.baseline_rss > self.max_rss_growth:
+                return "memory growth"
+        return None
+
+    def _release(self, pooled: PooledDriver) -> None:
+        pooled.uses += 1
+        reason = self._retire_reason(pooled)
+        with self._cond:
+            if reason is None and not self._closed:
+                self._idle.append(pooled)
+                self._cond.notify()
+                return
+            self._count -= 1
+            self._counters["discarded" if pooled.broken else "recycled"] += 1
+            self._cond.notify()
+        logger.info(
+            "driver pool %s: driver quit (%s) after %d uses",
+            self.name,
+            reason or "pool closed",
+            pooled.uses,
+        )
+        _quit(pooled.driver)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "name": self.name,
+                "size": self.size,
+                "drivers": self._count,
+                "idle": len(self._idle),
+                **self._counters,
+            }
+
+    def close(self) -> None:
+        """Quit the idle drivers; lent ones are quit when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            _quit(pooled.driver)
@@ -0,0 +1,89 @@
+"""
+Content-addressed cache of import normalizations (ImportNormalization). The key is a sha256
+of the normalized pasted text plus the section set, so a repeated paste skips the LLM.
+Entries expire after IMPORT_CACHE_TTL; beyond IMPORT_CACHE_MAX_ENTRIES the least recently
+used are evicted. Section edits clear the table (signals.py).
+"""
+
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from lists_app.models import ImportNormalization
+from lists_app.services.section_assigner import _normalize
+from lists_app.services.section_registry import SectionRegistry
+
+logger = logging.getLogger(__name__)
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "IMPORT_CACHE_TTL", 7 * 24 * 3600))
+
+
+def _max_entries() -> int:
+    return int(getattr(settings, "IMPORT_CACHE_MAX_ENTRIES", 500))
+
+
+def import_cache_key(lines: list[str], registry: SectionRegistry) -> str:
+    """
+    sha256 of the pasted lines (lowercased, spaces collapsed) and of the sections
+    (slug=label, sorted so that reordering sections keeps the key).
+    """
+    normalized = [_normalize(line) for line in lines]
+    sections = sorted(f"{s.name_slug}={s.label_fr}" for s in registry.sections)
+    payload = "\n".join(n for n in normalized if n) + "\0" + "|".join(sections)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_import(key: str) -> Optional[list[dict]]:
+    """Cached items for the key, or None. A hit refreshes the entry's LRU timestamp."""
+    now = timezone.now()
+    items = (
+        ImportNormalization.objects.filter(key=key, expires_at__gt=now)
+        .values_list("items", flat=True)
+        .first()
+    )
+    if items is None:
+        return None
+    ImportNormalization.objects.filter(key=key).update(last_used_at=now)
+    logger.info("import cache hit: key=%s items=%d", key[:12], len(items))
+    return items
+
+
+def cache_import(key: str, items: list[dict]) -> None:
+    ttl = _ttl()
+    if ttl <= 0 or not items:
+        return
+    now = timezone.now()
+    ImportNormalization.objects.update_or_create(
+        key=key,
+        defaults={
+            "items": items,
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=ttl),
+        },
+    )
+    _prune()
+
+
+def _prune() -> None:
+    """Drop expired rows, then the least recently used beyond IMPORT_CACHE_MAX_ENTRIES."""
+    ImportNormalization.objects.filter(expires_at__lte=timezone.now()).delete()
+    excess = ImportNormalization.objects.count() - _max_entries()
+    if excess > 0:
+        ids = list(
+            ImportNormalization.objects.order_by("last_used_at").values_list(
+                "id", flat=True
+            )[:excess]
+        )
+        ImportNormalization.objects.filter(id__in=ids).delete()
+
+
+def clear_import_cache() -> None:
+    deleted, _ = ImportNormalization.objects.all().delete()
+    if deleted:
+        logger.info("import cache cleared: entries=%d", deleted)
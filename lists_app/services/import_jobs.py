@@ -0,0 +1,200 @@
+"""
+Quitoque imports as background jobs (ImportJob). The API creates the job and answers 202;
+a worker thread fetches the recipe(s), fills the sections and stores the result. Progress
+("login", "loading", "parsed") and the outcome are pushed to the list's channel-layer group
+(list_<id>, the ListConsumer group) as import_progress / import_done / import_failed.
+The latest progress of the jobs run by this process is kept in memory for the status
+endpoint; the DB holds the status and the result.
+"""
+
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.utils import timezone
+
+from lists_app.models import GroceryList, ImportJob
+from lists_app.services.item_merge import merge_recipe_items
+from lists_app.services.quitoque_scraper import (
+    QuitoqueScraperError,
+    require_credentials,
+)
+from lists_app.services.recipe_cache import fetch_recipe_ingredients, fetch_recipes
+from lists_app.services.section_assigner import fill_missing_sections
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs older than this are deleted when a new job is created
+JOB_RETENTION = timedelta(days=7)
+# A pending/running job not updated for this long was lost (process restarted)
+JOB_STALE_AFTER = timedelta(minutes=15)
+# Progress updates refresh a running job's updated_at at most this often
+JOB_HEARTBEAT = timedelta(minutes=1)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# job id -> {"stage", "message", "url"} of the jobs running in this process
+_progress: dict[str, dict] = {}
+_progress_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, int(getattr(settings, "QUITOQUE_IMPORT_WORKERS", 2)))
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="import-job"
+            )
+        return _executor
+
+
+def shutdown_import_jobs() -> None:
+    """Drop the queued jobs and wait for the running ones (at process exit)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_import_jobs)
+
+
+def job_to_dict(job: ImportJob) -> dict:
+    with _progress_lock:
+        progress = _progress.get(str(job.id))
+    return {
+        "id": str(job.id),
+        "list_id": str(job.grocery_list_id),
+        "urls": job.urls,
+        "batch": job.batch,
+        "status": job.status,
+        "progress": progress,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    }
+
+
+def _broadcast(list_id, payload: dict) -> None:
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        async_to_sync(layer.group_send)(
+            f"list_{list_id}", {"type": "broadcast_message", "payload": payload}
+        )
+    except Exception:
+        logger.warning("import job broadcast failed list_id=%s", list_id, exc_info=True)
+
+
+def start_import_job(
+    grocery_list: GroceryList, urls: list[str], batch: bool = False
+) -> ImportJob:
+    """
+    Create a pending job and queue it once the current transaction commits. Raises
+    QuitoqueScraperError (503) when the Quitoque account is not configured.
+    """
+    require_credentials()
+    ImportJob.objects.filter(
+        status__in=(ImportJob.DONE, ImportJob.FAILED),
+        updated_at__lt=timezone.now() - JOB_RETENTION,
+    ).delete()
+    job = ImportJob.objects.create(grocery_list=grocery_list, urls=urls, batch=batch)
+    transaction.on_commit(lambda: _get_executor().submit(run_import_job, job.id))
+    logger.info("import job queued id=%s urls=%d", job.id, len(urls))
+    return job
+
+
+def get_import_job(grocery_list: GroceryList, job_id) -> Optional[ImportJob]:
+    """The list's job, marked failed if it was lost by a restarted process."""
+    job = ImportJob.objects.filter(grocery_list=grocery_list, id=job_id).first()
+    if (
+        job is not None
+        and job.status in (ImportJob.PENDING, ImportJob.RUNNING)
+        and job.updated_at < timezone.now() - JOB_STALE_AFTER
+    ):
+        job.status, job.error = ImportJob.FAILED, "Import interrompu."
+        job.save(update_fields=["status", "error", "updated_at"])
+    return job
+
+
+def run_import_job(job_id) -> None:
+    """Worker: fetch, fill sections, store the result and broadcast the outcome."""
+    close_old_connections()
+    try:
+        job = ImportJob.objects.filter(id=job_id, status=ImportJob.PENDING).first()
+        if job is None:
+            return
+        job.status = ImportJob.RUNNING
+        job.save(update_fields=["status", "updated_at"])
+        _run(job)
+    finally:
+        close_old_connections()
+
+
+def _heartbeat(job_id) -> None:
+    """Refresh updated_at of a running job, so get_import_job does not deem it lost."""
+    try:
+        ImportJob.objects.filter(id=job_id, status=ImportJob.RUNNING).update(
+            updated_at=timezone.now()
+        )
+    except DatabaseError:
+        logger.warning("import job heartbeat failed id=%s", job_id, exc_info=True)
+
+
+def _run(job: ImportJob) -> None:
+    list_id = job.grocery_list_id
+    runner = threading.current_thread()
+    last_beat = [job.updated_at]
+
+    def progress(stage: str, message: str, url: Optional[str] = None) -> None:
+        entry = {"stage": stage, "message": message, "url": url or job.urls[0]}
+        now = timezone.now()
+        with _progress_lock:
+            _progress[str(job.id)] = entry
+            beat = now - last_beat[0] >= JOB_HEARTBEAT
+            if beat:
+                last_beat[0] = now
+        if beat:
+            _heartbeat(job.id)
+            if threading.current_thread() is not runner:
+                # A fetch_recipes worker thread: do not leave its connection open
+                connections.close_all()
+        _broadcast(
+            list_id, {"action": "import_progress", "job_id": str(job.id), **entry}
+        )
+
+    try:
+        if job.batch:
+            results = fetch_recipes(
+                job.urls, lambda url, stage, message: progress(stage, message, url)
+            )
+            items = merge_recipe_items(results)
+            fill_missing_sections(items)
+            job.result = {"results": results, "items": items}
+        else:
+            items, cached = fetch_recipe_ingredients(job.urls[0], progress)
+            fill_missing_sections(items)
+            job.result = {"items": items, "cached": cached}
+        job.status = ImportJob.DONE
+    except QuitoqueScraperError as e:
+        job.status, job.error = ImportJob.FAILED, str(e)[:300]
+    except Exception:
+        logger.exception("import job failed id=%s", job.id)
+        job.status, job.error = ImportJob.FAILED, "Échec de l’import Quitoque."
+    job.save(update_fields=["status", "result", "error", "updated_at"])
+    logger.info("import job %s id=%s list_id=%s", job.status, job.id, list_id)
+    with _progress_lock:
+        _progress.pop(str(job.id), None)
+    action = "import_done" if job.status == ImportJob.DONE else "import_failed"
+    _broadcast(list_id, {"action": action, "job": job_to_dict(job)})
@@ -0,0 +1,130 @@
+"""
+Line-level dictionary for pasted imports (ImportLine), learned from LLM outputs like
+SectionKeyword: a pasted line is reduced to a pattern (normalized, bullets removed, numbers
+replaced by "#"). Known patterns are resolved locally, numbers being put back into the
+learned quantity template, so only unseen lines are sent to the LLM.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from typing import Optional
+
+from django.db.models import F
+
+from lists_app.models import ImportLine
+from lists_app.services.section_assigner import _normalize
+from lists_app.services.section_registry import SectionRegistry
+
+logger = logging.getLogger(__name__)
+
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+BULLET_RE = re.compile(r"^[-*•·]+\s*")
+LETTER_RE = re.compile(r"[^\W\d_]")
+
+
+def line_pattern(line: str) -> tuple[str, list[str]]:
+    """(pattern, numbers of the line in order), e.g. "- Farine 500 g" -> ("farine # g", ["500"])."""
+    normalized = BULLET_RE.sub("", _normalize(line))
+    return NUMBER_RE.sub("#", normalized)[:255], NUMBER_RE.findall(normalized)
+
+
+def quantity_template(quantity: str, numbers: list[str]) -> Optional[str]:
+    """
+    Quantity with each number replaced by {k}, k being its position among the line's numbers.
+    None when the quantity has a number that is not in the line (e.g. converted units) or
+    leaves one of the line's numbers out (other values would be silently lost).
+    """
+    used: set[int] = set()
+    parts = []
+    last = 0
+    for m in NUMBER_RE.finditer(quantity):
+        slot = next(
+            (k for k, n in enumerate(numbers) if n == m.group() and k not in used),
+            None,
+        )
+        if slot is None:
+            return None
+        used.add(slot)
+        parts.append(_escape(quantity[last : m.start()]))
+        parts.append(f"{{{slot}}}")
+        last = m.end()
+    if len(used) != len(numbers):
+        return None
+    parts.append(_escape(quantity[last:]))
+    return "".join(parts)
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _fill(template: str, numbers: list[str]) -> Optional[str]:
+    try:
+        return template.format(*numbers)
+    except (IndexError, KeyError, ValueError):
+        return None
+
+
+def lookup_import_lines(lines: list[str], registry: SectionRegistry) -> dict[int, dict]:
+    """{line index: item} for the lines whose pattern is known."""
+    patterns = {i: line_pattern(line) for i, line in enumerate(lines)}
+    rows = {
+        row.pattern: row
+        for row in ImportLine.objects.filter(
+            pattern__in={p for p, _ in patterns.values()}
+        )
+    }
+    known = {}
+    for i, (pattern, numbers) in patterns.items():
+        row = rows.get(pattern)
+        if row is None:
+            continue
+        quantity = _fill(row.quantity_template, numbers)
+        if quantity is None:
+            continue
+        slug = row.section_slug if row.section_slug in registry.slugs else None
+        known[i] = {"name": row.name, "quantity": quantity, "section_slug": slug}
+    if known:
+        ImportLine.objects.filter(pattern__in={patterns[i][0] for i in known}).update(
+            hits=F("hits") + 1
+        )
+    logger.debug("import lines known: lines=%d known=%d", len(lines), len(known))
+    return known
+
+
+def learn_import_lines(
+    lines: list[str], answers: list[tuple[Optional[int], dict]]
+) -> int:
+    """
+    Store (line index, item) pairs from the LLM. Only lines that produced exactly one item,
+    with a name free of numbers and a quantity rebuilt from the line's numbers, are learned.
+    Returns the number of new patterns.
+    """
+    per_line: dict[int, list[dict]] = defaultdict(list)
+    for index, item in answers:
+        if index is not None and 0 <= index < len(lines):
+            per_line[index].append(item)
+    learned = 0
+    for index, items in per_line.items():
+        if len(items) != 1:
+            continue
+        item = items[0]
+        pattern, numbers = line_pattern(lines[index])
+        if not LETTER_RE.search(pattern) or NUMBER_RE.search(item["name"]):
+            continue
+        template = quantity_template(item.get("quantity") or "", numbers)
+        if template is None or len(template) > 120:
+            continue
+        _, created = ImportLine.objects.get_or_create(
+            pattern=pattern,
+            defaults={
+                "name": item["name"][:200],
+                "quantity_template": template,
+                "section_slug": item.get("section_slug") or "",
+            },
+        )
+        learned += created
+    if learned:
+        logger.info("learned import lines: count=%d", learned)
+    return learned
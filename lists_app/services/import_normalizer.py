@@ -0,0 +1,483 @@
+"""
+Import normalization: turn a pasted free-text grocery list into items with the LLM.
+Lines already seen in earlier imports are resolved from the ImportLine dictionary
+(import_lines), well-formed lines by the local parser (import_parser); only the remaining
+lines are split into chunks normalized concurrently by the LLM (bounded by
+LLM_IMPORT_MAX_PARALLEL) and merged back in paste order, and their answers are learned.
+Complete results are cached by content (import_cache), so a repeated paste returns
+without calling the LLM.
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from lists_app.services.import_cache import (
+    cache_import,
+    get_cached_import,
+    import_cache_key,
+)
+from lists_app.services.import_lines import learn_import_lines, lookup_import_lines
+from lists_app.services.import_parser import parse_import_lines, section_hints
+from lists_app.services.json_stream import JsonArrayStream
+from lists_app.services.llm_client import (
+    call_llm,
+    decode_llm_json,
+    is_llm_available,
+    stream_llm,
+)
+from lists_app.services.section_registry import SectionRegistry, get_section_registry
+
+logger = logging.getLogger(__name__)
+
+# Max length of one chunk of pasted text sent to the LLM
+IMPORT_LLM_INPUT_MAX_LENGTH = 4000
+# Sanity cap on the whole paste (beyond it the text is truncated)
+IMPORT_MAX_TEXT_LENGTH = 50000
+
+
+def _chunk_length() -> int:
+    value = int(getattr(settings, "LLM_IMPORT_CHUNK_LENGTH", 1500))
+    return max(200, min(value, IMPORT_LLM_INPUT_MAX_LENGTH))
+
+
+def _max_parallel() -> int:
+    return max(1, int(getattr(settings, "LLM_IMPORT_MAX_PARALLEL", 4)))
+
+
+def _local_parser_enabled() -> bool:
+    return bool(getattr(settings, "IMPORT_LOCAL_PARSER", True))
+
+
+def split_import_lines(raw_text: str, max_length: Optional[int] = None) -> list[str]:
+    """Non-blank, stripped lines of the paste; longer lines are cut to max_length."""
+    max_length = max_length or _chunk_length()
+    text = (raw_text or "").strip()
+    if len(text) > IMPORT_MAX_TEXT_LENGTH:
+        logger.warning(
+            "import text truncated: length=%d max=%d", len(text), IMPORT_MAX_TEXT_LENGTH
+        )
+        text = text[:IMPORT_MAX_TEXT_LENGTH]
+    return [ln.strip()[:max_length] for ln in text.splitlines() if ln.strip()]
+
+
+def _chunk_indices(
+    lines: list[str], indices: list[int], max_length: Optional[int] = None
+) -> list[list[int]]:
+    """Group line indices into chunks whose lines total at most max_length characters."""
+    max_length = max_length or _chunk_length()
+    chunks = []
+    current: list[int] = []
+    size = 0
+    for i in indices:
+        if current and size + 1 + len(lines[i]) > max_length:
+            chunks.append(current)
+            current, size = [], 0
+        size += len(lines[i]) + (1 if current else 0)
+        current.append(i)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_import_text(raw_text: str, max_length: Optional[int] = None) -> list[str]:
+    """
+    Split pasted text into chunks of whole lines, each at most max_length characters.
+    A single longer line is cut. Blank lines are dropped.
+    """
+    lines = split_import_lines(raw_text, max_length)
+    return [
+        "\n".join(lines[i] for i in chunk)
+        for chunk in _chunk_indices(lines, list(range(len(lines))), max_length)
+    ]
+
+
+def _import_prompt(text: str, sections_fr: str) -> str:
+    return (
+        "L'utilisateur a collé une liste de courses en texte libre. Elle peut être désordonnée "
+        "(formats variés : « Nom : quantité », « quantité nom », tirets, numéros, etc.). Certaines lignes peuvent contenir des éléments à ignorer comme le titre d'une section.\n"
+        "Normalise-la en un tableau JSON. Chaque élément doit être un objet avec exactement :\n"
+        '- "name" : string (nom de l\'article normalisé)\n'
+        '- "quantity" : string (quantité, peut être "" si aucune)\n'
+        '- "section_slug" : string ou null (un des slugs ci-dessous, ou null si inconnu)\n'
+        '- "line" : entier (numéro de la ligne collée dont vient l\'article)\n'
+        f"Sections autorisées (slug=label) : {sections_fr}.\n\n"
+        "Règles pour le nom (name) :\n"
+        "- Une seule majuscule en début de mot, orthographe française correcte (apostrophe : d'olive, l'eau, pas d'espace avant l'apostrophe).\n"
+        "- Nom court et courant comme en liste de courses : préférer « Oeufs » plutôt que « Jaune d'oeuf », « Bœuf haché » plutôt que « Viande hachée de bœuf », « Huile d'olive » (avec apostrophe) plutôt que « Huile d olive ». Supprimer les tournures redondantes (ex. « Viande de X » → « X » quand c'est l'ingrédient principal).\n"
+        "- Pas de détails superflus ; garder l'essentiel pour identifier l'article.\n\n"
+        "Réponds UNIQUEMENT par le tableau JSON minifié, sans markdown, sans explication.\n\n"
+        "Liste collée par l'utilisateur (lignes numérotées) :\n"
+        f"{text}"
+    )
+
+
+def _numbered(lines: list[str], chunk: list[int]) -> str:
+    return "\n".join(f"{n}. {lines[i]}" for n, i in enumerate(chunk, 1))
+
+
+def _entry_line(entry, chunk: list[int]) -> Optional[int]:
+    """Paste line index of an LLM element from its 1-based "line" number in the chunk."""
+    try:
+        n = int(entry.get("line"))
+    except (TypeError, ValueError):
+        return None
+    return chunk[n - 1] if 1 <= n <= len(chunk) else None
+
+
+def _clean_import_entry(entry, valid_slugs) -> Optional[dict]:
+    """One LLM import element as {"name", "quantity", "section_slug"}, or None if unusable."""
+    if not isinstance(entry, dict):
+        return None
+    name = entry.get("name")
+    if name is None:
+        return None
+    name = str(name).strip()
+    if not name:
+        return None
+    quantity = entry.get("quantity")
+    quantity = "" if quantity is None else str(quantity).strip()
+    section_slug = entry.get("section_slug")
+    if section_slug is not None:
+        section_slug = str(section_slug).strip()
+        if section_slug not in valid_slugs:
+            section_slug = None
+    logger.info(
+        "LLM import entry: name=%r quantity=%r section_slug=%s",
+        name,
+        quantity or "(empty)",
+        section_slug or "(null)",
+    )
+    return {"name": name, "quantity": quantity, "section_slug": section_slug}
+
+
+Answer = tuple[Optional[int], dict]
+
+
+def _chunk_answer(
+    entry, chunk: list[int], valid_slugs, hints: dict[int, str]
+) -> Optional[Answer]:
+    """
+    (line index or None, item) of one LLM element, or None. An item the LLM left without
+    a section gets the header its line is under, like the lines read locally.
+    """
+    item = _clean_import_entry(entry, valid_slugs)
+    if item is None:
+        return None
+    index = _entry_line(entry, chunk)
+    if item["section_slug"] is None and index in hints:
+        item["section_slug"] = hints[index]
+    return (index, item)
+
+
+def _parse_chunk_answer(
+    content: str, chunk: list[int], valid_slugs, hints: dict[int, str]
+) -> Optional[list]:
+    """[(line index or None, item)] from the LLM's JSON array; None if it is not one."""
+    try:
+        parsed = decode_llm_json(content)
+    except json.JSONDecodeError as e:
+        logger.warning("LLM import normalize failed: %s", e)
+        return None
+    if not isinstance(parsed, list):
+        return None
+    answers = (_chunk_answer(entry, chunk, valid_slugs, hints) for entry in parsed)
+    return [answer for answer in answers if answer is not None]
+
+
+def _normalize_chunk(
+    lines: list[str],
+    chunk: list[int],
+    registry: SectionRegistry,
+    hints: dict[int, str],
+) -> Optional[list[Answer]]:
+    """Answers for one chunk, or None if the LLM call failed."""
+    content = call_llm(
+        _import_prompt(_numbered(lines, chunk), registry.prompt_list),
+        max_tokens=1024,
+        timeout=30,
+    )
+    if content is None:
+        return None
+    return _parse_chunk_answer(content, chunk, registry.slugs, hints)
+
+
+def _known_lines(lines: list[str], registry: SectionRegistry) -> dict[int, list[dict]]:
+    """
+    {line index: items} for the lines resolved without the LLM: learned dictionary first,
+    then the local parser (a section header resolves to no item).
+    """
+    known = {i: [item] for i, item in lookup_import_lines(lines, registry).items()}
+    if _local_parser_enabled():
+        for i, items in parse_import_lines(lines, registry).items():
+            known.setdefault(i, items)
+    return known
+
+
+def _pending(lines: list[str], known: dict[int, list[dict]]) -> list[int]:
+    return [i for i in range(len(lines)) if i not in known]
+
+
+def _assemble(known: dict[int, list[dict]], answers: list[Answer]) -> list[dict]:
+    """Items in paste order: known lines and LLM answers (unnumbered ones follow the previous)."""
+    buckets: dict[int, list[dict]] = {i: list(items) for i, items in known.items()}
+    last = -1
+    for index, item in answers:
+        index = last if index is None else index
+        buckets.setdefault(index, []).append(item)
+        last = index
+    return [item for i in sorted(buckets) for item in buckets[i]]
+
+
+def _finish(
+    lines: list[str],
+    known: dict[int, list[dict]],
+    results: list[Optional[list[Answer]]],
+) -> tuple[list[dict], bool]:
+    """
+    Learn from the chunk answers and assemble: (items, complete). A failed chunk only
+    loses its own lines; complete=False then, and the caller must not cache the items.
+    """
+    failed = sum(1 for r in results if r is None)
+    if failed:
+        logger.warning("LLM import failed: chunks=%d failed=%d", len(results), failed)
+    answers = [a for r in results if r is not None for a in r]
+    learn_import_lines(lines, answers)
+    items = _assemble(known, answers)
+    logger.info(
+        "import normalized count=%d known_lines=%d chunks=%d",
+        len(items),
+        len(known),
+        len(results),
+    )
+    return items, not failed
+
+
+def normalize_import_with_llm(raw_text: str) -> list[dict]:
+    """
+    Call LLM to normalize a pasted grocery list into a JSON array of items.
+    Returns list of {"name": str, "quantity": str, "section_slug": str | None}.
+    Returns [] if a line needs the LLM and it is unavailable, not configured or its
+    circuit breaker is open (caller can fall back to client parsing). When some chunks
+    fail, the other chunks and the lines resolved locally are returned, uncached. A paste of well-formed lines never calls the LLM.
+    Chunks are normalized in parallel threads (HTTP only; the registry is read up front).
+    """
+    lines = split_import_lines(raw_text)
+    if not lines:
+        return []
+    registry = get_section_registry()
+    key = import_cache_key(lines, registry)
+    cached = get_cached_import(key)
+    if cached is not None:
+        return cached
+    known = _known_lines(lines, registry)
+    pending = _pending(lines, known)
+    if pending and not is_llm_available():
+        return []
+    chunks = _chunk_indices(lines, pending)
+    hints = section_hints(lines, registry)
+    if len(chunks) <= 1:
+        results = [_normalize_chunk(lines, c, registry, hints) for c in chunks]
+    else:
+        workers = min(_max_parallel(), len(chunks))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(lambda c: _normalize_chunk(lines, c, registry, hints), chunks)
+            )
+    items, complete = _finish(lines, known, results)
+    if chunks and complete:
+        cache_import(key, items)
+    return items
+
+
+class _KnownBefore:
+    """Hands out the locally resolved items in paste order, up to a line."""
+
+    def __init__(self, known: dict[int, list[dict]]):
+        self._known = known
+        self._order = sorted(known)
+        self._next = 0
+
+    def upto(self, index: Optional[int] = None) -> list[dict]:
+        """Items of the known lines before index (all of them if None) not given yet."""
+        items = []
+        while self._next < len(self._order) and (
+            index is None or self._order[self._next] < index
+        ):
+            items.extend(self._known[self._order[self._next]])
+            self._next += 1
+        return items
+
+
+class _ChunkEnd:
+    """Queue sentinel; complete=True when the chunk's JSON array was closed."""
+
+    def __init__(self, complete: bool):
+        self.complete = complete
+
+
+def _stream_chunk(
+    lines: list[str],
+    chunk: list[int],
+    registry: SectionRegistry,
+    hints: dict[int, str],
+    emit: Callable[[object], None],
+    cancelled: threading.Event,
+) -> None:
+    """
+    Worker: emit each (line index, item) of the chunk's LLM stream, then a _ChunkEnd.
+    Setting `cancelled` (the consumer went away) stops at the next delta; leaving the loop
+    drops the stream_llm generator, which closes the response.
+    """
+    parser = JsonArrayStream()
+    try:
+        for delta in stream_llm(
+            _import_prompt(_numbered(lines, chunk), registry.prompt_list),
+            max_tokens=1024,
+            timeout=30,
+        ):
+            if cancelled.is_set():
+                return
+            for entry in parser.feed(delta):
+                answer = _chunk_answer(entry, chunk, registry.slugs, hints)
+                if answer is not None:
+                    emit(answer)
+            if parser.done:
+                break
+    finally:
+        if not cancelled.is_set():
+            emit(_ChunkEnd(parser.done))
+
+
+def _stream_done(
+    lines: list[str],
+    known: dict[int, list[dict]],
+    answers: list[Answer],
+    chunks: list[list[int]],
+    complete: bool,
+    key: str,
+) -> None:
+    logger.info(
+        "LLM import streamed count=%d known_lines=%d chunks=%d",
+        len(answers) + sum(len(items) for items in known.values()),
+        len(known),
+        len(chunks),
+    )
+    # A truncated or failed chunk would leave the paste partially imported: not cached.
+    if complete and chunks:
+        learn_import_lines(lines, answers)
+        cache_import(key, _assemble(known, answers))
+
+
+def stream_import_with_llm(raw_text: str) -> Iterator[dict]:
+    """
+    Streaming variant of normalize_import_with_llm: yields each item as soon as its JSON
+    object is complete in the LLM token stream. Items come in paste order, like
+    _assemble: the lines resolved locally are yielded once the LLM answers before them
+    are. LLM chunks stream concurrently and are yielded in chunk order (later chunks are
+    buffered until earlier ones finish). Yields nothing if a line needs the LLM and it is
+    unavailable.
+    """
+    lines = split_import_lines(raw_text)
+    if not lines:
+        return
+    registry = get_section_registry()
+    key = import_cache_key(lines, registry)
+    cached = get_cached_import(key)
+    if cached is not None:
+        yield from cached
+        return
+    known = _known_lines(lines, registry)
+    pending = _pending(lines, known)
+    if pending and not is_llm_available():
+        return
+    before = _KnownBefore(known)
+    chunks = _chunk_indices(lines, pending)
+    hints = section_hints(lines, registry)
+    queues = [queue.Queue() for _ in chunks]
+    pool = ThreadPoolExecutor(max_workers=max(1, min(_max_parallel(), len(chunks))))
+    cancelled = threading.Event()
+    answers: list[Answer] = []
+    complete = True
+    try:
+        for chunk, out in zip(chunks, queues):
+            pool.submit(
+                _stream_chunk, lines, chunk, registry, hints, out.put, cancelled
+            )
+        for chunk, out in zip(chunks, queues):
+            yield from before.upto(chunk[0])
+            while not isinstance(answer := out.get(), _ChunkEnd):
+                answers.append(answer)
+                if answer[0] is not None:
+                    yield from before.upto(answer[0])
+                yield answer[1]
+            complete = complete and answer.complete
+    finally:
+        # Early exit (client gone): the running chunk threads stop reading their streams
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    yield from before.upto()
+    _stream_done(lines, known, answers, chunks, complete, key)
+
+
+async def astream_import_with_llm(raw_text: str) -> AsyncIterator[dict]:
+    """
+    Async variant of stream_import_with_llm for the ASGI server, which would otherwise
+    drain a sync iterator in a thread before sending anything. The LLM streams are still
+    read by worker threads; their items reach the event loop through asyncio queues and
+    are yielded as soon as they are parsed.
+    """
+    lines = split_import_lines(raw_text)
+    if not lines:
+        return
+    registry = await database_sync_to_async(get_section_registry)()
+    key = import_cache_key(lines, registry)
+    cached = await database_sync_to_async(get_cached_import)(key)
+    if cached is not None:
+        for item in cached:
+            yield item
+        return
+    known = await database_sync_to_async(_known_lines)(lines, registry)
+    pending = _pending(lines, known)
+    if pending and not is_llm_available():
+        return
+    before = _KnownBefore(known)
+    chunks = _chunk_indices(lines, pending)
+    hints = section_hints(lines, registry)
+    loop = asyncio.get_running_loop()
+    queues = [asyncio.Queue() for _ in chunks]
+    pool = ThreadPoolExecutor(max_workers=max(1, min(_max_parallel(), len(chunks))))
+    cancelled = threading.Event()
+    answers: list[Answer] = []
+    complete = True
+    try:
+        for chunk, out in zip(chunks, queues):
+            emit = partial(loop.call_soon_threadsafe, out.put_nowait)
+            pool.submit(_stream_chunk, lines, chunk, registry, hints, emit, cancelled)
+        for chunk, out in zip(chunks, queues):
+            for item in before.upto(chunk[0]):
+                yield item
+            while not isinstance(answer := await out.get(), _ChunkEnd):
+                answers.append(answer)
+                if answer[0] is not None:
+                    for item in before.upto(answer[0]):
+                        yield item
+                yield answer[1]
+            complete = complete and answer.complete
+    finally:
+        # Early exit (client gone): the running chunk threads stop reading their streams
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    for item in before.upto():
+        yield item
+    await database_sync_to_async(_stream_done)(
+        lines, known, answers, chunks, complete, key
+    )
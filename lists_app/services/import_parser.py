@@ -0,0 +1,221 @@
+"""
+Deterministic parser for pasted grocery lists, tried before the LLM (import_normalizer).
+Same grammar as the client fallback (parseImportLines in controllers.js): "section: name",
+"name : quantité" and "2 oeufs", plus common French quantity forms ("500 g de farine",
+"farine 500g", "lait x2", "2 x yaourts", "beurre (250 g)"). A line naming a section
+("Boissons :") is a hint for the lines below it: their section comes from the keywords or
+the local classifier when these know the name, from the header otherwise (section_hints
+gives the same fallback to the lines left to the LLM). Lines it cannot read with certainty
+(several articles, free text, digits in the name...) are left to the LLM, and so are names
+that are neither a known keyword nor short and clean: the LLM normalizes them ("Huile d
+olive", "Viande hachée de bœuf") and its answer is learned (import_lines).
+"""
+
+import logging
+import re
+from typing import Optional
+
+from lists_app.services.keyword_matcher import get_keyword_matcher
+from lists_app.services.local_classifier import classify_locally
+from lists_app.services.section_assigner import _match_keywords, _normalize
+from lists_app.services.section_registry import SectionRegistry
+
+logger = logging.getLogger(__name__)
+
+UNITS = (
+    "kg",
+    "g",
+    "gr",
+    "mg",
+    "l",
+    "cl",
+    "ml",
+    "dl",
+    "kilos?",
+    "grammes?",
+    "litres?",
+    "bo[iî]tes?",
+    "paquets?",
+    "sachets?",
+    "pots?",
+    "bouteilles?",
+    "briques?",
+    "bottes?",
+    "tranches?",
+    "gousses?",
+    "barquettes?",
+    "filets?",
+    "packs?",
+    "canettes?",
+    "douzaines?",
+    "pi[eè]ces?",
+    "rouleaux",
+    "rouleau",
+    "tablettes?",
+    "pinc[eé]es?",
+    r"c\.\s?[àa]\s(?:soupe|caf[eé])",
+    r"cuill[eè]res?\s[àa]\s(?:soupe|caf[eé])",
+)
+_AMOUNT = r"\d+(?:[.,]\d+)?(?:/\d+)?|[½¼¾]"
+_UNIT = r"(?:" + "|".join(UNITS) + r")(?![\w'’])\.?"
+_QTY = rf"(?P<amount>{_AMOUNT})\s*(?P<unit>{_UNIT})?"
+
+LIST_MARK_RE = re.compile(r"^(?:[-*•·]+|\d+[.)])\s+")
+SECTION_PREFIX_RE = re.compile(r"^(?P<prefix>[^:|]+?)\s*[:|]\s*(?P<rest>.+)$")
+# "quantité nom": "2 oeufs", "500 g de farine", "1 kg d'oranges", "2 x yaourts"
+LEADING_QTY_RE = re.compile(
+    rf"^{_QTY}(?:\s*[x×])?\s+(?:de\s+|d['’]\s*)?(?P<name>.+)$", re.IGNORECASE
+)
+# "nom quantité": "farine 500g", "farine - 500 g", "lait x2", "oeufs 6"
+TRAILING_QTY_RE = re.compile(
+    rf"^(?P<name>.+?)(?:\s*[:\-–]\s*|\s+)(?:{_QTY}|[x×]\s*(?P<count>\d+))$",
+    re.IGNORECASE,
+)
+PAREN_QTY_RE = re.compile(r"^(?P<name>.+?)\s*\((?P<qty>[^()]+)\)$")
+QTY_RE = re.compile(rf"^{_QTY}$", re.IGNORECASE)
+NAME_RE = re.compile(r"[^\W\d_]+(?:(?:\s|['’-])[^\W\d_]+)*")
+# Several articles on one line ("sel et poivre") or a sentence: left to the LLM
+CONNECTOR_RE = re.compile(r"\b(?:et|ou|pour)\b", re.IGNORECASE)
+MAX_NAME_WORDS = 5
+# A name that is not a keyword is only kept with at most this many words and no lone
+# letter ("huile d olive": a lost apostrophe)
+MAX_UNKNOWN_NAME_WORDS = 2
+LONE_LETTER_RE = re.compile(r"(?:^|\s)[^\W\d_](?=\s|$)")
+MAX_QUANTITY_LENGTH = 40
+
+
+def _section_names(registry: SectionRegistry) -> dict[str, str]:
+    """Normalized slug or label -> slug."""
+    names = {}
+    for s in registry.sections:
+        names[_normalize(s.name_slug)] = s.name_slug
+        names[_normalize(s.label_fr)] = s.name_slug
+    return names
+
+
+def _clean_name(name: str) -> Optional[str]:
+    name = re.sub(r"\s+", " ", name.replace("’", "'")).strip(" -–")
+    if (
+        not NAME_RE.fullmatch(name)
+        or CONNECTOR_RE.search(name)
+        or len(name.split()) > MAX_NAME_WORDS
+    ):
+        return None
+    return name[0].upper() + name[1:]
+
+
+def _is_known(name: str) -> bool:
+    """The whole name (or its singular) is a keyword. Learned lines (ImportLine) are
+    resolved before the parser runs."""
+    normalized = _normalize(name)
+    found = get_keyword_matcher().match_keyword(normalized)
+    if found is None:
+        return False
+    return found[0] == normalized or (
+        normalized[-1] in "sx" and found[0] == normalized[:-1]
+    )
+
+
+def _is_plain(name: str) -> bool:
+    return len(name.split()) <= MAX_UNKNOWN_NAME_WORDS and not LONE_LETTER_RE.search(
+        name
+    )
+
+
+def _quantity(match: re.Match) -> str:
+    if match.group("amount") is None:
+        return match.group("count")
+    unit = re.sub(r"\s+", " ", (match.group("unit") or "").lower())
+    return f"{match.group('amount')} {unit}".strip()
+
+
+def _split_quantity(text: str) -> Optional[tuple[str, str]]:
+    """(name, quantity) of a line without section prefix, or None if not well-formed."""
+    if " : " in text:
+        name, quantity = (part.strip() for part in text.split(" : ", 1))
+        if not quantity or ":" in quantity or len(quantity) > MAX_QUANTITY_LENGTH:
+            return None
+        return name, quantity
+    match = LEADING_QTY_RE.match(text)
+    if match:
+        return match.group("name"), _quantity(match)
+    match = PAREN_QTY_RE.match(text)
+    if match:
+        qty = QTY_RE.match(match.group("qty").strip())
+        return (match.group("name"), _quantity(qty)) if qty else None
+    match = TRAILING_QTY_RE.match(text)
+    if match:
+        return match.group("name"), _quantity(match)
+    return text, ""
+
+
+def parse_import_line(line: str, registry: SectionRegistry) -> Optional[dict]:
+    """
+    {"name", "quantity", "section_slug"} for a well-formed line, or None (ambiguous).
+    section_slug is set by a "section: " prefix only.
+    """
+    text = LIST_MARK_RE.sub("", line.strip())
+    section_slug = None
+    match = SECTION_PREFIX_RE.match(text)
+    if match:
+        slug = _section_names(registry).get(_normalize(match.group("prefix")))
+        if slug:
+            section_slug, text = slug, match.group("rest")
+    parts = _split_quantity(text)
+    if parts is None:
+        return None
+    name = _clean_name(parts[0])
+    if name is None or not (_is_plain(name) or _is_known(name)):
+        return None
+    return {"name": name, "quantity": parts[1], "section_slug": section_slug}
+
+
+def _header(line: str, sections: dict[str, str]) -> Optional[str]:
+    return sections.get(_normalize(LIST_MARK_RE.sub("", line).rstrip(" :")))
+
+
+def section_hints(lines: list[str], registry: SectionRegistry) -> dict[int, str]:
+    """
+    {line index: slug} for the lines under a section header. A header of an unknown group
+    ("Pour la pâte :") ends the current section.
+    """
+    sections = _section_names(registry)
+    current = None
+    hints = {}
+    for i, line in enumerate(lines):
+        header = _header(line, sections)
+        if header or line.endswith(":"):
+            current = header
+        elif current:
+            hints[i] = current
+    return hints
+
+
+def _classified(name: str) -> Optional[str]:
+    """Section the keywords or the local classifier give the name, if any."""
+    normalized = _normalize(name)
+    return _match_keywords(normalized) or classify_locally(normalized)
+
+
+def parse_import_lines(lines: list[str], registry: SectionRegistry) -> dict[int, list]:
+    """
+    {line index: items} for the lines read locally: one item, or none for a section
+    header. Missing indices are the ambiguous lines.
+    """
+    sections = _section_names(registry)
+    hints = section_hints(lines, registry)
+    parsed: dict[int, list] = {}
+    for i, line in enumerate(lines):
+        if _header(line, sections):
+            parsed[i] = []
+            continue
+        if line.endswith(":"):
+            continue
+        item = parse_import_line(line, registry)
+        if item is None:
+            continue
+        if item["section_slug"] is None and i in hints:
+            item["section_slug"] = _classified(item["name"]) or hints[i]
+        parsed[i] = [item]
+    logger.debug("import lines parsed: lines=%d parsed=%d", len(lines), len(parsed))
+    return parsed
@@ -0,0 +1,86 @@
+"""
+Merging of items with the same name: quantities summed when they share a unit, notes
+concatenated. Used by the list deduplication and the multi-recipe Quitoque import.
+"""
+
+import re
+from collections import defaultdict
+
+
+def _parse_quantity_with_unit(s: str) -> tuple[float, str] | None:
+    """Parse '100 g' or '1.5 l' into (number, unit). Unit lowercase. Returns None if not matched."""
+    s = (s or "").strip()
+    if not s:
+        return None
+    # Match number (int or decimal) optionally followed by unit (letters, maybe with spaces)
+    m = re.match(r"^([\d.,]+)\s*([a-zA-Z\u00e0-\u024f]+)?\s*$", s)
+    if not m:
+        return None
+    num_str, unit = m.group(1), (m.group(2) or "").strip().lower()
+    num_str = num_str.replace(",", ".")
+    try:
+        val = float(num_str)
+    except ValueError:
+        return None
+    return (val, unit or "")
+
+
+def merge_quantities(quantities: list[str]) -> str:
+    """Sum when all numeric or all same unit (e.g. 100 g + 100 g -> 200 g); else concatenate with ' + '. Capped at 80 chars."""
+    qs = [q.strip() for q in quantities if q and str(q).strip()]
+    if not qs:
+        return ""
+    # Try parse as "number unit" for each
+    parsed = [_parse_quantity_with_unit(q) for q in qs]
+    if all(p is not None for p in parsed) and parsed:
+        units = [p[1] for p in parsed]
+        if len(set(units)) == 1:
+            total = sum(p[0] for p in parsed)
+            unit = units[0]
+            if unit:
+                result = (
+                    f"{int(total) if total == int(total) else total} {unit}".strip()
+                )
+            else:
+                result = str(int(total) if total == int(total) else total)
+            return result[:80]
+    # Fallback: plain numbers only
+    numeric_vals = []
+    for q in qs:
+        try:
+            v = int(q)
+        except ValueError:
+            try:
+                v = float(q.replace(",", "."))
+            except ValueError:
+                return " + ".join(qs)[:80]
+        numeric_vals.append(v)
+    total = sum(numeric_vals)
+    return str(int(total) if total == int(total) else total)[:80]
+
+
+def dedup_name_key(name: str) -> str:
+    """Normalize name for deduplication: strip, lower, then singularize so 'pomme' and 'pommes' merge."""
+    key = (name or "").strip().lower()
+    if len(key) >= 3:
+        if key.endswith("s") and not key.endswith("ss"):
+            key = key[:-1]
+        elif key.endswith("x"):
+            key = key[:-1]
+    return key
+
+
+def merge_recipe_items(results: list[dict]) -> list[dict]:
+    """Items of all recipe results, merged by normalized name like deduplicate_list_items."""
+    groups = defaultdict(list)
+    for result in results:
+        for it in result["items"]:
+            groups[dedup_name_key(it.get("name") or "")].append(it)
+    merged = []
+    for group in groups.values():
+        first = dict(group[0])
+        first["quantity"] = merge_quantities([it.get("quantity") or "" for it in group])
+        notes_parts = [it.get("notes") or "" for it in group]
+        first["notes"] = " ; ".join(p for p in notes_parts if p.strip())[:2000]
+        merged.append(first)
+    return merged
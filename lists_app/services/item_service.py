@@ -13,41 +13,110 @@ from lists_app.serializers import (
     validate_notes,
 )
 from lists_app.utils import parse_uuid
+from lists_app.services.cache_generation import SECTIONS, bump_generation
 from lists_app.services.item_order import reorder_section_by_name
-from lists_app.services.section_assigner import assign_section
+from lists_app.services.section_assigner import assign_section, needs_llm_lookup
+from lists_app.services.section_registry import get_section_by_id, get_section_by_slug
 
+# Section used while an item waits for background classification
+PROVISIONAL_SECTION_SLUG = "autre"
 
-def create_item(grocery_list, name, quantity="", notes="", section_slug=None):
+
+def _next_position(grocery_list, section) -> int:
+    max_pos = (
+        grocery_list.items.filter(section=section)
+        .aggregate(mx=Max("position"))
+        .get("mx")
+        or 0
+    )
+    return max_pos + 1
+
+
+def create_item(
+    grocery_list,
+    name,
+    quantity="",
+    notes="",
+    section_slug=None,
+    defer_classification=False,
+):
     """
     Create one item for a list. Uses serializers for validation.
     Returns item_to_dict(item). Raises ValidationError if name is invalid.
+    With defer_classification=True, a name that would need the LLM is placed in the
+    provisional section ("autre") at once and the returned dict has section_pending=True;
+    the caller then assigns the final section in the background and moves the item
+    with apply_reclassification.
     """
     name = validate_item_name(name)
     quantity = validate_quantity(quantity)
     notes = validate_notes(notes)
+    pending = False
     if section_slug and str(section_slug).strip():
-        section = Section.objects.filter(name_slug=str(section_slug).strip()).first()
+        section = get_section_by_slug(section_slug)
         if section is None:
             section = assign_section(name)
+    elif defer_classification and needs_llm_lookup(name):
+        section = get_section_by_slug(PROVISIONAL_SECTION_SLUG)
+        pending = section is not None
     else:
         section = assign_section(name)
     if section is None:
-        section = Section.objects.get(name_slug="autre")
-    max_pos = (
-        grocery_list.items.filter(section=section)
-        .aggregate(mx=Max("position"))
-        .get("mx")
-        or 0
-    )
+        section = get_section_by_slug("autre") or Section.objects.get(name_slug="autre")
     item = Item.objects.create(
         grocery_list=grocery_list,
         name=name,
         section=section,
         quantity=quantity,
         notes=notes,
-        position=max_pos + 1,
+        position=_next_position(grocery_list, section),
     )
     reorder_section_by_name(grocery_list, section)
+    item_dict = item_to_dict(item)
+    if pending:
+        item_dict["section_pending"] = True
+    return item_dict
+
+
+def item_name(grocery_list, item_id):
+    """Name of an item of the list, or None if not found."""
+    uid = parse_uuid(item_id)
+    if uid is None:
+        return None
+    return (
+        Item.objects.filter(pk=uid, grocery_list=grocery_list)
+        .values_list("name", flat=True)
+        .first()
+    )
+
+
+def apply_reclassification(grocery_list, item_id, section):
+    """
+    Move an item created with defer_classification to its final section, assigned by
+    the caller (e.g. aassign_section on the event loop), if it is still in the
+    provisional section. Returns item_to_dict(item) when moved, else None.
+    """
+    uid = parse_uuid(item_id)
+    if uid is None:
+        return None
+    # Re-read: the item may have been moved or deleted during the LLM call.
+    current = (
+        Item.objects.filter(pk=uid, grocery_list=grocery_list)
+        .values_list("section__name_slug", flat=True)
+        .first()
+    )
+    if (
+        section is None
+        or current != PROVISIONAL_SECTION_SLUG
+        or section.name_slug == PROVISIONAL_SECTION_SLUG
+    ):
+        return None
+    item = Item.objects.get(pk=uid, grocery_list=grocery_list)
+    item.section = section
+    item.position = _next_position(grocery_list, section)
+    item.save(update_fields=["section", "position"])
+    reorder_section_by_name(grocery_list, section)
+    item.refresh_from_db()
     return item_to_dict(item)
 
 
@@ -78,12 +147,9 @@ def update_item(grocery_list, item_id, **kwargs):
         except (TypeError, ValueError):
             pass
     if "section_id" in kwargs and kwargs["section_id"] is not None:
-        try:
-            sid = int(kwargs["section_id"])
-            section = Section.objects.get(pk=sid)
+        section = get_section_by_id(kwargs["section_id"])
+        if section is not None:
             item.section = section
-        except (TypeError, ValueError, Section.DoesNotExist):
-            pass
     item.save()
     return item_to_dict(item)
 
@@ -100,6 +166,8 @@ def apply_reorder(grocery_list, section_order=None, item_orders=None):
                 Section.objects.filter(pk=sid).update(position=pos)
             except Exception:
                 pass
+        # queryset.update() sends no signals: invalidate section caches explicitly.
+        bump_generation(SECTIONS)
     if item_orders and isinstance(item_orders, list):
         for entry in item_orders:
             if "item_id" in entry and "position" in entry:
@@ -0,0 +1,78 @@
+"""
+Incremental parser for a JSON array received in pieces (LLM token stream).
+Each top-level element is decoded as soon as its closing brace (or comma) arrives, so callers
+can deliver items before the array is complete. Text before the first "[" (e.g. a markdown
+code fence) is ignored.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JsonArrayStream:
+    def __init__(self):
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buf: list[str] = []
+
+    @property
+    def done(self) -> bool:
+        """True once the closing "]" of the array was seen."""
+        return self._done
+
+    def feed(self, chunk: str) -> list:
+        """Consume a piece of text; return the elements completed by it, in order."""
+        elements = []
+        for ch in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                self._buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._buf.append(ch)
+            elif ch in "[{":
+                self._depth += 1
+                self._buf.append(ch)
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._flush(elements)
+                    self._done = True
+                else:
+                    self._buf.append(ch)
+                    if self._depth == 1:
+                        # Object/array element closed: no need to wait for the comma.
+                        self._flush(elements)
+            elif ch == "," and self._depth == 1:
+                self._flush(elements)
+            else:
+                self._buf.append(ch)
+        return elements
+
+    def _flush(self, elements: list) -> None:
+        text = "".join(self._buf).strip()
+        self._buf = []
+        if not text:
+            return
+        try:
+            elements.append(json.loads(text))
+        except json.JSONDecodeError as e:
+            logger.warning("JSON stream element skipped: %s", e)
@@ -0,0 +1,119 @@
+"""
+Keyword table compaction (compact_keywords command). A keyword that contains a shorter
+keyword of the same section ("tomates cerises bio" ⊃ "tomate") is usually redundant, but
+the matcher prefers the longest keyword, so removing it could let another section's keyword
+win in a text that contains it ("ketchup bio aux tomates cerises"). A keyword is only
+removed when no keyword of another section ranks between it and the same-section keyword
+that would take over, which keeps the section of every possible text unchanged.
+"""
+
+import logging
+
+from django.db import transaction
+
+from lists_app.models import SectionKeyword
+from lists_app.services.cache_generation import KEYWORDS, bump_generation
+from lists_app.services.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+
+def subsumed_keywords(pairs: dict[str, str]) -> set[str]:
+    """Keywords containing a strictly shorter keyword that maps to the same section."""
+    subsumed = set()
+    for keyword, slug in pairs.items():
+        n = len(keyword)
+        if any(
+            pairs.get(keyword[i:j]) == slug
+            for i in range(n)
+            for j in range(i + 1, n + 1)
+            if j - i < n
+        ):
+            subsumed.add(keyword)
+    return subsumed
+
+
+def _rank(keyword: str) -> tuple[int, str]:
+    """Matcher preference order (keyword_matcher._better): longest, then alphabetical."""
+    return (-len(keyword), keyword)
+
+
+def plan_compaction(pairs: dict[str, str]) -> tuple[set[str], set[str]]:
+    """
+    (removable, kept) among the subsumed keywords. In a text containing a removed keyword
+    K, the match falls back at worst to S, the best same-section keyword inside K that
+    stays; it keeps K's section unless a keyword of another section ranks between K and
+    S. Such a keyword can be put next to K in some text, so K is then kept.
+    """
+    candidates = subsumed_keywords(pairs)
+    ordered = sorted(pairs, key=_rank)
+    position = {keyword: i for i, keyword in enumerate(ordered)}
+    # next_other[i]: position of the first keyword after ordered[i] in another section
+    next_other = [len(ordered)] * len(ordered)
+    for i in range(len(ordered) - 2, -1, -1):
+        if pairs[ordered[i + 1]] != pairs[ordered[i]]:
+            next_other[i] = i + 1
+        else:
+            next_other[i] = next_other[i + 1]
+    removable, kept = set(), set()
+    # Shortest first: the substrings of a candidate are decided before it
+    for keyword in sorted(candidates, key=len):
+        slug, n = pairs[keyword], len(keyword)
+        fallback = min(
+            (
+                position[keyword[i:j]]
+                for i in range(n)
+                for j in range(i + 1, n + 1)
+                if j - i < n
+                and pairs.get(keyword[i:j]) == slug
+                and keyword[i:j] not in removable
+            ),
+            default=len(ordered),
+        )
+        if next_other[position[keyword]] < fallback:
+            kept.add(keyword)
+        else:
+            removable.add(keyword)
+    return removable, kept
+
+
+def compact_keywords(dry_run: bool = False) -> dict:
+    """
+    Remove the subsumed keywords that change no match. Returns the removed and kept
+    keywords, keyword and matcher node counts before/after and the bytes saved.
+    """
+    pairs = dict(SectionKeyword.objects.values_list("keyword", "section__name_slug"))
+    removable, kept = plan_compaction(pairs)
+    before = KeywordMatcher(pairs.items())
+    after = KeywordMatcher((k, s) for k, s in pairs.items() if k not in removable)
+    report = {
+        "removed": sorted(removable),
+        "kept": sorted(kept),
+        "keywords_before": before.keyword_count,
+        "keywords_after": after.keyword_count,
+        "nodes_before": before.node_count,
+        "nodes_after": after.node_count,
+        "bytes_saved": sum(len(k.encode("utf-8")) for k in removable),
+    }
+    if removable and not dry_run:
+        ids = list(
+            SectionKeyword.objects.filter(keyword__in=removable).values_list(
+                "id", flat=True
+            )
+        )
+        with transaction.atomic():
+            for start in range(0, len(ids), 500):
+                # A plain DELETE: delete() would send post_delete, and so bump the
+                # keyword generation (signals.py), once per row.
+                SectionKeyword.objects.filter(
+                    id__in=ids[start : start + 500]
+                )._raw_delete(SectionKeyword.objects.db)
+        bump_generation(KEYWORDS)
+        logger.info(
+            "keywords compacted: removed=%d kept=%d nodes=%d->%d",
+            len(removable),
+            len(kept),
+            before.node_count,
+            after.node_count,
+        )
+    return report
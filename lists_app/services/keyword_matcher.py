@@ -0,0 +1,113 @@
+"""
+Compiled keyword matcher (Aho-Corasick automaton) for section assignment.
+Built once per worker from SectionKeyword rows and rebuilt when the keywords generation moves.
+A lookup scans the item name once, whatever the size of the keyword table.
+Longest keyword wins, ties broken alphabetically.
+"""
+
+import logging
+from typing import Iterable, Optional
+
+from lists_app.models import SectionKeyword
+from lists_app.services.cache_generation import KEYWORDS, GenerationCache
+
+logger = logging.getLogger(__name__)
+
+
+def _better(a: Optional[tuple[str, str]], b: Optional[tuple[str, str]]):
+    """Return the preferred (keyword, slug) match: longest keyword, then alphabetical."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if (-len(a[0]), a[0]) <= (-len(b[0]), b[0]) else b
+
+
+class KeywordMatcher:
+    """Multi-pattern substring matcher mapping keywords to section slugs."""
+
+    def __init__(self, pairs: Iterable[tuple[str, str]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._best: list[Optional[tuple[str, str]]] = [None]
+        self.keyword_count = 0
+        for keyword, slug in pairs:
+            if keyword:
+                self._insert(keyword, slug)
+        self._link()
+
+    def _insert(self, keyword: str, slug: str) -> None:
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+                self._goto[node][ch] = nxt
+            node = nxt
+        if self._best[node] is None:
+            self.keyword_count += 1
+        self._best[node] = _better(self._best[node], (keyword, slug))
+
+    def _link(self) -> None:
+        """Compute failure links breadth-first and fold suffix matches into each node."""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._best[child] = _better(
+                    self._best[child], self._best[self._fail[child]]
+                )
+                queue.append(child)
+
+    @property
+    def node_count(self) -> int:
+        return len(self._goto)
+
+    def match_keyword(self, text: str) -> Optional[tuple[str, str]]:
+        """Return (keyword, slug) of the best keyword contained in text, or None."""
+        if not text:
+            return None
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node = 0
+        best = None
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if best_at[node] is not None:
+                best = _better(best, best_at[node])
+        return best
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the section slug of the best keyword contained in text, or None."""
+        found = self.match_keyword(text)
+        return found[1] if found else None
+
+
+def _load_matcher() -> KeywordMatcher:
+    pairs = SectionKeyword.objects.values_list("keyword", "section__name_slug")
+    matcher = KeywordMatcher(pairs)
+    logger.info(
+        "keyword matcher built: keywords=%d nodes=%d",
+        matcher.keyword_count,
+        matcher.node_count,
+    )
+    return matcher
+
+
+_matcher_cache = GenerationCache((KEYWORDS,), _load_matcher)
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """Return the process-wide matcher, rebuilt lazily when keywords change in any worker."""
+    return _matcher_cache.get()
@@ -0,0 +1,119 @@
+"""
+Offline keyword seeding (seed_keywords command): classify a corpus of item names with the
+LLM in large batches and bulk-insert the answers as SectionKeyword rows, so that live
+assign_section calls resolve common names from keywords instead of paying an LLM call the
+first time each one is seen.
+"""
+
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.db import transaction
+
+from lists_app.models import Item, SectionKeyword
+from lists_app.services.cache_generation import KEYWORDS, bump_generation
+from lists_app.services.llm_client import is_llm_available
+from lists_app.services.section_assigner import (
+    LLM_BATCH_MAX_NAMES,
+    LLM_INPUT_MAX_LENGTH,
+    _call_llm_batch,
+    _match_keywords,
+    _normalize,
+)
+from lists_app.services.section_registry import get_section_registry
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_CORPUS = (
+    Path(__file__).resolve().parent.parent / "data" / "grocery_names_fr.txt"
+)
+
+
+def read_corpus(path: Optional[Path] = None) -> list[str]:
+    """Names of a corpus file: one per line, blank lines and # comments ignored."""
+    text = Path(path or BUNDLED_CORPUS).read_text(encoding="utf-8")
+    return [
+        line.strip()
+        for line in text.splitlines()
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+
+
+def item_history_names() -> list[str]:
+    return list(Item.objects.values_list("name", flat=True).distinct())
+
+
+def unknown_names(names: list[str]) -> dict[str, str]:
+    """{normalized: name} for the names no keyword matches yet (deduplicated)."""
+    unknown: dict[str, str] = {}
+    for name in names:
+        normalized = _normalize(name)
+        if (
+            not normalized
+            or normalized in unknown
+            or len(normalized) > LLM_INPUT_MAX_LENGTH
+            or _match_keywords(normalized) is not None
+        ):
+            continue
+        unknown[normalized] = name.strip()
+    return unknown
+
+
+def classify_names(
+    names: dict[str, str],
+    batch_size: int = LLM_BATCH_MAX_NAMES,
+    default_slug: str = "autre",
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> dict[str, str]:
+    """
+    {normalized: slug} for the names the LLM put in a section other than the default.
+    Stops early when the LLM becomes unavailable; on_batch(done, total) reports progress.
+    """
+    batch_size = max(1, min(batch_size, LLM_BATCH_MAX_NAMES))
+    pending = list(names.items())
+    result: dict[str, str] = {}
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start : start + batch_size]
+        answers = _call_llm_batch([name for _, name in chunk])
+        if not answers and not is_llm_available():
+            logger.warning(
+                "keyword seeding stopped: LLM unavailable after %d names", start
+            )
+            break
+        for normalized, name in chunk:
+            slug = answers.get(name[:LLM_INPUT_MAX_LENGTH])
+            if slug and slug != default_slug:
+                result[normalized] = slug
+        if on_batch is not None:
+            on_batch(start + len(chunk), len(pending))
+    return result
+
+
+def insert_keywords(slugs: dict[str, str]) -> int:
+    """Bulk-insert {keyword: slug}; existing keywords are kept. Returns the rows created."""
+    sections = get_section_registry().by_slug
+    existing = set(
+        SectionKeyword.objects.filter(keyword__in=list(slugs)).values_list(
+            "keyword", flat=True
+        )
+    )
+    rows = [
+        SectionKeyword(keyword=keyword, section=sections[slug])
+        for keyword, slug in slugs.items()
+        if keyword not in existing and slug in sections
+    ]
+    if not rows:
+        return 0
+    inserted = SectionKeyword.objects.filter(keyword__in=[row.keyword for row in rows])
+    with transaction.atomic():
+        # Rows added meanwhile (e.g. learned by assign_section) are skipped by
+        # ignore_conflicts: count what the insert actually added.
+        before = inserted.count()
+        SectionKeyword.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        created = inserted.count() - before
+    if created:
+        # bulk_create sends no post_save signal: bump the keyword generation ourselves.
+        bump_generation(KEYWORDS)
+    logger.info("seeded keywords: count=%d skipped=%d", created, len(rows) - created)
+    return created
@@ -1,55 +1,616 @@
 """
 Shared LLM client for OpenAI-compatible APIs. Reads all config from Django settings.
+Requests go through one process-wide keep-alive connection pool, with bounded, jittered
+retries on connection errors and 429/5xx, all within a per-call deadline.
+acall_llm is the asyncio variant (httpx) for the WebSocket path: it awaits the response on
+the event loop instead of holding a worker thread.
+Several endpoints/models can be configured (llm_endpoints): a call goes to the first one
+and is hedged to the next when it has not answered within that endpoint's latency
+percentile (or failed); the first answer wins and the other calls are cancelled.
+Each endpoint has its own circuit breaker: during an outage calls return None at once
+instead of waiting out their timeout (see llm_status()).
 """
 
+import asyncio
 import json
 import logging
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import AsyncGenerator, Iterator
 
+import httpx
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from lists_app.services.circuit_breaker import CircuitBreaker
+from lists_app.services.llm_endpoints import (
+    LLMEndpoint,
+    get_llm_endpoints,
+    reset_llm_endpoints,
+)
 
 logger = logging.getLogger(__name__)
 
+# Status codes worth retrying (rate limiting, transient server errors)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
-def call_llm(
-    prompt: str,
-    *,
-    max_tokens: int = 256,
-    timeout: int | None = None,
-) -> str | None:
+# Bytes read at a time from a response body (the deadline is checked between reads)
+BODY_CHUNK_SIZE = 4096
+
+# Transport errors the async client retries (connection refused/reset, connect timeout)
+ASYNC_RETRY_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.RemoteProtocolError,
+)
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+# One httpx client per event loop: its connections cannot be shared across loops. Each is
+# kept with the async generator that closes it when the loop shuts down.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, AsyncGenerator]]" = weakref.WeakKeyDictionary()
+# Threads running the concurrent (hedged) calls of call_llm
+_hedge_pool: ThreadPoolExecutor | None = None
+_hedge_pool_lock = threading.Lock()
+
+
+class _Cancelled(Exception):
+    """A hedged call lost the race: stop retrying."""
+
+
+def _get_breaker() -> CircuitBreaker:
+    """Circuit breaker of the primary (first) endpoint."""
+    return get_llm_endpoints()[0].breaker
+
+
+def reset_llm_breaker() -> None:
+    """Drop breaker and latency state of all endpoints; rebuilt from current settings."""
+    reset_llm_endpoints()
+
+
+def _usable_endpoints() -> list[LLMEndpoint]:
+    return [endpoint for endpoint in get_llm_endpoints() if endpoint.api_key]
+
+
+def is_llm_configured() -> bool:
+    """True when an endpoint has an API key, i.e. call_llm may reach the network."""
+    return bool(_usable_endpoints())
+
+
+def is_llm_available() -> bool:
+    """Configured and the circuit breaker of some endpoint is not refusing calls."""
+    return any(not e.breaker.is_open() for e in _usable_endpoints())
+
+
+def llm_status() -> dict:
+    endpoints = get_llm_endpoints()
+    return {
+        "configured": is_llm_configured(),
+        "breaker": endpoints[0].breaker.snapshot(),
+        "endpoints": [endpoint.snapshot() for endpoint in endpoints],
+    }
+
+
+def _get_session() -> requests.Session:
     """
-    Call the configured LLM with a single user message. Returns the assistant content or None.
-    Reads LLM_API_KEY, LLM_API_URL, LLM_MODEL, LLM_TIMEOUT from settings.
-    """
-    api_key = getattr(settings, "LLM_API_KEY", "") or ""
-    if not api_key:
-        return None
-    api_url = getattr(
-        settings,
-        "LLM_API_URL",
-        "https://api.openai.com/v1/chat/completions",
-    )
-    model = getattr(settings, "LLM_MODEL", "Meta-Llama-3_3-70B-Instruct")
-    default_timeout = getattr(settings, "LLM_TIMEOUT", 30)
-    timeout = timeout if timeout is not None else default_timeout
+    Process-wide session with a keep-alive pool of LLM_POOL_SIZE connections per host.
+    Safe to share between worker threads: only post() is used, the pool is thread-safe.
+    """
+    global _session
+    if _session is not None:
+        return _session
+    with _session_lock:
+        if _session is None:
+            pool_size = int(getattr(settings, "LLM_POOL_SIZE", 10))
+            adapter = HTTPAdapter(
+                pool_connections=4, pool_maxsize=pool_size, max_retries=0
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+async def _close_with_loop(client: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    """
+    Suspended at its yield for the life of the loop. Loops close their unfinished async
+    generators on shutdown (asyncio.run, asgiref's async_to_sync), which runs the finally
+    block: the client's connections are closed before the loop is.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Keep-alive httpx client for the running event loop, sized like the sync pool."""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None or entry[0].is_closed:
+        pool_size = int(getattr(settings, "LLM_POOL_SIZE", 10))
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            )
+        )
+        closer = _close_with_loop(client)
+        try:
+            # Step to the yield now: this registers the generator with the running loop.
+            closer.asend(None).send(None)
+        except StopIteration:
+            pass
+        entry = _async_clients[loop] = (client, closer)
+    return entry[0]
+
+
+def _backoff_delay(attempt: int, resp=None) -> float:
+    """Full-jitter exponential backoff; honours a numeric Retry-After header."""
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After", "")
+        if retry_after.strip().isdigit():
+            return float(retry_after)
+    base = float(getattr(settings, "LLM_RETRY_BACKOFF", 0.5))
+    return random.uniform(0, base * (2**attempt))
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _hedge_pool_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, "LLM_POOL_SIZE", 10)),
+                    thread_name_prefix="llm-hedge",
+                )
+    return _hedge_pool
+
+
+def _post_with_retries(
+    api_url: str,
+    payload: dict,
+    headers: dict,
+    timeout: float,
+    stream: bool = False,
+    cancelled: threading.Event | None = None,
+) -> requests.Response:
+    """
+    POST with up to LLM_MAX_RETRIES retries. `timeout` is the deadline for the whole call,
+    retries and backoff included; each attempt passes the time left to requests, which
+    applies it to the connect and to each socket read, not to the whole body.
+    Raises requests.RequestException on final failure.
+    With stream=True only the response headers are awaited: the caller reads the body and
+    checks the deadline while doing so (see _read_body).
+    Setting `cancelled` stops the retries (raises _Cancelled).
+    """
+    max_retries = int(getattr(settings, "LLM_MAX_RETRIES", 2))
+    deadline = time.monotonic() + timeout
+    session = _get_session()
+    attempt = 0
+    while True:
+        if cancelled is not None and cancelled.is_set():
+            raise _Cancelled()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout("LLM call deadline exceeded")
+        resp = None
+        try:
+            resp = session.post(
+                api_url, json=payload, headers=headers, timeout=remaining, stream=stream
+            )
+            if resp.status_code not in RETRY_STATUSES:
+                try:
+                    resp.raise_for_status()
+                except requests.HTTPError:
+                    # Streamed: release the pooled connection, nobody reads this body
+                    resp.close()
+                    raise
+                return resp
+            error = requests.HTTPError(f"{resp.status_code} from LLM", response=resp)
+            resp.close()
+        except requests.ConnectionError as e:
+            error = e
+        if attempt >= max_retries:
+            raise error
+        delay = _backoff_delay(attempt, resp)
+        if time.monotonic() + delay >= deadline:
+            raise error
+        logger.info(
+            "LLM call retry: attempt=%d delay=%.2fs error=%s", attempt + 1, delay, error
+        )
+        if cancelled is not None and cancelled.wait(delay):
+            raise _Cancelled()
+        if cancelled is None:
+            time.sleep(delay)
+        attempt += 1
+
+
+def _read_body(
+    resp: requests.Response, deadline: float, cancelled: threading.Event | None = None
+) -> bytes:
+    """
+    Body of a streamed response, read in chunks so that the call deadline also bounds a
+    slowly sent body. Raises requests.Timeout past the deadline, _Cancelled when
+    `cancelled` is set; the response is closed in every case.
+    """
+    chunks = []
+    try:
+        for chunk in resp.iter_content(chunk_size=BODY_CHUNK_SIZE):
+            if cancelled is not None and cancelled.is_set():
+                raise _Cancelled()
+            if time.monotonic() > deadline:
+                raise requests.Timeout("LLM call deadline exceeded")
+            chunks.append(chunk)
+    finally:
+        resp.close()
+    return b"".join(chunks)
+
+
+async def _apost_with_retries(
+    api_url: str, payload: dict, headers: dict, timeout: float
+) -> httpx.Response:
+    """Async counterpart of _post_with_retries. Raises httpx.HTTPError on final failure."""
+    max_retries = int(getattr(settings, "LLM_MAX_RETRIES", 2))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    client = _get_async_client()
+    attempt = 0
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise httpx.TimeoutException("LLM call deadline exceeded")
+        resp = None
+        try:
+            # httpx timeouts are per operation too: wait_for bounds the whole attempt
+            resp = await asyncio.wait_for(
+                client.post(api_url, json=payload, headers=headers, timeout=remaining),
+                remaining,
+            )
+            if resp.status_code not in RETRY_STATUSES:
+                try:
+                    resp.raise_for_status()
+                except httpx.HTTPStatusError:
+                    await resp.aclose()
+                    raise
+                return resp
+            error = httpx.HTTPStatusError(
+                f"{resp.status_code} from LLM", request=resp.request, response=resp
+            )
+            await resp.aclose()
+        except ASYNC_RETRY_ERRORS as e:
+            error = e
+        except asyncio.TimeoutError:
+            raise httpx.TimeoutException("LLM call deadline exceeded") from None
+        if attempt >= max_retries:
+            raise error
+        delay = _backoff_delay(attempt, resp)
+        if loop.time() + delay >= deadline:
+            raise error
+        logger.info(
+            "LLM call retry: attempt=%d delay=%.2fs error=%s", attempt + 1, delay, error
+        )
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def _record_outcome(breaker: CircuitBreaker, error: Exception) -> None:
+    """A 4xx answer (bad prompt, auth) means the backend is up: only outages trip the breaker."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None and status < 500 and status not in RETRY_STATUSES:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+
+def _timeout(timeout: float | None) -> float:
+    return timeout if timeout is not None else getattr(settings, "LLM_TIMEOUT", 30)
+
+
+def _request_parts(
+    endpoint: LLMEndpoint, prompt: str, max_tokens: int, timeout: float
+) -> tuple:
+    """(api_url, payload, headers, timeout) for a chat completion on the endpoint."""
     payload = {
-        "model": model,
+        "model": endpoint.model,
         "messages": [{"role": "user", "content": prompt}],
         "max_tokens": max_tokens,
     }
     headers = {
-        "Authorization": f"Bearer {api_key}",
+        "Authorization": f"Bearer {endpoint.api_key}",
         "Content-Type": "application/json",
     }
+    return (endpoint.url, payload, headers, timeout)
+
+
+def decode_llm_json(content: str):
+    """Decode a JSON answer from the LLM, tolerating a surrounding markdown code fence."""
+    content = content.strip()
+    if content.startswith("```"):
+        lines = content.split("\n")
+        if lines[0].strip().startswith("```"):
+            lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+        content = "\n".join(lines)
+    content = content.replace("\\\\\\", "\\")
+    return json.loads(content)
+
+
+def _extract_content(data: dict) -> str | None:
+    choices = data.get("choices") or []
+    if not choices:
+        return None
+    return (choices[0].get("message") or {}).get("content") or ""
+
+
+def _call_endpoint(
+    endpoint: LLMEndpoint,
+    prompt: str,
+    max_tokens: int,
+    timeout: float,
+    cancelled: threading.Event | None = None,
+) -> str | None:
+    """One call to one endpoint (breaker, retries, latency). None if refused or failed."""
+    breaker = endpoint.breaker
+    if not breaker.allow():
+        logger.debug("LLM call skipped: circuit breaker open (%s)", endpoint.name)
+        return None
+    start = time.monotonic()
+    try:
+        resp = _post_with_retries(
+            *_request_parts(endpoint, prompt, max_tokens, timeout),
+            stream=True,
+            cancelled=cancelled,
+        )
+        body = _read_body(resp, start + timeout, cancelled)
+    except _Cancelled:
+        breaker.release()
+        return None
+    except requests.RequestException as e:
+        _record_outcome(breaker, e)
+        logger.warning("LLM call failed (%s): %s", endpoint.name, e)
+        return None
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+    endpoint.latency.record(time.monotonic() - start)
+    try:
+        return _extract_content(json.loads(body))
+    except (ValueError, KeyError, AttributeError) as e:
+        logger.warning("LLM call failed (%s): %s", endpoint.name, e)
+        return None
+
+
+def _call_hedged(
+    endpoints: list[LLMEndpoint], prompt: str, max_tokens: int, timeout: float
+) -> str | None:
+    """
+    Call the endpoints in order, each one started when the previous calls have failed or
+    have not answered within the last endpoint's hedge delay. First answer wins; the other
+    calls are cancelled (a request already sent is abandoned: no retry, answer ignored).
+    """
+    pool = _get_hedge_pool()
+    cancelled = threading.Event()
+    deadline = time.monotonic() + timeout
+    waiting = list(endpoints)
+    pending: set = set()
+    next_hedge = 0.0
     try:
-        resp = requests.post(api_url, json=payload, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        data = resp.json()
-        choices = data.get("choices") or []
-        if not choices:
+        while waiting or pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if waiting and (not pending or now >= next_hedge):
+                endpoint = waiting.pop(0)
+                if pending:
+                    logger.info("LLM call hedged to %s", endpoint.name)
+                pending.add(
+                    pool.submit(
+                        _call_endpoint,
+                        endpoint,
+                        prompt,
+                        max_tokens,
+                        deadline - now,
+                        cancelled,
+                    )
+                )
+                next_hedge = now + endpoint.hedge_delay()
+                continue
+            until = min(next_hedge, deadline) if waiting else deadline
+            done, pending = wait(
+                pending, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                content = future.result()
+                if content is not None:
+                    return content
+    finally:
+        cancelled.set()
+        for future in pending:
+            future.cancel()
+    return None
+
+
+def call_llm(
+    prompt: str,
+    *,
+    max_tokens: int = 256,
+    timeout: int | None = None,
+) -> str | None:
+    """
+    Call the configured LLM with a single user message. Returns the assistant content or None.
+    Reads LLM_API_KEY, LLM_API_URL, LLM_MODEL (or LLM_ENDPOINTS), LLM_TIMEOUT from settings.
+    """
+    endpoints = _usable_endpoints()
+    if not endpoints:
+        return None
+    if len(endpoints) == 1:
+        return _call_endpoint(endpoints[0], prompt, max_tokens, _timeout(timeout))
+    return _call_hedged(endpoints, prompt, max_tokens, _timeout(timeout))
+
+
+def _open_stream(prompt: str, max_tokens: int, deadline: float):
+    """(breaker, streaming response) from the first endpoint that answers, or None."""
+    for endpoint in _usable_endpoints():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
             return None
-        content = (choices[0].get("message") or {}).get("content") or ""
-        return content
-    except (requests.RequestException, json.JSONDecodeError, KeyError) as e:
-        logger.warning("LLM call failed: %s", e)
+        breaker = endpoint.breaker
+        if not breaker.allow():
+            logger.debug("LLM stream skipped: circuit breaker open (%s)", endpoint.name)
+            continue
+        api_url, payload, headers, _ = _request_parts(
+            endpoint, prompt, max_tokens, remaining
+        )
+        try:
+            resp = _post_with_retries(
+                api_url, {**payload, "stream": True}, headers, remaining, stream=True
+            )
+        except requests.RequestException as e:
+            _record_outcome(breaker, e)
+            logger.warning("LLM stream failed (%s): %s", endpoint.name, e)
+            continue
+        except BaseException:
+            breaker.release()
+            raise
+        return breaker, resp
+    return None
+
+
+def stream_llm(
+    prompt: str,
+    *,
+    max_tokens: int = 256,
+    timeout: int | None = None,
+) -> Iterator[str]:
+    """
+    Streaming variant of call_llm: yields content deltas of the SSE token stream as they
+    arrive ("stream": true, OpenAI-compatible). Yields nothing if the call cannot start;
+    stops early on a mid-stream error or when the timeout deadline is reached.
+    Not hedged: the next endpoint is only tried if the stream cannot start.
+    """
+    deadline = time.monotonic() + _timeout(timeout)
+    opened = _open_stream(prompt, max_tokens, deadline)
+    if opened is None:
+        return
+    breaker, resp = opened
+    # SSE is UTF-8; without a charset header requests would yield bytes.
+    resp.encoding = resp.encoding or "utf-8"
+    try:
+        for line in resp.iter_lines(decode_unicode=True):
+            if time.monotonic() > deadline:
+                logger.warning("LLM stream stopped: deadline exceeded")
+                break
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:") :].strip()
+            if data == "[DONE]":
+                break
+            try:
+                choices = json.loads(data).get("choices") or []
+            except (json.JSONDecodeError, AttributeError):
+                continue
+            delta = (choices[0].get("delta") or {}).get("content") if choices else None
+            if delta:
+                yield delta
+        breaker.record_success()
+    except requests.RequestException as e:
+        breaker.record_failure()
+        logger.warning("LLM stream interrupted: %s", e)
+    except GeneratorExit:
+        # Consumer went away (e.g. client disconnected): no outcome to record.
+        breaker.release()
+        raise
+    finally:
+        resp.close()
+
+
+async def _acall_endpoint(
+    endpoint: LLMEndpoint, prompt: str, max_tokens: int, timeout: float
+) -> str | None:
+    """Async counterpart of _call_endpoint (cancelling the task releases the breaker)."""
+    breaker = endpoint.breaker
+    if not breaker.allow():
+        logger.debug("LLM call skipped: circuit breaker open (%s)", endpoint.name)
+        return None
+    start = time.monotonic()
+    try:
+        resp = await _apost_with_retries(
+            *_request_parts(endpoint, prompt, max_tokens, timeout)
+        )
+    except httpx.HTTPError as e:
+        _record_outcome(breaker, e)
+        logger.warning("LLM call failed (%s): %s", endpoint.name, e)
+        return None
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+    endpoint.latency.record(time.monotonic() - start)
+    try:
+        return _extract_content(resp.json())
+    except (json.JSONDecodeError, KeyError, AttributeError) as e:
+        logger.warning("LLM call failed (%s): %s", endpoint.name, e)
+        return None
+
+
+async def _acall_hedged(
+    endpoints: list[LLMEndpoint], prompt: str, max_tokens: int, timeout: float
+) -> str | None:
+    """Async counterpart of _call_hedged; the losing calls are cancelled for real."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    waiting = list(endpoints)
+    pending: set = set()
+    next_hedge = 0.0
+    try:
+        while waiting or pending:
+            now = loop.time()
+            if now >= deadline:
+                break
+            if waiting and (not pending or now >= next_hedge):
+                endpoint = waiting.pop(0)
+                if pending:
+                    logger.info("LLM call hedged to %s", endpoint.name)
+                pending.add(
+                    asyncio.ensure_future(
+                        _acall_endpoint(endpoint, prompt, max_tokens, deadline - now)
+                    )
+                )
+                next_hedge = now + endpoint.hedge_delay()
+                continue
+            until = min(next_hedge, deadline) if waiting else deadline
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED
+            )
+            for task in done:
+                content = task.result()
+                if content is not None:
+                    return content
+    finally:
+        for task in pending:
+            task.cancel()
+    return None
+
+
+async def acall_llm(
+    prompt: str,
+    *,
+    max_tokens: int = 256,
+    timeout: int | None = None,
+) -> str | None:
+    """Async variant of call_llm: awaits the HTTP response on the running event loop."""
+    endpoints = _usable_endpoints()
+    if not endpoints:
         return None
+    if len(endpoints) == 1:
+        return await _acall_endpoint(
+            endpoints[0], prompt, max_tokens, _timeout(timeout)
+        )
+    return await _acall_hedged(endpoints, prompt, max_tokens, _timeout(timeout))
@@ -0,0 +1,145 @@
+"""
+OpenAI-compatible LLM endpoints (LLM_ENDPOINTS, or the single LLM_API_URL / LLM_MODEL one),
+each with its own circuit breaker and a window of recent latencies. The latencies give the
+hedge delay: how long llm_client waits for an endpoint before also calling the next one.
+Endpoints are rebuilt (state reset) when their settings change.
+"""
+
+import logging
+import math
+import threading
+from collections import deque
+from typing import Optional
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from lists_app.services.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Latencies kept per endpoint, and how many are needed before trusting the percentile
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+# Lower bound of the hedge delay (seconds): never double the load on fast answers
+MIN_HEDGE_DELAY = 0.05
+
+
+class LatencyStats:
+    """Sliding window of the latencies (seconds) of successful calls. Thread-safe."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile, or None below MIN_LATENCY_SAMPLES samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        rank = max(1, math.ceil(p / 100 * len(samples)))
+        return samples[min(rank, len(samples)) - 1]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count = len(self._samples)
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "samples": count,
+            "p50": None if p50 is None else round(p50, 3),
+            "p95": None if p95 is None else round(p95, 3),
+        }
+
+
+class LLMEndpoint:
+    def __init__(self, name: str, url: str, model: str, api_key: str):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=int(
+                getattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 5)
+            ),
+            cooldown=float(getattr(settings, "LLM_BREAKER_COOLDOWN", 30)),
+            half_open_probes=int(getattr(settings, "LLM_BREAKER_HALF_OPEN_PROBES", 1)),
+        )
+        self.latency = LatencyStats()
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for this endpoint before calling the next one (inf: never)."""
+        percentile = float(getattr(settings, "LLM_HEDGE_PERCENTILE", 95))
+        if percentile <= 0:
+            return math.inf
+        delay = self.latency.percentile(min(percentile, 100))
+        if delay is None:
+            delay = float(getattr(settings, "LLM_HEDGE_DELAY", 2))
+        return max(MIN_HEDGE_DELAY, delay)
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "configured": bool(self.api_key),
+            "breaker": self.breaker.snapshot(),
+            "latency": self.latency.snapshot(),
+        }
+
+
+def _endpoint_specs() -> tuple:
+    """(name, url, model, api_key) of each configured endpoint, plus the breaker settings."""
+    default_key = getattr(settings, "LLM_API_KEY", "") or ""
+    default_url = getattr(
+        settings, "LLM_API_URL", "https://api.openai.com/v1/chat/completions"
+    )
+    default_model = getattr(settings, "LLM_MODEL", "Meta-Llama-3_3-70B-Instruct")
+    configured = getattr(settings, "LLM_ENDPOINTS", None) or []
+    specs = []
+    for entry in configured:
+        if not isinstance(entry, dict) or not entry.get("url"):
+            logger.warning("LLM endpoint ignored (no url): %r", entry)
+            continue
+        url = str(entry["url"])
+        model = str(entry.get("model") or default_model)
+        name = str(entry.get("name") or f"{urlparse(url).netloc}/{model}")
+        specs.append((name, url, model, str(entry.get("api_key") or default_key)))
+    if not specs:
+        specs.append(("llm", default_url, default_model, default_key))
+    breaker = (
+        getattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 5),
+        getattr(settings, "LLM_BREAKER_COOLDOWN", 30),
+        getattr(settings, "LLM_BREAKER_HALF_OPEN_PROBES", 1),
+    )
+    return tuple(specs), breaker
+
+
+_endpoints: list[LLMEndpoint] = []
+_endpoints_specs: Optional[tuple] = None
+_endpoints_lock = threading.Lock()
+
+
+def get_llm_endpoints() -> list[LLMEndpoint]:
+    """Configured endpoints in preference order (never empty)."""
+    global _endpoints, _endpoints_specs
+    specs = _endpoint_specs()
+    if specs == _endpoints_specs:
+        return _endpoints
+    with _endpoints_lock:
+        if specs != _endpoints_specs:
+            _endpoints = [LLMEndpoint(*spec) for spec in specs[0]]
+            _endpoints_specs = specs
+            logger.debug("LLM endpoints loaded: %d", len(_endpoints))
+        return _endpoints
+
+
+def reset_llm_endpoints() -> None:
+    """Drop breaker and latency state; endpoints are rebuilt on next use."""
+    global _endpoints_specs
+    with _endpoints_lock:
+        _endpoints_specs = None
@@ -0,0 +1,196 @@
+"""
+Local, CPU-only section classifier: multinomial naive Bayes over character n-grams.
+Trained from SectionKeyword rows and item history (manage.py train_section_classifier),
+saved as JSON at LOCAL_CLASSIFIER_PATH and used by assign_section between the keyword
+rules and the LLM. Only confident predictions are used; the rest escalate to the LLM.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from lists_app.models import Item, SectionKeyword
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+NGRAM_MIN = 2
+NGRAM_MAX = 4
+SMOOTHING = 0.5
+
+
+def char_ngrams(text: str) -> list[str]:
+    """Character n-grams of the padded, normalized text (word boundaries marked by spaces)."""
+    padded = f" {text} "
+    grams = []
+    for n in range(NGRAM_MIN, NGRAM_MAX + 1):
+        grams.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class LocalClassifier:
+    """Naive Bayes model; predict() returns (slug, posterior probability of that slug)."""
+
+    def __init__(self, class_counts: dict[str, int], gram_counts: dict[str, dict]):
+        self.class_counts = class_counts
+        self.gram_counts = gram_counts
+        vocab = set()
+        for counts in gram_counts.values():
+            vocab.update(counts)
+        self.vocab_size = len(vocab)
+        total_docs = sum(class_counts.values()) or 1
+        self._log_prior = {}
+        self._log_unseen = {}
+        self._log_prob = {}
+        for slug, docs in class_counts.items():
+            counts = gram_counts.get(slug, {})
+            denom = sum(counts.values()) + SMOOTHING * max(self.vocab_size, 1)
+            self._log_prior[slug] = math.log(docs / total_docs)
+            self._log_unseen[slug] = math.log(SMOOTHING / denom)
+            self._log_prob[slug] = {
+                g: math.log((c + SMOOTHING) / denom) for g, c in counts.items()
+            }
+        self._vocab = vocab
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.class_counts.values())
+
+    def predict(self, normalized: str) -> tuple[Optional[str], float]:
+        if not normalized or not self.class_counts:
+            return (None, 0.0)
+        grams = [g for g in char_ngrams(normalized) if g in self._vocab]
+        if not grams:
+            return (None, 0.0)
+        scores = {}
+        for slug, prior in self._log_prior.items():
+            probs = self._log_prob[slug]
+            unseen = self._log_unseen[slug]
+            scores[slug] = prior + sum(probs.get(g, unseen) for g in grams)
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        norm = sum(math.exp(score - top) for score in scores.values())
+        return (best, 1.0 / norm)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": MODEL_VERSION,
+            "ngram_range": [NGRAM_MIN, NGRAM_MAX],
+            "trained_at": timezone.now().isoformat(),
+            "class_counts": self.class_counts,
+            "gram_counts": self.gram_counts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LocalClassifier":
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"unsupported model version {data.get('version')!r}")
+        return cls(data["class_counts"], data["gram_counts"])
+
+
+def train_classifier(samples: Iterable[tuple[str, str]]) -> LocalClassifier:
+    """Train from (normalized name, section slug) pairs."""
+    class_counts: Counter = Counter()
+    gram_counts: dict[str, Counter] = defaultdict(Counter)
+    for name, slug in samples:
+        if not name or not slug:
+            continue
+        class_counts[slug] += 1
+        gram_counts[slug].update(char_ngrams(name))
+    return LocalClassifier(
+        dict(class_counts), {slug: dict(c) for slug, c in gram_counts.items()}
+    )
+
+
+def training_samples(exclude_slugs=("autre",)) -> list[tuple[str, str]]:
+    """
+    (normalized name, slug) pairs from SectionKeyword rows and item history.
+    The default section is excluded: it means "unknown", not a class to learn.
+    """
+    from lists_app.services.section_assigner import _normalize
+
+    samples = {}
+    for name, slug in Item.objects.values_list("name", "section__name_slug"):
+        samples[_normalize(name)] = slug
+    # Keywords win over item history for the same name (admin / LLM curated).
+    for keyword, slug in SectionKeyword.objects.values_list(
+        "keyword", "section__name_slug"
+    ):
+        samples[_normalize(keyword)] = slug
+    return [(n, s) for n, s in samples.items() if n and s not in exclude_slugs]
+
+
+def model_path() -> Path:
+    return Path(
+        getattr(
+            settings,
+            "LOCAL_CLASSIFIER_PATH",
+            Path(settings.BASE_DIR) / "local_classifier.json",
+        )
+    )
+
+
+def save_classifier(classifier: LocalClassifier, path: Optional[Path] = None) -> Path:
+    """Write the model atomically so running workers never read a partial file."""
+    path = Path(path or model_path())
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(classifier.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+
+_loaded: Optional[tuple[float, LocalClassifier]] = None
+_load_lock = threading.Lock()
+
+
+def get_local_classifier() -> Optional[LocalClassifier]:
+    """Return the saved model, reloaded when the file changes; None if there is none."""
+    global _loaded
+    path = model_path()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    loaded = _loaded
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1]
+    with _load_lock:
+        if _loaded is None or _loaded[0] != mtime:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    classifier = LocalClassifier.from_dict(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("local classifier not loaded from %s: %s", path, e)
+                return None
+            _loaded = (mtime, classifier)
+            logger.info(
+                "local classifier loaded: samples=%d classes=%d",
+                classifier.sample_count,
+                len(classifier.class_counts),
+            )
+        return _loaded[1]
+
+
+def classify_locally(normalized: str) -> Optional[str]:
+    """Slug predicted with at least LOCAL_CLASSIFIER_MIN_CONFIDENCE, else None."""
+    classifier = get_local_classifier()
+    if classifier is None:
+        return None
+    slug, confidence = classifier.predict(normalized)
+    threshold = float(getattr(settings, "LOCAL_CLASSIFIER_MIN_CONFIDENCE", 0.9))
+    logger.debug(
+        "local classifier: normalized=%r slug=%s confidence=%.3f",
+        normalized,
+        slug,
+        confidence,
+    )
+    return slug if slug and confidence >= threshold else None
@@ -0,0 +1,115 @@
+"""
+Micro-batching: keys submitted by many threads (or coroutines, via asyncio.wrap_future) are
+collected for a short window, or until max_size keys, and resolved together by one call of
+a batch function, e.g. one LLM prompt classifying the names of several concurrent requests.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    submit(key) returns a Future of fn's result for the key. A collector thread waits
+    `window` seconds after the first key of a batch (less if max_size keys arrive), then
+    runs fn(keys) -> {key: result} on one of max_concurrent worker threads: missing keys
+    resolve to None, an exception fails the whole batch. Duplicate keys share one result.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[list], dict],
+        window: float,
+        max_size: int = 20,
+        max_concurrent: int = 4,
+    ):
+        self.name = name
+        self.fn = fn
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._cond = threading.Condition()
+        self._queue: dict[Hashable, list[Future]] = {}
+        self._closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrent), thread_name_prefix=name
+        )
+        self._collector: Optional[threading.Thread] = None
+        self._counters = {"batches": 0, "keys": 0, "callers": 0}
+
+    def submit(self, key: Hashable) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"micro-batcher {self.name} is closed")
+            self._queue.setdefault(key, []).append(future)
+            if self._collector is None:
+                self._collector = threading.Thread(
+                    target=self._collect, name=f"{self.name}-collector", daemon=True
+                )
+                self._collector.start()
+            self._cond.notify()
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = time.monotonic() + self.window
+                while len(self._queue) < self.max_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                keys = list(self._queue)[: self.max_size]
+                batch = {key: self._queue.pop(key) for key in keys}
+            self._executor.submit(self._resolve, batch)
+
+    def _resolve(self, batch: dict[Hashable, list[Future]]) -> None:
+        callers = sum(len(futures) for futures in batch.values())
+        logger.debug(
+            "micro-batch %s: keys=%d callers=%d", self.name, len(batch), callers
+        )
+        try:
+            results = self.fn(list(batch))
+        except BaseException as e:
+            logger.warning("micro-batch %s failed: %s", self.name, e)
+            results, error = {}, e
+        else:
+            error = None
+        with self._cond:
+            self._counters["batches"] += 1
+            self._counters["keys"] += len(batch)
+            self._counters["callers"] += callers
+        for key, futures in batch.items():
+            for future in futures:
+                try:
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(results.get(key))
+                except InvalidStateError:
+                    # Cancelled by its caller (e.g. the awaiting coroutine went away)
+                    pass
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {"name": self.name, "queued": len(self._queue), **self._counters}
+
+    def close(self) -> None:
+        """Resolve what is queued, then stop the threads."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            collector = self._collector
+        if collector is not None:
+            collector.join()
+        self._executor.shutdown(wait=True)
@@ -1,13 +1,17 @@
 """
 Fetch Quitoque recipe ingredient lists via headless Firefox (authenticated session).
+Logged-in browsers are kept warm in a bounded pool (driver_pool) between imports.
 """
 
 from __future__ import annotations
 
+import atexit
 import logging
 import re
-from typing import Any
-from urllib.parse import urlparse
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse, urlunparse
 
 from bs4 import BeautifulSoup
 from django.conf import settings
@@ -18,6 +22,9 @@ from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from lists_app.services import quitoque_session
+from lists_app.services.driver_pool import DriverPool, DriverPoolTimeout
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,7 +61,8 @@ class QuitoqueParseError(QuitoqueScraperError):
 def validate_recipe_url(url: str) -> str:
     """
     Allow only HTTPS URLs on the configured Quitoque host.
-    Returns normalized URL string or raises QuitoqueScraperError (400).
+    Returns normalized URL string (host lowercased, no fragment or trailing slash: the
+    recipe cache key) or raises QuitoqueScraperError (400).
     """
     raw = (url or "").strip()
     if not raw:
@@ -71,7 +79,10 @@ def validate_recipe_url(url: str) -> str:
             f"URL non autorisée (hôte attendu : {allowed}).",
             status_hint=400,
         )
-    return raw
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse(
+        parsed._replace(netloc=parsed.netloc.lower(), path=path, fragment="")
+    )
 
 
 def parse_ingredient_lis_from_html(html: str) -> list[dict[str, Any]]:
@@ -112,14 +123,27 @@ def parse_ingredient_lis_from_html(html: str) -> list[dict[str, Any]]:
     return items
 
 
-def _login_path(url: str) -> str:
-    return (urlparse(url).path or "/").rstrip("/") or "/"
+# Progress callback (stage, message) of the running fetch_quitoque_ingredients call. Read
+# by the login and page steps, which also run inside the driver pool's create().
+_progress: ContextVar[Optional[Callable[[str, str], None]]] = ContextVar(
+    "quitoque_progress", default=None
+)
+
+
+def _report(stage: str, message: str) -> None:
+    callback = _progress.get()
+    if callback is None:
+        return
+    try:
+        callback(stage, message)
+    except Exception:
+        logger.warning("Quitoque progress callback failed", exc_info=True)
 
 
-def fetch_quitoque_ingredients(recipe_url: str) -> list[dict[str, Any]]:
+def require_credentials() -> tuple[str, str]:
     """
-    Log in with QUITOQUE_EMAIL / QUITOQUE_PASSWORD, open recipe_url, return items.
-    Raises QuitoqueScraperError subclasses on failure.
+    (QUITOQUE_EMAIL, QUITOQUE_PASSWORD). Raises QuitoqueScraperError (503) when the account
+    is not configured: also a pre-flight check before queueing an import.
     """
     email = getattr(settings, "QUITOQUE_EMAIL", "") or ""
     password = getattr(settings, "QUITOQUE_PASSWORD", "") or ""
@@ -128,62 +152,239 @@ def fetch_quitoque_ingredients(recipe_url: str) -> list[dict[str, Any]]:
             "Import Quitoque désactivé : définissez QUITOQUE_EMAIL et QUITOQUE_PASSWORD.",
             status_hint=503,
         )
+    return email, password
 
-    recipe_url = validate_recipe_url(recipe_url)
-    login_url = getattr(settings, "QUITOQUE_LOGIN_URL", "https://www.quitoque.fr/login")
-    timeout = int(getattr(settings, "QUITOQUE_IMPORT_TIMEOUT", 60) or 60)
 
+def _timeout() -> int:
+    return int(getattr(settings, "QUITOQUE_IMPORT_TIMEOUT", 60) or 60)
+
+
+def _new_driver(timeout: int) -> webdriver.Firefox:
     opts = FirefoxOptions()
     opts.add_argument("-headless")
     opts.set_preference("dom.webnotifications.enabled", False)
+    driver = webdriver.Firefox(options=opts)
+    driver.set_page_load_timeout(timeout)
+    return driver
 
-    driver: webdriver.Firefox | None = None
-    try:
-        driver = webdriver.Firefox(options=opts)
-        driver.set_page_load_timeout(timeout)
 
-        driver.get(login_url)
-        wait = WebDriverWait(driver, min(timeout, 45))
+def _login(driver: webdriver.Firefox, timeout: int) -> None:
+    """Submit the login form with QUITOQUE_EMAIL / QUITOQUE_PASSWORD."""
+    email, password = require_credentials()
+    _report("login", "Connexion à Quitoque…")
+    driver.get(quitoque_session.login_url())
+    wait = WebDriverWait(driver, min(timeout, 45))
 
-        wait.until(EC.presence_of_element_located((By.ID, "_username")))
-        user_el = driver.find_element(By.ID, "_username")
-        pass_el = driver.find_element(By.ID, "_password")
+    wait.until(EC.presence_of_element_located((By.ID, "_username")))
+    user_el = driver.find_element(By.ID, "_username")
+    pass_el = driver.find_element(By.ID, "_password")
 
-        user_el.clear()
-        user_el.send_keys(email)
-        pass_el.clear()
-        pass_el.send_keys(password)
+    user_el.clear()
+    user_el.send_keys(email)
+    pass_el.clear()
+    pass_el.send_keys(password)
 
-        form = driver.find_element(By.CSS_SELECTOR, 'form[action="/login-check"]')
-        form.submit()
+    form = driver.find_element(By.CSS_SELECTOR, 'form[action="/login-check"]')
+    form.submit()
 
+    try:
+        WebDriverWait(driver, min(timeout, 45)).until(
+            lambda d: not quitoque_session.is_login_page(d.current_url)
+        )
+    except TimeoutException as e:
+        logger.warning("Quitoque login timeout")
+        raise QuitoqueLoginError() from e
+
+    if quitoque_session.is_login_page(driver.current_url):
+        raise QuitoqueLoginError()
+
+
+def _new_logged_in_driver() -> webdriver.Firefox:
+    timeout = _timeout()
+    driver = _new_driver(timeout)
+    try:
+        _login(driver, timeout)
+    except BaseException:
         try:
-            WebDriverWait(driver, min(timeout, 45)).until(
-                lambda d: _login_path(d.current_url) not in ("/login", "")
-            )
-        except TimeoutException as e:
-            logger.warning("Quitoque login timeout")
-            raise QuitoqueLoginError() from e
+            driver.quit()
+        except Exception:
+            logger.debug("driver.quit() failed", exc_info=True)
+        raise
+    return driver
 
-        if _login_path(driver.current_url) == "/login":
-            raise QuitoqueLoginError()
 
+def _read_recipe(driver: webdriver.Firefox, recipe_url: str, timeout: int) -> list:
+    """Open recipe_url in a logged-in driver; logs in again if the session expired."""
+    _report("loading", "Chargement de la recette…")
+    driver.get(recipe_url)
+    if quitoque_session.is_login_page(driver.current_url):
+        logger.info("Quitoque session expired, logging in again")
+        _login(driver, timeout)
         driver.get(recipe_url)
-        try:
-            WebDriverWait(driver, min(timeout, 45)).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, f"{INGREDIENT_UL_SELECTOR} li")
+    try:
+        WebDriverWait(driver, min(timeout, 45)).until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, f"{INGREDIENT_UL_SELECTOR} li")
+            )
+        )
+    except TimeoutException as e:
+        logger.warning("Quitoque recipe ingredients not found")
+        raise QuitoqueParseError() from e
+
+    items = parse_ingredient_lis_from_html(driver.page_source)
+    if not items:
+        raise QuitoqueParseError()
+    if quitoque_session.http_fetch_enabled():
+        _store_cookies(driver)
+    return items
+
+
+def _store_cookies(driver: webdriver.Firefox) -> None:
+    """Persist the browser's session for the browserless fetch (best effort)."""
+    try:
+        quitoque_session.save_cookies(driver.get_cookies())
+    except (OSError, WebDriverException) as e:
+        logger.warning("Quitoque session cookies not saved: %s", e)
+
+
+def _fetch_without_browser(recipe_url: str, timeout: int) -> list[dict[str, Any]]:
+    """Items read with the persisted session cookies, or [] to fall back to the browser."""
+    _report("loading", "Chargement de la recette…")
+    html = quitoque_session.fetch_recipe_html(recipe_url, timeout)
+    if html is None:
+        return []
+    items = parse_ingredient_lis_from_html(html)
+    if not items:
+        logger.info(
+            "Quitoque ingredients missing from the HTTP page, using the browser"
+        )
+    return items
+
+
+_pool: Optional[DriverPool] = None
+_pool_spec: Optional[tuple] = None
+_pool_lock = threading.Lock()
+
+
+def _pool_settings() -> tuple:
+    return (
+        int(getattr(settings, "QUITOQUE_DRIVER_POOL_SIZE", 1)),
+        int(getattr(settings, "QUITOQUE_DRIVER_MAX_USES", 50)),
+        float(getattr(settings, "QUITOQUE_DRIVER_MAX_RSS_GROWTH_MB", 300)),
+        getattr(settings, "QUITOQUE_EMAIL", ""),
+        getattr(settings, "QUITOQUE_PASSWORD", ""),
+        quitoque_session.login_url(),
+    )
+
+
+def get_driver_pool() -> Optional[DriverPool]:
+    """Pool of logged-in drivers, or None when QUITOQUE_DRIVER_POOL_SIZE is 0.
+    Rebuilt (old drivers quit) when its settings or the credentials change."""
+    global _pool, _pool_spec
+    spec = _pool_settings()
+    if spec == _pool_spec:
+        return _pool
+    with _pool_lock:
+        if spec != _pool_spec:
+            if _pool is not None:
+                _pool.close()
+            size, max_uses, max_rss_growth_mb = spec[:3]
+            _pool = (
+                DriverPool(
+                    "quitoque",
+                    _new_logged_in_driver,
+                    size=size,
+                    max_uses=max_uses,
+                    max_rss_growth_mb=max_rss_growth_mb,
                 )
+                if size > 0
+                else None
             )
-        except TimeoutException as e:
-            logger.warning("Quitoque recipe ingredients not found")
-            raise QuitoqueParseError() from e
+            _pool_spec = spec
+        return _pool
 
-        items = parse_ingredient_lis_from_html(driver.page_source)
-        if not items:
-            raise QuitoqueParseError()
 
+def browser_slots() -> Optional[int]:
+    """Recipes the browser path can read at once: the pool size, None when unpooled."""
+    pool = get_driver_pool()
+    return pool.size if pool is not None else None
+
+
+def shutdown_driver_pool() -> None:
+    """Quit the pooled browsers (at process exit, e.g. when daphne stops)."""
+    global _pool, _pool_spec
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool, _pool_spec = None, None
+
+
+atexit.register(shutdown_driver_pool)
+
+
+def _fetch_with_new_driver(recipe_url: str, timeout: int) -> list[dict[str, Any]]:
+    driver = _new_logged_in_driver()
+    try:
+        return _read_recipe(driver, recipe_url, timeout)
+    finally:
+        try:
+            driver.quit()
+        except Exception:
+            logger.debug("driver.quit() failed", exc_info=True)
+
+
+def _fetch_with_pool(
+    pool: DriverPool, recipe_url: str, timeout: int
+) -> list[dict[str, Any]]:
+    try:
+        with pool.driver(timeout) as pooled:
+            try:
+                return _read_recipe(pooled.driver, recipe_url, timeout)
+            except QuitoqueParseError:
+                raise
+            except Exception:
+                # Login failure, WebDriver error...: do not lend this browser again
+                pooled.broken = True
+                raise
+    except DriverPoolTimeout as e:
+        raise QuitoqueScraperError(
+            "Navigateur d’import occupé, réessayez dans un instant.",
+            status_hint=503,
+        ) from e
+
+
+def fetch_quitoque_ingredients(
+    recipe_url: str, on_progress: Optional[Callable[[str, str], None]] = None
+) -> list[dict[str, Any]]:
+    """
+    Return the items of recipe_url, read with the Quitoque account (QUITOQUE_EMAIL /
+    QUITOQUE_PASSWORD). The page is fetched over plain HTTPS with the persisted session
+    cookies; when there are none, the session is rejected or the ingredient list is missing,
+    it is opened in a logged-in browser borrowed from the driver pool (or started for this
+    call when the pool is disabled). on_progress(stage, message) is called with the stages
+    "login", "loading" and "parsed". Raises QuitoqueScraperError subclasses on failure.
+    """
+    require_credentials()
+    recipe_url = validate_recipe_url(recipe_url)
+    token = _progress.set(on_progress)
+    try:
+        items = _fetch(recipe_url, _timeout())
+        _report("parsed", f"{len(items)} ingrédient(s) lu(s).")
         return items
+    finally:
+        _progress.reset(token)
+
+
+def _fetch(recipe_url: str, timeout: int) -> list[dict[str, Any]]:
+    if quitoque_session.http_fetch_enabled():
+        items = _fetch_without_browser(recipe_url, timeout)
+        if items:
+            return items
+    try:
+        pool = get_driver_pool()
+        if pool is None:
+            return _fetch_with_new_driver(recipe_url, timeout)
+        return _fetch_with_pool(pool, recipe_url, timeout)
     except QuitoqueScraperError:
         raise
     except WebDriverException as e:
@@ -198,9 +399,3 @@ def fetch_quitoque_ingredients(recipe_url: str) -> list[dict[str, Any]]:
             "Échec de l’import Quitoque.",
             status_hint=502,
         ) from e
-    finally:
-        if driver is not None:
-            try:
-                driver.quit()
-            except Exception:
-                logger.debug("driver.quit() failed", exc_info=True)
@@ -0,0 +1,184 @@
+"""
+Browserless Quitoque fetch: the cookies of a session logged in by the browser (Selenium) are
+persisted to QUITOQUE_COOKIE_FILE and replayed by a pooled requests session, so a recipe
+page costs one plain HTTPS request. When the session is rejected (redirect to the login
+page, 401/403) the caller falls back to the browser, which logs in and stores new cookies.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Sent with the replayed cookies: the session was opened by (headless) Firefox
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0"
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "expiry")
+
+_session: requests.Session | None = None
+_session_key: Optional[tuple] = None
+_session_lock = threading.Lock()
+
+
+def http_fetch_enabled() -> bool:
+    return bool(getattr(settings, "QUITOQUE_HTTP_FETCH", True))
+
+
+def cookie_path() -> Path:
+    return Path(
+        getattr(
+            settings,
+            "QUITOQUE_COOKIE_FILE",
+            Path(settings.BASE_DIR) / "quitoque_cookies.json",
+        )
+    )
+
+
+def login_url() -> str:
+    return getattr(settings, "QUITOQUE_LOGIN_URL", "https://www.quitoque.fr/login")
+
+
+def _url_path(url: str) -> str:
+    return (urlparse(url).path or "/").rstrip("/") or "/"
+
+
+def is_login_page(url: str) -> bool:
+    """
+    True when url is the login page: a browser or an HTTP fetch that lands there was
+    redirected because the session is not (or no longer) logged in.
+    """
+    return _url_path(url) == _url_path(login_url())
+
+
+def _account() -> str:
+    return (getattr(settings, "QUITOQUE_EMAIL", "") or "").lower()
+
+
+def load_cookies() -> list[dict]:
+    """Persisted cookies of the configured account, expired ones left out."""
+    try:
+        with open(cookie_path(), encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        logger.warning("Quitoque cookie file unreadable: %s", e)
+        return []
+    if not isinstance(data, dict) or data.get("account") != _account():
+        return []
+    now = time.time()
+    return [
+        c
+        for c in data.get("cookies") or []
+        if isinstance(c, dict)
+        and c.get("name")
+        and not (c.get("expiry") and c["expiry"] <= now)
+    ]
+
+
+def save_cookies(cookies: list[dict]) -> None:
+    """
+    Write the cookies atomically, readable by the owner only: they grant access to the
+    Quitoque account. Drops the in-memory session so the next fetch uses them.
+    """
+    global _session_key
+    path = cookie_path()
+    data = {
+        "account": _account(),
+        "saved_at": int(time.time()),
+        "cookies": [{k: c[k] for k in COOKIE_FIELDS if k in c} for c in cookies],
+    }
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.chmod(tmp, 0o600)  # the file may predate this code with a wider mode
+    os.replace(tmp, path)
+    with _session_lock:
+        _session_key = None
+    logger.info("Quitoque session cookies saved: count=%d", len(data["cookies"]))
+
+
+def forget_cookies() -> None:
+    """The session was rejected: stop replaying it until the browser logs in again."""
+    global _session_key
+    try:
+        os.remove(cookie_path())
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Quitoque cookie file not removed: %s", e)
+    with _session_lock:
+        _session_key = None
+
+
+def _get_session() -> Optional[requests.Session]:
+    """
+    Process-wide keep-alive session carrying the persisted cookies, or None without
+    cookies. Rebuilt when the cookie file or the account changes.
+    """
+    global _session, _session_key
+    path = cookie_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    key = (str(path), mtime, _account())
+    if key == _session_key:
+        return _session
+    with _session_lock:
+        if key != _session_key:
+            cookies = load_cookies()
+            session = None
+            if cookies:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                for c in cookies:
+                    session.cookies.set(
+                        c["name"],
+                        c.get("value", ""),
+                        domain=c.get("domain", ""),
+                        path=c.get("path", "/"),
+                        secure=bool(c.get("secure")),
+                    )
+            _session, _session_key = session, key
+        return _session
+
+
+def has_session() -> bool:
+    """True when recipe pages can be fetched without a browser (persisted cookies)."""
+    return http_fetch_enabled() and _get_session() is not None
+
+
+def fetch_recipe_html(recipe_url: str, timeout: float) -> Optional[str]:
+    """
+    HTML of recipe_url fetched with the persisted session, or None when there is no
+    session or it was rejected. Network errors return None too (the browser retries).
+    """
+    session = _get_session()
+    if session is None:
+        return None
+    try:
+        response = session.get(recipe_url, timeout=timeout)
+    except requests.RequestException as e:
+        logger.warning("Quitoque HTTP fetch failed: %s", e)
+        return None
+    if response.status_code in (401, 403) or is_login_page(response.url):
+        logger.info("Quitoque session rejected (status=%d)", response.status_code)
+        forget_cookies()
+        return None
+    if response.status_code != 200:
+        logger.warning("Quitoque HTTP fetch status=%d", response.status_code)
+        return None
+    return response.text
@@ -0,0 +1,161 @@
+"""
+Persistent cache of Quitoque recipe ingredient lists (RecipeIngredients), keyed by the URL
+returned by validate_recipe_url. A repeated import reads one row instead of fetching the
+page. Entries expire after QUITOQUE_CACHE_TTL and can be invalidated from the admin.
+Items are cached as parsed, before section assignment, so keyword edits still apply.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from lists_app.models import RecipeIngredients
+from lists_app.services.quitoque_scraper import (
+    QuitoqueScraperError,
+    browser_slots,
+    fetch_quitoque_ingredients,
+    validate_recipe_url,
+)
+from lists_app.services.quitoque_session import has_session
+
+logger = logging.getLogger(__name__)
+
+# RecipeIngredients.url max_length: longer URLs are fetched but not cached
+MAX_URL_LENGTH = 500
+
+
+def _max_parallel() -> int:
+    return max(1, int(getattr(settings, "QUITOQUE_IMPORT_MAX_PARALLEL", 4)))
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "QUITOQUE_CACHE_TTL", 30 * 24 * 3600))
+
+
+def get_cached_recipe(url: str) -> Optional[list[dict[str, Any]]]:
+    """Cached items of the (validated) recipe URL, or None."""
+    items = (
+        RecipeIngredients.objects.filter(url=url, expires_at__gt=timezone.now())
+        .values_list("items", flat=True)
+        .first()
+    )
+    if items is None:
+        return None
+    RecipeIngredients.objects.filter(url=url).update(hits=F("hits") + 1)
+    logger.info("recipe cache hit: url=%s items=%d", url, len(items))
+    return items
+
+
+def cache_recipe(url: str, items: list[dict[str, Any]]) -> None:
+    ttl = _ttl()
+    if ttl <= 0 or not items or len(url) > MAX_URL_LENGTH:
+        return
+    now = timezone.now()
+    RecipeIngredients.objects.filter(expires_at__lte=now).delete()
+    RecipeIngredients.objects.update_or_create(
+        url=url,
+        defaults={
+            "items": items,
+            "hits": 0,
+            "expires_at": now + timedelta(seconds=ttl),
+        },
+    )
+
+
+def invalidate_recipe(url: str) -> bool:
+    """Drop the cached items of the recipe URL (admin action); True if there were any."""
+    deleted, _ = RecipeIngredients.objects.filter(url=url).delete()
+    return bool(deleted)
+
+
+def fetch_recipe_ingredients(
+    url: str, on_progress: Optional[Callable[[str, str], None]] = None
+) -> tuple[list[dict[str, Any]], bool]:
+    """
+    (items, cached) for a recipe URL: from the cache when possible, otherwise fetched with
+    fetch_quitoque_ingredients (given on_progress) and cached. Raises
+    QuitoqueScraperError subclasses.
+    """
+    url = validate_recipe_url(url)
+    items = get_cached_recipe(url)
+    if items is not None:
+        return items, True
+    items = fetch_quitoque_ingredients(url, on_progress)
+    cache_recipe(url, items)
+    return items, False
+
+
+def _fetch_into(
+    result: dict[str, Any], on_progress: Optional[Callable[[str, str, str], None]]
+) -> None:
+    """Worker: fetch result["url"] into result (no DB access)."""
+    try:
+        result["items"] = fetch_quitoque_ingredients(
+            result["url"], partial(on_progress, result["url"]) if on_progress else None
+        )
+    except QuitoqueScraperError as e:
+        result["error"] = str(e)
+
+
+def fetch_recipes(
+    urls: list[str], on_progress: Optional[Callable[[str, str, str], None]] = None
+) -> list[dict[str, Any]]:
+    """
+    One result per distinct URL, in order: {"url", "items", "cached", "error"} (error is a
+    message, items then empty). Cached recipes are read here; the others are fetched
+    concurrently, at most QUITOQUE_IMPORT_MAX_PARALLEL at once, by worker threads that do
+    not touch the DB, so the total time is about that of the slowest recipe.
+    Without session cookies the first recipe is fetched alone: its browser logs in and
+    stores them, so the others go over HTTPS instead of queueing on the driver pool. If
+    there is still no session, the workers are bounded by the pool size.
+    on_progress(url, stage, message) is called from those threads.
+    """
+    results: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    pending: list[dict[str, Any]] = []
+    for raw in urls:
+        result = {"url": raw, "items": [], "cached": False, "error": None}
+        try:
+            result["url"] = validate_recipe_url(raw)
+        except QuitoqueScraperError as e:
+            result["error"] = str(e)
+        if result["url"] in seen:
+            continue
+        seen.add(result["url"])
+        results.append(result)
+        if result["error"] is not None:
+            continue
+        items = get_cached_recipe(result["url"])
+        if items is not None:
+            result.update(items=items, cached=True)
+        else:
+            pending.append(result)
+    rest = pending
+    if pending and not has_session():
+        _fetch_into(pending[0], on_progress)
+        rest = pending[1:]
+    if rest:
+        workers = min(_max_parallel(), len(rest))
+        slots = None if has_session() else browser_slots()
+        if slots is not None:
+            workers = min(workers, slots)
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="quitoque"
+        ) as pool:
+            list(pool.map(partial(_fetch_into, on_progress=on_progress), rest))
+    for result in pending:
+        if result["error"] is None:
+            cache_recipe(result["url"], result["items"])
+    logger.info(
+        "recipes fetched: urls=%d cached=%d fetched=%d",
+        len(results),
+        sum(r["cached"] for r in results),
+        len(pending),
+    )
+    return results
@@ -1,18 +1,41 @@
 """
-Section assignment: keyword rules (French) from DB first, optional LLM fallback.
+Section assignment: keyword rules (French) from DB first, then the optional local
+classifier, then optional LLM fallback.
 New keywords learned from LLM are stored in the DB. All section labels and LLM prompt in French.
+The a-prefixed functions are asyncio variants: the LLM call is awaited on the event loop and
+only the DB steps run in worker threads.
+With LLM_BATCH_WINDOW_MS > 0, single-name classifications of concurrent callers (threads and
+coroutines alike) are grouped by a process-wide micro-batcher into one LLM prompt.
 """
 
+import asyncio
 import json
 import logging
 import re
+import threading
 from typing import Optional
 
+from channels.db import database_sync_to_async
 from django.conf import settings
-from django.db import transaction
+from django.db import close_old_connections, transaction
 
 from lists_app.models import Section, SectionKeyword
-from lists_app.services.llm_client import call_llm
+from lists_app.services.classification_cache import (
+    cache_classification,
+    get_cached_classification,
+)
+from lists_app.services.keyword_matcher import get_keyword_matcher
+from lists_app.services.local_classifier import classify_locally
+from lists_app.services.micro_batcher import MicroBatcher
+from lists_app.services.llm_client import (
+    acall_llm,
+    call_llm,
+    decode_llm_json,
+    is_llm_available,
+    is_llm_configured,
+)
+from lists_app.services.section_registry import SectionRegistry, get_section_registry
+from lists_app.services.single_flight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -33,16 +56,33 @@ def _match_keywords(normalized: str) -> Optional[str]:
     """Return section slug if any keyword matches (longest first for phrases)."""
     if not normalized:
         return None
-    keywords = list(
-        SectionKeyword.objects.select_related("section").all().order_by("keyword")
-    )
+    matcher = get_keyword_matcher()
     logger.debug(
-        "keyword lookup: normalized=%r, keywords_count=%d", normalized, len(keywords)
+        "keyword lookup: normalized=%r, keywords_count=%d",
+        normalized,
+        matcher.keyword_count,
     )
-    # Prefer longer phrases first
-    for rec in sorted(keywords, key=lambda r: -len(r.keyword)):
-        if rec.keyword in normalized:
-            return rec.section.name_slug
+    return matcher.match(normalized)
+
+
+def _classification_prompt(name: str, registry: SectionRegistry) -> str:
+    return (
+        "Tu es un assistant. Voici la liste des sections d'un supermarché (slug=label): "
+        f"{registry.prompt_list}. "
+        f"Pour l'article suivant, réponds UNIQUEMENT avec le slug de la section appropriée, rien d'autre. "
+        f"Article: « {name} »"
+    )
+
+
+def _parse_classification(
+    content: Optional[str], registry: SectionRegistry
+) -> Optional[str]:
+    if content is None:
+        return None
+    slug = content.strip().split()[0] if content.strip() else ""
+    logger.debug("LLM response slug=%r", slug)
+    if slug in registry.slugs:
+        return slug
     return None
 
 
@@ -51,178 +91,374 @@ def _call_llm(item_name: str) -> Optional[str]:
     Call LLM with French prompt to classify item into a section.
     Returns section slug or None on failure.
     """
-    if not item_name:
-        return None
     name = (item_name or "").strip()[:LLM_INPUT_MAX_LENGTH]
     if not name:
         return None
-    section_list = list(
-        Section.objects.order_by("position").values_list("name_slug", "label_fr")
-    )
-    sections_fr = ", ".join(f"{slug}={label}" for slug, label in section_list)
-    prompt = (
-        "Tu es un assistant. Voici la liste des sections d'un supermarché (slug=label): "
-        f"{sections_fr}. "
-        f"Pour l'article suivant, réponds UNIQUEMENT avec le slug de la section appropriée, rien d'autre. "
-        f"Article: « {name} »"
+    registry = get_section_registry()
+    content = call_llm(
+        _classification_prompt(name, registry), max_tokens=20, timeout=10
     )
-    content = call_llm(prompt, max_tokens=20, timeout=10)
-    if content is None:
+    return _parse_classification(content, registry)
+
+
+async def _acall_llm(item_name: str) -> Optional[str]:
+    """Async variant of _call_llm."""
+    name = (item_name or "").strip()[:LLM_INPUT_MAX_LENGTH]
+    if not name:
         return None
-    slug = content.strip().split()[0] if content else ""
-    logger.debug("LLM response slug=%r", slug)
-    if Section.objects.filter(name_slug=slug).exists():
-        return slug
-    return None
+    registry = await database_sync_to_async(get_section_registry)()
+    content = await acall_llm(
+        _classification_prompt(name, registry), max_tokens=20, timeout=10
+    )
+    return _parse_classification(content, registry)
 
 
-# Max length of pasted text sent to LLM for import normalization
-IMPORT_LLM_INPUT_MAX_LENGTH = 4000
+# Max number of unknown names sent in one batch classification prompt
+LLM_BATCH_MAX_NAMES = 60
 
 
-def normalize_import_with_llm(raw_text: str) -> list[dict]:
+def _call_llm_batch(names: list[str]) -> dict[str, str]:
     """
-    Call LLM to normalize a pasted grocery list into a JSON array of items.
-    Returns list of {"name": str, "quantity": str, "section_slug": str | None}.
-    Returns [] if LLM is unavailable or on any error (caller can fall back to client parsing).
+    Classify several item names in one LLM call (JSON mapping index -> slug).
+    Returns {name: slug} for valid answers only; {} on failure.
     """
-    if not (getattr(settings, "LLM_API_KEY", "") or "").strip():
-        return []
-    text = (raw_text or "").strip()[:IMPORT_LLM_INPUT_MAX_LENGTH]
-    if not text:
-        return []
-    section_list = list(
-        Section.objects.order_by("position").values_list("name_slug", "label_fr")
-    )
-    sections_fr = ", ".join(f"{slug}={label}" for slug, label in section_list)
-    valid_slugs = set(slug for slug, _ in section_list)
+    names = [n.strip()[:LLM_INPUT_MAX_LENGTH] for n in names if n and n.strip()]
+    if not names:
+        return {}
+    registry = get_section_registry()
+    sections_fr = registry.prompt_list
+    valid_slugs = registry.slugs
+    articles = "\n".join(f"{i}. « {name} »" for i, name in enumerate(names, 1))
     prompt = (
-        "L'utilisateur a collé une liste de courses en texte libre. Elle peut être désordonnée "
-        "(formats variés : « Nom : quantité », « quantité nom », tirets, numéros, etc.). Certaines lignes peuvent contenir des éléments à ignorer comme le titre d'une section.\n"
-        "Normalise-la en un tableau JSON. Chaque élément doit être un objet avec exactement :\n"
-        '- "name" : string (nom de l\'article normalisé)\n'
-        '- "quantity" : string (quantité, peut être "" si aucune)\n'
-        '- "section_slug" : string ou null (un des slugs ci-dessous, ou null si inconnu)\n'
-        f"Sections autorisées (slug=label) : {sections_fr}.\n\n"
-        "Règles pour le nom (name) :\n"
-        "- Une seule majuscule en début de mot, orthographe française correcte (apostrophe : d'olive, l'eau, pas d'espace avant l'apostrophe).\n"
-        "- Nom court et courant comme en liste de courses : préférer « Oeufs » plutôt que « Jaune d'oeuf », « Bœuf haché » plutôt que « Viande hachée de bœuf », « Huile d'olive » (avec apostrophe) plutôt que « Huile d olive ». Supprimer les tournures redondantes (ex. « Viande de X » → « X » quand c'est l'ingrédient principal).\n"
-        "- Pas de détails superflus ; garder l'essentiel pour identifier l'article.\n\n"
-        "Réponds UNIQUEMENT par le tableau JSON minifié, sans markdown, sans explication.\n\n"
-        "Liste collée par l'utilisateur :\n"
-        f"{text}"
+        "Tu es un assistant. Voici la liste des sections d'un supermarché (slug=label): "
+        f"{sections_fr}. "
+        "Pour chaque article numéroté ci-dessous, choisis le slug de la section appropriée. "
+        'Réponds UNIQUEMENT par un objet JSON minifié {"numéro": "slug"}, sans markdown, sans explication.\n'
+        f"Articles :\n{articles}"
     )
-    content = call_llm(prompt, max_tokens=1024, timeout=30)
+    content = call_llm(prompt, max_tokens=20 + 16 * len(names), timeout=20)
     if content is None:
-        return []
+        return {}
     try:
-        content = content.strip()
-        if content.startswith("```"):
-            lines = content.split("\n")
-            if lines[0].strip().startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            content = "\n".join(lines)
-        content = content.replace("\\\\\\", "\\")
-        parsed = json.loads(content)
-        if not isinstance(parsed, list):
-            return []
-        result = []
-        for entry in parsed:
-            if not isinstance(entry, dict):
-                continue
-            name = entry.get("name")
-            if name is None:
-                continue
-            name = str(name).strip()
-            if not name:
-                continue
-            quantity = entry.get("quantity")
-            quantity = "" if quantity is None else str(quantity).strip()
-            section_slug = entry.get("section_slug")
-            if section_slug is not None:
-                section_slug = str(section_slug).strip()
-                if section_slug not in valid_slugs:
-                    section_slug = None
-            result.append(
-                {
-                    "name": name,
-                    "quantity": quantity,
-                    "section_slug": section_slug,
-                }
-            )
-            logger.info(
-                "LLM import entry: name=%r quantity=%r section_slug=%s",
-                name,
-                quantity or "(empty)",
-                section_slug or "(null)",
+        parsed = decode_llm_json(content)
+    except json.JSONDecodeError as e:
+        logger.warning("LLM batch classification failed: %s", e)
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    result = {}
+    for key, slug in parsed.items():
+        try:
+            idx = int(str(key).strip().rstrip(".")) - 1
+        except ValueError:
+            continue
+        slug = str(slug or "").strip()
+        if 0 <= idx < len(names) and slug in valid_slugs:
+            result[names[idx]] = slug
+    logger.debug("LLM batch response: asked=%d answered=%d", len(names), len(result))
+    return result
+
+
+def _classify_batch(names: list[str]) -> dict[str, Optional[str]]:
+    """Micro-batcher function (worker thread): one prompt for all names, or the single one."""
+    close_old_connections()
+    try:
+        if len(names) == 1:
+            return {names[0]: _call_llm(names[0])}
+        return _call_llm_batch(names)
+    finally:
+        close_old_connections()
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def _get_classification_batcher() -> Optional[MicroBatcher]:
+    """Process-wide batcher, or None when LLM_BATCH_WINDOW_MS is 0 (one call per name)."""
+    global _batcher
+    window = float(getattr(settings, "LLM_BATCH_WINDOW_MS", 0)) / 1000
+    if window <= 0:
+        return None
+    max_size = max(
+        1, min(int(getattr(settings, "LLM_BATCH_MAX_SIZE", 20)), LLM_BATCH_MAX_NAMES)
+    )
+    batcher = _batcher
+    if batcher is not None and (batcher.window, batcher.max_size) == (window, max_size):
+        return batcher
+    with _batcher_lock:
+        if _batcher is None or (_batcher.window, _batcher.max_size) != (
+            window,
+            max_size,
+        ):
+            if _batcher is not None:
+                _batcher.close()
+            _batcher = MicroBatcher(
+                "llm-classify", _classify_batch, window=window, max_size=max_size
             )
-        logger.info("LLM import normalized count=%d", len(result))
-        return result
-    except (json.JSONDecodeError, KeyError, TypeError) as e:
-        logger.warning("LLM import normalize failed: %s", e)
-        return []
+        return _batcher
 
 
-@transaction.atomic
-def assign_section(item_name: str, default_slug: str = "autre") -> Optional[Section]:
+def _llm_name(item_name: str) -> str:
+    return (item_name or "").strip()[:LLM_INPUT_MAX_LENGTH]
+
+
+def _classify_name(item_name: str) -> Optional[str]:
+    """_call_llm, through the micro-batcher when enabled."""
+    batcher = _get_classification_batcher()
+    if batcher is None or not _llm_name(item_name):
+        return _call_llm(item_name)
+    return batcher.submit(_llm_name(item_name)).result()
+
+
+async def _aclassify_name(item_name: str) -> Optional[str]:
+    """Async variant of _classify_name: awaits the batch without holding a thread."""
+    batcher = _get_classification_batcher()
+    if batcher is None or not _llm_name(item_name):
+        return await _acall_llm(item_name)
+    return await asyncio.wrap_future(batcher.submit(_llm_name(item_name)))
+
+
+def _learn_keyword(normalized: str, section: Section) -> None:
+    """Store the normalized item name as a keyword for the section LLM chose."""
+    if not normalized:
+        return
+    with transaction.atomic():
+        SectionKeyword.objects.get_or_create(
+            keyword=normalized, defaults={"section": section}
+        )
+    logger.info(
+        "learned keyword: keyword=%r, section=%s",
+        normalized,
+        section.name_slug,
+    )
+
+
+def needs_llm_lookup(item_name: str) -> bool:
+    """True when assign_section would call the LLM (no keyword hit, nothing cached)."""
+    normalized = _normalize(item_name or "")
+    if not normalized or _match_keywords(normalized) is not None:
+        return False
+    if not is_llm_available() or classify_locally(normalized) is not None:
+        return False
+    found, _ = get_cached_classification(normalized)
+    return not found
+
+
+_llm_flights = SingleFlight()
+_async_llm_flights = AsyncSingleFlight()
+
+
+def _classify_with_llm(item_name: str, normalized: str, default_slug: str):
     """
-    Assign a section to an item by name. Tries keyword rules (DB) first, then optional LLM.
-    When LLM assigns a section, the normalized item name is stored as a keyword for next time.
-    Returns a Section instance or None (caller may use default).
+    Ask the LLM (no transaction held during the HTTP call) and cache the outcome.
+    Concurrent calls for the same normalized name share one in-flight request.
     """
-    normalized = _normalize(item_name or "")
-    logger.debug("assign_section normalized=%r", normalized)
 
+    def run():
+        slug = _classify_name(item_name)
+        if slug is None and not is_llm_available():
+            # Refused by the circuit breaker: an outage is not a negative answer.
+            return None
+        if slug == default_slug:
+            # "Default" answers are remembered as misses, not learned as keywords.
+            slug = None
+        cache_classification(normalized, slug)
+        return slug
+
+    return _llm_flights.do(normalized, run)
+
+
+async def _aclassify_with_llm(item_name: str, normalized: str, default_slug: str):
+    """Async variant of _classify_with_llm (shares in-flight calls within the event loop)."""
+
+    async def run():
+        slug = await _aclassify_name(item_name)
+        if slug is None and not is_llm_available():
+            return None
+        if slug == default_slug:
+            slug = None
+        await database_sync_to_async(cache_classification)(normalized, slug)
+        return slug
+
+    return await _async_llm_flights.do(normalized, run)
+
+
+def _resolve_without_llm(
+    item_name: str, normalized: str
+) -> tuple[Optional[Section], bool, Optional[str]]:
+    """
+    Keyword rules, local classifier and LLM cache. Returns (section, ask_llm, cached_slug):
+    section is set when resolved locally; ask_llm is True when the LLM must be called.
+    """
+    registry = get_section_registry()
     slug = _match_keywords(normalized)
-    if slug:
-        try:
-            section = Section.objects.get(name_slug=slug)
-            logger.info(
-                "section assigned: item_name=%r, source=keyword, section=%s",
-                item_name,
-                section.name_slug,
-            )
-            return section
-        except Section.DoesNotExist:
-            pass
+    section = registry.by_slug.get(slug) if slug else None
+    if section is not None:
+        logger.info(
+            "section assigned: item_name=%r, source=keyword, section=%s",
+            item_name,
+            section.name_slug,
+        )
+        return (section, False, None)
 
-    slug = _call_llm(item_name)
-    if slug:
-        try:
-            section = Section.objects.get(name_slug=slug)
-            SectionKeyword.objects.get_or_create(
-                keyword=normalized, defaults={"section": section}
-            )
-            logger.info(
-                "section assigned: item_name=%r, source=llm, section=%s",
-                item_name,
-                section.name_slug,
-            )
-            logger.info(
-                "learned keyword: keyword=%r, section=%s",
-                normalized,
-                section.name_slug,
-            )
-            return section
-        except Section.DoesNotExist:
-            pass
+    slug = classify_locally(normalized)
+    section = registry.by_slug.get(slug) if slug else None
+    if section is not None:
+        logger.info(
+            "section assigned: item_name=%r, source=local_classifier, section=%s",
+            item_name,
+            section.name_slug,
+        )
+        return (section, False, None)
 
-    try:
-        section = Section.objects.get(name_slug=default_slug)
+    if not is_llm_configured():
+        return (None, False, None)
+    found, slug = get_cached_classification(normalized)
+    if found:
+        logger.debug(
+            "classification cache hit: normalized=%r slug=%s", normalized, slug
+        )
+    # Circuit breaker open: degrade to keyword-only assignment without waiting.
+    return (None, not found and is_llm_available(), slug)
+
+
+def _finish_assignment(
+    item_name: str, normalized: str, slug: Optional[str], default_slug: str
+) -> Optional[Section]:
+    """Learn the LLM's section as a keyword, or fall back to the default section."""
+    registry = get_section_registry()
+    section = registry.by_slug.get(slug) if slug else None
+    if section is not None:
+        _learn_keyword(normalized, section)
+        logger.info(
+            "section assigned: item_name=%r, source=llm, section=%s",
+            item_name,
+            section.name_slug,
+        )
+        return section
+
+    section = registry.by_slug.get(default_slug)
+    if section is not None:
         logger.info(
             "section assigned: item_name=%r, source=default, section=%s",
             item_name,
             section.name_slug,
         )
         return section
-    except Section.DoesNotExist:
-        section = Section.objects.order_by("position").first()
-        if section:
-            logger.info(
-                "section assigned: item_name=%r, source=fallback, section=%s",
-                item_name,
-                section.name_slug,
-            )
+    section = registry.sections[0] if registry.sections else None
+    if section:
+        logger.info(
+            "section assigned: item_name=%r, source=fallback, section=%s",
+            item_name,
+            section.name_slug,
+        )
+    return section
+
+
+def assign_section(item_name: str, default_slug: str = "autre") -> Optional[Section]:
+    """
+    Assign a section to an item by name. Tries keyword rules (DB) first, then optional LLM.
+    LLM outcomes, including failures, are cached per normalized name (classification_cache).
+    When LLM assigns a section, the normalized item name is stored as a keyword for next time.
+    The LLM call runs outside any transaction; only the keyword upsert is atomic.
+    Returns a Section instance or None (caller may use default).
+    """
+    normalized = _normalize(item_name or "")
+    logger.debug("assign_section normalized=%r", normalized)
+    section, ask_llm, slug = _resolve_without_llm(item_name, normalized)
+    if section is not None:
         return section
+    if ask_llm:
+        slug = _classify_with_llm(item_name, normalized, default_slug)
+    return _finish_assignment(item_name, normalized, slug, default_slug)
+
+
+async def aassign_section(
+    item_name: str, default_slug: str = "autre"
+) -> Optional[Section]:
+    """
+    Async variant of assign_section for the event loop: DB lookups run in worker threads,
+    the LLM call is awaited without holding one.
+    """
+    normalized = _normalize(item_name or "")
+    logger.debug("aassign_section normalized=%r", normalized)
+    section, ask_llm, slug = await database_sync_to_async(_resolve_without_llm)(
+        item_name, normalized
+    )
+    if section is not None:
+        return section
+    if ask_llm:
+        slug = await _aclassify_with_llm(item_name, normalized, default_slug)
+    return await database_sync_to_async(_finish_assignment)(
+        item_name, normalized, slug, default_slug
+    )
+
+
+def assign_sections_batch(
+    item_names: list[str], default_slug: str = "autre", use_llm: bool = True
+) -> dict[str, Optional[str]]:
+    """
+    Batch counterpart of assign_section for imports. Returns {normalized name: slug or None}.
+    Keyword hits, confident local-classifier predictions and cached LLM outcomes resolve
+    locally; the remaining names are sent to the LLM in a single prompt (use_llm=False
+    skips it). LLM answers are cached and learned as keywords exactly like in
+    assign_section; None means "use the default".
+    """
+    result: dict[str, Optional[str]] = {}
+    pending: dict[str, str] = {}
+    for name in item_names:
+        normalized = _normalize(name or "")
+        if not normalized or normalized in result:
+            continue
+        slug = _match_keywords(normalized) or classify_locally(normalized)
+        result[normalized] = slug
+        if slug is None:
+            pending[normalized] = name.strip()
+    if not pending or not use_llm or not is_llm_configured():
+        return result
+
+    unknown = []
+    for normalized in pending:
+        found, slug = get_cached_classification(normalized)
+        if found:
+            result[normalized] = slug
+        else:
+            unknown.append(normalized)
+    for start in range(0, len(unknown), LLM_BATCH_MAX_NAMES):
+        if not is_llm_available():
+            break
+        chunk = unknown[start : start + LLM_BATCH_MAX_NAMES]
+        answers = _call_llm_batch([pending[n] for n in chunk])
+        if not answers and not is_llm_available():
+            break
+        sections = get_section_registry().by_slug
+        for normalized in chunk:
+            slug = answers.get(pending[normalized][:LLM_INPUT_MAX_LENGTH])
+            if slug == default_slug:
+                slug = None
+            cache_classification(normalized, slug)
+            if slug and slug in sections:
+                _learn_keyword(normalized, sections[slug])
+            result[normalized] = slug
+    logger.info(
+        "batch section assignment: names=%d llm_asked=%d",
+        len(result),
+        len(unknown),
+    )
+    return result
+
+
+def fill_missing_sections(items: list[dict], use_llm: bool = True) -> list[dict]:
+    """
+    Set section_slug on import items that have none, with one assign_sections_batch call.
+    Items left unresolved keep section_slug=None (create_item then applies the default).
+    """
+    names = [it["name"] for it in items if not it.get("section_slug")]
+    if not names:
+        return items
+    slugs = assign_sections_batch(names, use_llm=use_llm)
+    for it in items:
+        if not it.get("section_slug"):
+            it["section_slug"] = slugs.get(_normalize(it["name"]))
+    return items
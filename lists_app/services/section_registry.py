@@ -0,0 +1,50 @@
+"""
+Process-local registry of Section rows, indexed by id and slug, with the LLM prompt string
+precomputed. Reloaded lazily when the sections generation moves (any worker, admin, reorder).
+"""
+
+import logging
+from typing import Optional
+
+from lists_app.models import Section
+from lists_app.services.cache_generation import SECTIONS, GenerationCache
+
+logger = logging.getLogger(__name__)
+
+
+class SectionRegistry:
+    """Immutable snapshot of all sections, ordered by position."""
+
+    def __init__(self, sections: list[Section]):
+        self.sections = sections
+        self.by_id = {s.id: s for s in sections}
+        self.by_slug = {s.name_slug: s for s in sections}
+        self.slugs = frozenset(self.by_slug)
+        # "slug=label, ..." as used in LLM prompts
+        self.prompt_list = ", ".join(f"{s.name_slug}={s.label_fr}" for s in sections)
+
+
+def _load_registry() -> SectionRegistry:
+    registry = SectionRegistry(list(Section.objects.order_by("position", "id")))
+    logger.debug("section registry loaded: sections=%d", len(registry.sections))
+    return registry
+
+
+_registry_cache = GenerationCache((SECTIONS,), _load_registry)
+
+
+def get_section_registry() -> SectionRegistry:
+    return _registry_cache.get()
+
+
+def get_section_by_slug(slug) -> Optional[Section]:
+    if not slug:
+        return None
+    return get_section_registry().by_slug.get(str(slug).strip())
+
+
+def get_section_by_id(section_id) -> Optional[Section]:
+    try:
+        return get_section_registry().by_id.get(int(section_id))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,95 @@
+"""
+Single-flight deduplication: concurrent calls sharing a key wait for one in-flight execution
+instead of repeating it (e.g. several worker threads classifying the same unknown name).
+AsyncSingleFlight does the same for coroutines on an event loop.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Thread-safe: the first caller for a key runs fn; callers arriving meanwhile share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args, **kwargs) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class _LeaderCancelled(Exception):
+    """Set on the shared future when the leader's task is cancelled."""
+
+
+class AsyncSingleFlight:
+    """
+    Coroutine counterpart of SingleFlight. The first awaiter for a key runs fn; others
+    await the same result. Calls are only shared within one event loop. When the leader
+    is cancelled (e.g. its WebSocket closed), the followers run the call again instead
+    of being cancelled with it.
+    """
+
+    def __init__(self):
+        self._calls: dict[tuple[int, Hashable], asyncio.Future] = {}
+
+    async def do(
+        self, key: Hashable, fn: Callable[..., Awaitable[T]], *args, **kwargs
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        future = self._calls.get(call_key)
+        if future is not None:
+            try:
+                # shield: a cancelled follower must not cancel the leader's call
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                return await self.do(key, fn, *args, **kwargs)
+        future = loop.create_future()
+        self._calls[call_key] = future
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(call_key, None)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,26 @@
+"""
+Signal handlers: bump cache generations when Section or SectionKeyword rows change,
+so every worker reloads its in-process copies lazily. Section edits also clear the
+import normalization cache.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from lists_app.models import Section, SectionKeyword
+from lists_app.services.cache_generation import KEYWORDS, SECTIONS, bump_generation
+from lists_app.services.import_cache import clear_import_cache
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def section_changed(sender, **kwargs):
+    # Keyword matches resolve to section slugs, so a section edit invalidates both.
+    bump_generation(SECTIONS, KEYWORDS)
+    clear_import_cache()
+
+
+@receiver(post_save, sender=SectionKeyword)
+@receiver(post_delete, sender=SectionKeyword)
+def section_keyword_changed(sender, **kwargs):
+    bump_generation(KEYWORDS)
@@ -44,7 +44,7 @@
       };
       load();
     })
-    .controller('ListDetailCtrl', function ($routeParams, $location, $scope, ListsApi, ListWebSocket) {
+    .controller('ListDetailCtrl', function ($routeParams, $location, $scope, $timeout, ListsApi, ListWebSocket) {
       var vm = this;
       vm.listId = $routeParams.listId;
       vm.list = null;
@@ -93,26 +93,42 @@
       };
       $scope.$on('$destroy', function () {
         if (reconnectPopupTimer) clearTimeout(reconnectPopupTimer);
+        if (importPollTimer) $timeout.cancel(importPollTimer);
       });
+      function addItemToSection(item) {
+        var found = false;
+        vm.sections.forEach(function (s) {
+          if (s.section_id === item.section_id) {
+            s.items = s.items || [];
+            s.items.push(item);
+            found = true;
+          }
+        });
+        if (!found) load();
+      }
       ListWebSocket.connect(vm.listId, function (msg) {
         if (msg.action === 'list_updated' && msg.list) applyList(msg.list);
-        if (msg.action === 'item_added' && msg.item) {
-          var found = false;
+        if (msg.action === 'item_added' && msg.item) addItemToSection(msg.item);
+        if (msg.action === 'item_updated' && msg.item) {
+          var moved = false;
           vm.sections.forEach(function (s) {
+            var items = s.items || [];
             if (s.section_id === msg.item.section_id) {
-              s.items = s.items || [];
-              s.items.push(msg.item);
-              found = true;
+              items.forEach(function (it, i) {
+                if (it.id === msg.item.id) items[i] = msg.item;
+              });
+              return;
             }
+            s.items = items.filter(function (it) { return it.id !== msg.item.id; });
+            if (s.items.length !== items.length) moved = true;
           });
-          if (!found) load();
+          if (moved) addItemToSection(msg.item);
         }
-        if (msg.action === 'item_updated' && msg.item) {
-          vm.sections.forEach(function (s) {
-            (s.items || []).forEach(function (it, i) {
-              if (it.id === msg.item.id) s.items[i] = msg.item;
-            });
-          });
+        if (msg.action === 'import_progress' && vm.importJob && msg.job_id === vm.importJob.id) {
+          vm.importMessage = msg.message;
+        }
+        if ((msg.action === 'import_done' || msg.action === 'import_failed') && msg.job) {
+          finishImportJob(msg.job);
         }
         if (msg.action === 'item_deleted' && msg.item_id) {
           vm.sections.forEach(function (s) {
@@ -261,12 +277,13 @@
         }
         return out;
       };
+      function sendImportedItem(it) {
+        var payload = { action: 'add_item', name: it.name, quantity: it.quantity || '', notes: it.notes || '' };
+        if (it.section_slug) payload.section_slug = it.section_slug;
+        ListWebSocket.send(payload);
+      }
       function applyImportedItems(items, message) {
-        items.forEach(function (it) {
-          var payload = { action: 'add_item', name: it.name, quantity: it.quantity || '', notes: it.notes || '' };
-          if (it.section_slug) payload.section_slug = it.section_slug;
-          ListWebSocket.send(payload);
-        });
+        items.forEach(sendImportedItem);
         vm.importText = '';
         vm.importMessage = message;
         var modalEl = document.getElementById('importModal');
@@ -285,6 +302,10 @@
         }
         vm.importLoading = true;
         vm.importMessage = 'Analyse en cours…';
+        if (ListsApi.canStreamImport()) {
+          doStreamImport(text);
+          return;
+        }
         ListsApi.parseImport(vm.listId, text).then(function (data) {
           var items = data.items || [];
           if (items.length === 0) {
@@ -293,21 +314,54 @@
           }
           applyImportedItems(items, items.length + ' article(s) importé(s).');
         }).catch(function () {
-          var items = vm.parseImportLines();
-          if (items.length === 0) {
-            vm.importMessage = 'Aucun article à importer.';
+          importLocally();
+        }).finally(function () {
+          vm.importLoading = false;
+        });
+      };
+      function importLocally() {
+        var items = vm.parseImportLines();
+        if (items.length === 0) {
+          vm.importMessage = 'Aucun article à importer.';
+          return;
+        }
+        applyImportedItems(items, items.length + ' article(s) importé(s) (analyse locale).');
+      }
+      function doStreamImport(text) {
+        // Items are added as soon as the server streams them; local parsing if none came.
+        var received = 0;
+        ListsApi.parseImportStream(vm.listId, text, function (item) {
+          received += 1;
+          sendImportedItem(item);
+          vm.importMessage = received + ' article(s) reçu(s)…';
+        }).then(function () {
+          if (received === 0) {
+            importLocally();
+            return;
+          }
+          applyImportedItems([], received + ' article(s) importé(s).');
+        }).catch(function () {
+          if (received === 0) {
+            importLocally();
             return;
           }
-          applyImportedItems(items, items.length + ' article(s) importé(s) (analyse locale).');
+          applyImportedItems([], received + ' article(s) importé(s) (analyse interrompue).');
         }).finally(function () {
           vm.importLoading = false;
         });
-      };
-      function appendRecipeLinkAndSave(href) {
-        var u = (href || '').trim();
-        if (!u || !vm.list) return;
+      }
+      function appendRecipeLinkAndSave(hrefs) {
+        if (!vm.list) return;
         var cur = (vm.list.recipe_links || []).slice();
-        if (cur.indexOf(u) === -1) cur.push(u);
+        var added = false;
+        [].concat(hrefs).forEach(function (href) {
+          var u = (href || '').trim();
+          if (u && cur.indexOf(u) === -1) {
+            cur.push(u);
+            added = true;
+          }
+        });
+        if (!added) return;
         ListsApi.patchList(vm.listId, { recipe_links: cur }).then(function (data) {
           vm.list.recipe_links = data.recipe_links || [];
         }).catch(function () {});
@@ -333,6 +387,52 @@
           vm.list.recipe_links = data.recipe_links || [];
         }).catch(function () {});
       };
+      // Quitoque imports run as server jobs: progress and result arrive over the WebSocket,
+      // with polling of the job status as a fallback.
+      vm.importJob = null;
+      var importPollTimer = null;
+      function waitForImportJob(job, onDone) {
+        vm.importJob = { id: job.id, onDone: onDone };
+        pollImportJob(job.id);
+      }
+      function finishImportJob(job) {
+        var pending = vm.importJob;
+        if (!pending || pending.id !== job.id) return;
+        vm.importJob = null;
+        vm.importLoading = false;
+        if (job.status === 'failed') {
+          vm.importMessage = job.error || 'Import Quitoque impossible.';
+          return;
+        }
+        pending.onDone(job.result || {});
+      }
+      function pollImportJob(jobId) {
+        if (importPollTimer) $timeout.cancel(importPollTimer);
+        importPollTimer = $timeout(function () {
+          importPollTimer = null;
+          if (!vm.importJob || vm.importJob.id !== jobId) return;
+          ListsApi.getImportJob(vm.listId, jobId).then(function (job) {
+            if (job.status === 'done' || job.status === 'failed') {
+              finishImportJob(job);
+              return;
+            }
+            if (job.progress && job.progress.message) vm.importMessage = job.progress.message;
+            pollImportJob(jobId);
+          }).catch(function () {
+            pollImportJob(jobId);
+          });
+        }, 3000);
+      }
+      function applyQuitoqueItems(url, data) {
+        var items = data.items || [];
+        if (items.length === 0) {
+          vm.importMessage = 'Aucun ingrédient trouvé.';
+          return;
+        }
+        applyImportedItems(items, items.length + ' article(s) importé(s) depuis Quitoque' +
+          (data.cached ? ' (recette déjà en cache).' : '.'));
+        appendRecipeLinkAndSave(url);
+      }
       vm.doQuitoqueImport = function () {
         vm.importMessage = '';
         var url = (vm.quitoqueImportUrl || '').trim();
@@ -340,23 +440,55 @@
           vm.importMessage = 'Indiquez une URL Quitoque.';
           return;
         }
+        var urls = url.split(/\s+/);
+        if (urls.length > 1) {
+          doQuitoqueBatchImport(urls);
+          return;
+        }
         vm.importLoading = true;
         vm.importMessage = 'Récupération depuis Quitoque…';
         ListsApi.importQuitoque(vm.listId, url).then(function (data) {
-          var items = data.items || [];
-          if (items.length === 0) {
-            vm.importMessage = 'Aucun ingrédient trouvé.';
+          if (data.job) {
+            waitForImportJob(data.job, function (result) { applyQuitoqueItems(url, result); });
             return;
           }
-          applyImportedItems(items, items.length + ' article(s) importé(s) depuis Quitoque.');
-          appendRecipeLinkAndSave(url);
+          vm.importLoading = false;
+          applyQuitoqueItems(url, data);
         }).catch(function (res) {
-          var msg = (res && res.data && res.data.message) || 'Import Quitoque impossible.';
-          vm.importMessage = msg;
-        }).finally(function () {
           vm.importLoading = false;
+          vm.importMessage = (res && res.data && res.data.message) || 'Import Quitoque impossible.';
         });
       };
+      function applyQuitoqueBatch(urls, data) {
+        var results = data.results || [];
+        var failed = results.filter(function (r) { return r.error; });
+        var items = data.items || [];
+        if (items.length === 0) {
+          vm.importMessage = failed.length ? failed[0].error : 'Aucun ingrédient trouvé.';
+          return;
+        }
+        var message = items.length + ' article(s) importé(s) depuis ' +
+          (results.length - failed.length) + ' recette(s) Quitoque';
+        message += failed.length ? ' (' + failed.length + ' en échec).' : '.';
+        applyImportedItems(items, message);
+        if (urls) {
+          appendRecipeLinkAndSave(results.filter(function (r) { return !r.error; }).map(function (r) { return r.url; }));
+        }
+      }
+      function doQuitoqueBatchImport(urls) {
+        vm.importLoading = true;
+        vm.importMessage = 'Récupération des recettes depuis Quitoque…';
+        ListsApi.importQuitoqueBatch(vm.listId, urls).then(function (data) {
+          waitForImportJob(data.job, function (result) { applyQuitoqueBatch(urls, result); });
+        }).catch(function (res) {
+          vm.importLoading = false;
+          vm.importMessage = (res && res.data && (res.data.message || res.data.error)) || 'Import Quitoque impossible.';
+        });
+      }
+      vm.doQuitoqueLinksImport = function () {
+        vm.importMessage = '';
+        doQuitoqueBatchImport(null);
+      };
       vm.deduplicate = function () {
         ListsApi.deduplicateList(vm.listId).then(function (data) {
           applyList(data);
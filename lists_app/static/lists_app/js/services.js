@@ -12,7 +12,7 @@
   }
 
   angular.module('listsApp')
-    .factory('ListsApi', function ($http) {
+    .factory('ListsApi', function ($http, $q, $rootScope) {
       var base = '/api';
       return {
         defaultListName: defaultListName,
@@ -34,9 +34,60 @@
         parseImport: function (listId, text) {
           return $http.post(base + '/lists/' + listId + '/parse-import/', { text: text }).then(function (r) { return r.data; });
         },
+        canStreamImport: function () {
+          return typeof window.fetch === 'function' && typeof window.TextDecoder === 'function';
+        },
+        parseImportStream: function (listId, text, onItem) {
+          // NDJSON stream: onItem(item) is called as soon as each line arrives.
+          // Resolves with { count: n } (count 0 = LLM unavailable); rejects on HTTP error.
+          return $q(function (resolve, reject) {
+            fetch(base + '/lists/' + listId + '/parse-import/', {
+              method: 'POST',
+              credentials: 'same-origin',
+              headers: { 'Content-Type': 'application/json' },
+              body: JSON.stringify({ text: text, stream: true })
+            }).then(function (res) {
+              if (!res.ok || !res.body) throw new Error('HTTP ' + res.status);
+              var reader = res.body.getReader();
+              var decoder = new TextDecoder();
+              var buffer = '';
+              var count = 0;
+              function handleLine(line) {
+                if (!line.trim()) return;
+                var msg = JSON.parse(line);
+                if (msg.item) {
+                  count += 1;
+                  $rootScope.$evalAsync(function () { onItem(msg.item); });
+                }
+              }
+              function pump() {
+                return reader.read().then(function (chunk) {
+                  if (chunk.done) {
+                    handleLine(buffer);
+                    resolve({ count: count });
+                    return;
+                  }
+                  buffer += decoder.decode(chunk.value, { stream: true });
+                  var lines = buffer.split('\n');
+                  buffer = lines.pop();
+                  lines.forEach(handleLine);
+                  return pump();
+                });
+              }
+              return pump();
+            }).catch(reject);
+          });
+        },
         importQuitoque: function (listId, url) {
           return $http.post(base + '/lists/' + listId + '/import-quitoque/', { url: url }).then(function (r) { return r.data; });
         },
+        getImportJob: function (listId, jobId) {
+          return $http.get(base + '/lists/' + listId + '/import-jobs/' + jobId + '/').then(function (r) { return r.data; });
+        },
+        importQuitoqueBatch: function (listId, urls) {
+          var body = urls ? { urls: urls } : {};
+          return $http.post(base + '/lists/' + listId + '/import-quitoque-batch/', body).then(function (r) { return r.data; });
+        },
         deduplicateList: function (listId) {
           return $http.post(base + '/lists/' + listId + '/deduplicate/').then(function (r) { return r.data; });
         }
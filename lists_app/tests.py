@@ -3,19 +3,102 @@ Tests for lists_app: models, section assigner, API, WebSocket, secret-URL access
 """
 
 import asyncio
+import io
 import json
-
-from channels.testing import WebsocketCommunicator
-from django.test import TestCase, Client, override_settings
-
-from lists_app.models import AccessToken, GroceryList, Item, Section, SectionKeyword
+import math
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from datetime import timedelta
+from unittest import mock
+
+import httpx
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import TestCase, Client, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from lists_app import admin, consumers
+from lists_app.models import (
+    AccessToken,
+    CacheGeneration,
+    GroceryList,
+    ImportJob,
+    ImportLine,
+    ImportNormalization,
+    Item,
+    LLMClassification,
+    RecipeIngredients,
+    Section,
+    SectionKeyword,
+)
+from lists_app.services.cache_generation import (
+    KEYWORDS,
+    SECTIONS,
+    GenerationCache,
+    bump_generation,
+    reset_local_caches,
+)
+from lists_app.services import (
+    classification_cache,
+    import_jobs,
+    keyword_seeding,
+    quitoque_scraper,
+    quitoque_session,
+)
+from lists_app.services.driver_pool import DriverPool, DriverPoolTimeout
 from lists_app.services.quitoque_scraper import (
     QuitoqueScraperError,
     parse_ingredient_lis_from_html,
     validate_recipe_url,
 )
+from lists_app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from lists_app.services.classification_cache import (
+    cache_classification,
+    clear_local_classification_cache,
+    get_cached_classification,
+)
+from lists_app.services import item_service as item_svc
+from lists_app.services.import_cache import cache_import, get_cached_import
+from lists_app.services.import_lines import line_pattern, quantity_template
+from lists_app.services.import_normalizer import (
+    normalize_import_with_llm,
+    split_import_text,
+    stream_import_with_llm,
+)
+from lists_app.services.import_parser import parse_import_lines
+from lists_app.services.json_stream import JsonArrayStream
+from lists_app.services.keyword_matcher import KeywordMatcher, get_keyword_matcher
+from lists_app.services import llm_client
+from lists_app.services.local_classifier import (
+    classify_locally,
+    save_classifier,
+    train_classifier,
+)
+from lists_app.services.section_registry import (
+    get_section_by_id,
+    get_section_by_slug,
+    get_section_registry,
+)
+from lists_app.services.keyword_compaction import plan_compaction
+from lists_app.services.recipe_cache import (
+    cache_recipe,
+    fetch_recipe_ingredients,
+    fetch_recipes,
+    invalidate_recipe,
+)
+from lists_app.services.micro_batcher import MicroBatcher
+from lists_app.services.single_flight import AsyncSingleFlight, SingleFlight
+from lists_app.services import section_assigner
 from lists_app.services.section_assigner import (
+    aassign_section,
     assign_section,
+    assign_sections_batch,
     _match_keywords,
     _normalize,
 )
@@ -119,6 +202,1720 @@ class SectionAssignerTest(TestCase):
         self.assertEqual(section.name_slug, "epicerie")
 
 
+class KeywordMatcherTest(TestCase):
+    def test_longest_keyword_wins(self):
+        matcher = KeywordMatcher(
+            [("pomme", "fruits_legumes"), ("pomme de terre", "legumes_racines")]
+        )
+        self.assertEqual(matcher.match("pomme de terre bio"), "legumes_racines")
+        self.assertEqual(matcher.match("compote de pomme"), "fruits_legumes")
+        self.assertIsNone(matcher.match("lait"))
+
+    def test_overlapping_and_suffix_keywords(self):
+        matcher = KeywordMatcher(
+            [("he", "a"), ("she", "b"), ("hers", "c"), ("his", "d")]
+        )
+        self.assertEqual(matcher.match("ushers"), "c")
+        self.assertEqual(matcher.match_keyword("ushe"), ("she", "b"))
+
+    def test_equal_length_ties_are_alphabetical(self):
+        matcher = KeywordMatcher([("thon", "poisson"), ("lait", "laitier")])
+        self.assertEqual(matcher.match("lait thon"), "laitier")
+
+    def test_rebuilt_when_keyword_saved(self):
+        before = get_keyword_matcher()
+        epicerie = Section.objects.get(name_slug="epicerie")
+        SectionKeyword.objects.create(keyword="quinoa", section=epicerie)
+        after = get_keyword_matcher()
+        self.assertIsNot(before, after)
+        self.assertEqual(after.match("quinoa rouge"), "epicerie")
+
+
+@override_settings(CACHE_GENERATION_CHECK_INTERVAL=0)
+class CacheGenerationTest(TestCase):
+    def test_bump_generation_creates_and_increments(self):
+        bump_generation("test_key")
+        bump_generation("test_key")
+        self.assertEqual(CacheGeneration.objects.get(key="test_key").value, 2)
+
+    def test_keyword_save_bumps_keywords_only(self):
+        bump_generation(KEYWORDS, SECTIONS)
+        sections_before = CacheGeneration.objects.get(key=SECTIONS).value
+        keywords_before = CacheGeneration.objects.get(key=KEYWORDS).value
+        epicerie = Section.objects.get(name_slug="epicerie")
+        SectionKeyword.objects.create(keyword="boulgour", section=epicerie)
+        self.assertEqual(
+            CacheGeneration.objects.get(key=SECTIONS).value, sections_before
+        )
+        self.assertEqual(
+            CacheGeneration.objects.get(key=KEYWORDS).value, keywords_before + 1
+        )
+
+    def test_reload_when_other_worker_bumps(self):
+        """A bump made elsewhere (plain UPDATE, no local invalidation) triggers a reload."""
+        calls = []
+        cache = GenerationCache(("test_other",), lambda: calls.append(1) or len(calls))
+        self.assertEqual(cache.get(), 1)
+        self.assertEqual(cache.get(), 1)
+        CacheGeneration.objects.create(key="test_other", value=5)
+        self.assertEqual(cache.get(), 2)
+        self.assertEqual(cache.get(), 2)
+
+
+@override_settings(LLM_API_KEY="test-key")
+class ClassificationCacheTest(TestCase):
+    def setUp(self):
+        clear_local_classification_cache()
+
+    def test_negative_result_skips_llm_on_repeat(self):
+        with mock.patch(
+            "lists_app.services.section_assigner._call_llm", return_value=None
+        ) as llm:
+            self.assertEqual(assign_section("zzyzx inconnu").name_slug, "autre")
+            self.assertEqual(assign_section("  ZZYZX  inconnu").name_slug, "autre")
+        self.assertEqual(llm.call_count, 1)
+        self.assertEqual(get_cached_classification("zzyzx inconnu"), (True, None))
+
+    def test_default_slug_is_negative_and_not_learned(self):
+        with mock.patch(
+            "lists_app.services.section_assigner._call_llm", return_value="autre"
+        ):
+            assign_section("truc bizarre")
+        self.assertFalse(SectionKeyword.objects.filter(keyword="truc bizarre").exists())
+        self.assertEqual(
+            LLMClassification.objects.get(normalized_name="truc bizarre").section_slug,
+            "",
+        )
+
+    def test_positive_result_learned_and_cached(self):
+        with mock.patch(
+            "lists_app.services.section_assigner._call_llm", return_value="epicerie"
+        ):
+            self.assertEqual(assign_section("Sarrasin").name_slug, "epicerie")
+        self.assertTrue(SectionKeyword.objects.filter(keyword="sarrasin").exists())
+        self.assertEqual(get_cached_classification("sarrasin"), (True, "epicerie"))
+
+    def test_expired_db_entry_is_ignored(self):
+        LLMClassification.objects.create(
+            normalized_name="vieux",
+            section_slug="epicerie",
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(get_cached_classification("vieux"), (False, None))
+
+    @override_settings(LLM_CLASSIFICATION_CACHE_MAX_ENTRIES=2)
+    def test_bounded_size(self):
+        with (
+            mock.patch(
+                "lists_app.services.section_assigner._call_llm", return_value=None
+            ),
+            mock.patch.object(classification_cache, "PRUNE_EVERY", 1),
+        ):
+            for name in ("aaa1", "aaa2", "aaa3"):
+                assign_section(name)
+        self.assertEqual(LLMClassification.objects.count(), 2)
+
+    def test_pruned_every_n_writes(self):
+        with (
+            mock.patch.object(classification_cache, "PRUNE_EVERY", 3),
+            mock.patch.object(classification_cache, "_writes", 0),
+            mock.patch.object(classification_cache, "_prune") as prune,
+        ):
+            for name in ("bbb1", "bbb2", "bbb3", "bbb4", "bbb5"):
+                cache_classification(name, "epicerie")
+            self.assertEqual(prune.call_count, 1)
+            cache_classification("bbb6", "epicerie")
+            self.assertEqual(prune.call_count, 2)
+
+    def test_long_names_share_one_key_in_both_tiers(self):
+        name = "x" * 250
+        cache_classification(name, "epicerie")
+        self.assertTrue(
+            LLMClassification.objects.filter(normalized_name="x" * 200).exists()
+        )
+        clear_local_classification_cache()
+        cache_classification("x" * 200 + "y" * 50, None)
+        self.assertEqual(get_cached_classification(name), (True, None))
+        clear_local_classification_cache()
+        self.assertEqual(get_cached_classification(name), (True, None))
+
+
+@override_settings(LLM_API_KEY="test-key")
+class BatchSectionAssignerTest(TestCase):
+    def setUp(self):
+        clear_local_classification_cache()
+
+    def test_keyword_hits_resolved_locally_unknowns_in_one_call(self):
+        with mock.patch(
+            "lists_app.services.section_assigner.call_llm",
+            return_value='{"1": "epicerie", "2": "autre", "3": "nope"}',
+        ) as llm:
+            result = assign_sections_batch(
+                ["Lait", "Sarrasin", "Truc", "Machin", "lait"]
+            )
+        self.assertEqual(llm.call_count, 1)
+        prompt = llm.call_args[0][0]
+        self.assertIn("1. « Sarrasin »", prompt)
+        self.assertNotIn("Lait", prompt)
+        self.assertEqual(
+            result,
+            {
+                "lait": "produits_laitiers_oeufs",
+                "sarrasin": "epicerie",
+                "truc": None,
+                "machin": None,
+            },
+        )
+        self.assertTrue(SectionKeyword.objects.filter(keyword="sarrasin").exists())
+        self.assertEqual(get_cached_classification("truc"), (True, None))
+
+    def test_cached_names_not_sent_again(self):
+        with mock.patch(
+            "lists_app.services.section_assigner.call_llm", return_value=None
+        ):
+            assign_sections_batch(["Zzz"])
+        with mock.patch("lists_app.services.section_assigner.call_llm") as llm:
+            self.assertEqual(assign_sections_batch(["zzz"]), {"zzz": None})
+        llm.assert_not_called()
+
+    def test_use_llm_false_only_uses_keywords(self):
+        with mock.patch("lists_app.services.section_assigner.call_llm") as llm:
+            result = assign_sections_batch(["Poulet", "Inconnu"], use_llm=False)
+        llm.assert_not_called()
+        self.assertEqual(result, {"poulet": "viande_volaille", "inconnu": None})
+
+
+class SingleFlightTest(TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "epicerie"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+            for _ in range(3)
+        ]
+        for t in followers:
+            t.start()
+        release.set()
+        for t in [leader, *followers]:
+            t.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["epicerie"] * 4)
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_exception_propagates_and_key_is_released(self):
+        flights = SingleFlight()
+        with self.assertRaises(ValueError):
+            flights.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+        self.assertEqual(flights.do("k", lambda: 42), 42)
+
+
+class AsyncSingleFlightTest(TestCase):
+    def test_concurrent_awaiters_share_one_execution(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "epicerie"
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", slow) for _ in range(4)))
+
+        self.assertEqual(asyncio.run(run()), ["epicerie"] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_exception_propagates_and_key_is_released(self):
+        flights = AsyncSingleFlight()
+
+        async def boom():
+            raise ValueError("boom")
+
+        async def answer():
+            return 42
+
+        async def run():
+            with self.assertRaises(ValueError):
+                await flights.do("k", boom)
+            return await flights.do("k", answer)
+
+        self.assertEqual(asyncio.run(run()), 42)
+
+    def test_followers_run_again_when_the_leader_is_cancelled(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "epicerie"
+
+        async def run():
+            leader = asyncio.ensure_future(flights.do("k", slow))
+            await asyncio.sleep(0)
+            followers = [asyncio.ensure_future(flights.do("k", slow)) for _ in range(3)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            results = await asyncio.gather(*followers)
+            self.assertTrue(leader.cancelled())
+            return results
+
+        self.assertEqual(asyncio.run(run()), ["epicerie"] * 3)
+        # The leader's call and one rerun shared by the followers
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(flights.in_flight(), 0)
+
+
+class MicroBatcherTest(TestCase):
+    def _batcher(self, fn, window=0.05, max_size=10):
+        batcher = MicroBatcher("test-batch", fn, window=window, max_size=max_size)
+        self.addCleanup(batcher.close)
+        return batcher
+
+    def test_concurrent_keys_share_one_call(self):
+        batches = []
+
+        def fn(keys):
+            batches.append(sorted(keys))
+            return {k: k.upper() for k in keys if k != "c"}
+
+        batcher = self._batcher(fn)
+        futures = [batcher.submit(k) for k in ["a", "b", "a", "c"]]
+        self.assertEqual([f.result(5) for f in futures], ["A", "B", "A", None])
+        self.assertEqual(batches, [["a", "b", "c"]])
+        self.assertEqual(batcher.snapshot()["callers"], 4)
+
+    def test_full_batch_does_not_wait_for_window(self):
+        batcher = self._batcher(lambda keys: {k: len(keys) for k in keys}, 10, 2)
+        start = time.monotonic()
+        futures = [batcher.submit(k) for k in ["a", "b", "c"]]
+        self.assertEqual([futures[0].result(5), futures[1].result(5)], [2, 2])
+        self.assertLess(time.monotonic() - start, 5)
+        batcher.close()
+        self.assertEqual(futures[2].result(5), 1)
+
+    def test_exception_fails_the_batch(self):
+        def fn(keys):
+            raise ValueError("boom")
+
+        future = self._batcher(fn).submit("a")
+        with self.assertRaises(ValueError):
+            future.result(5)
+
+
+def _close_classification_batcher():
+    if section_assigner._batcher is not None:
+        section_assigner._batcher.close()
+        section_assigner._batcher = None
+
+
+def _fake_batch_llm(prompt, **kwargs):
+    """LLM stub: "boissons" for every name of a batch prompt, "epicerie" for one name."""
+    if "Articles :" not in prompt:
+        return "epicerie"
+    articles = prompt.split("Articles :\n", 1)[1].splitlines()
+    return json.dumps({str(i): "boissons" for i in range(1, len(articles) + 1)})
+
+
+@override_settings(LLM_API_KEY="test-key", LLM_BATCH_WINDOW_MS=50)
+class ClassificationBatchingTest(TestCase):
+    def setUp(self):
+        get_section_registry()
+        self.addCleanup(_close_classification_batcher)
+
+    def test_concurrent_threads_share_one_prompt(self):
+        results = {}
+        names = ["Kombucha", "Kéfir", "Maté", "Kvas"]
+        with mock.patch(
+            "lists_app.services.section_assigner.call_llm", side_effect=_fake_batch_llm
+        ) as llm:
+            threads = [
+                threading.Thread(
+                    target=lambda n=n: results.update(
+                        {n: section_assigner._classify_name(n)}
+                    )
+                )
+                for n in names
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(5)
+        self.assertEqual(llm.call_count, 1)
+        self.assertEqual(results, {n: "boissons" for n in names})
+
+    def test_coroutines_and_single_names(self):
+        async def run():
+            return await asyncio.gather(
+                section_assigner._aclassify_name("Kombucha"),
+                section_assigner._aclassify_name("Maté"),
+            )
+
+        with mock.patch(
+            "lists_app.services.section_assigner.call_llm", side_effect=_fake_batch_llm
+        ) as llm:
+            self.assertEqual(asyncio.run(run()), ["boissons", "boissons"])
+            self.assertEqual(section_assigner._classify_name("Kvas"), "epicerie")
+        self.assertEqual(llm.call_count, 2)
+
+    @override_settings(LLM_BATCH_WINDOW_MS=0)
+    def test_disabled_by_default(self):
+        with mock.patch(
+            "lists_app.services.section_assigner._call_llm", return_value="epicerie"
+        ) as call:
+            self.assertEqual(section_assigner._classify_name("Kvas"), "epicerie")
+        call.assert_called_once_with("Kvas")
+        self.assertIsNone(section_assigner._batcher)
+
+
+@override_settings(LLM_API_KEY="test-key", LLM_BATCH_WINDOW_MS=200)
+class ConcurrentAssignSectionTest(TransactionTestCase):
+    serialized_rollback = True
+
+    def setUp(self):
+        clear_local_classification_cache()
+        self.addCleanup(_close_classification_batcher)
+
+    def test_concurrent_assignments_share_one_llm_call(self):
+        names = ["Kombucha", "Kéfir", "Maté", "Kvas"]
+        results, errors = {}, []
+        start = threading.Barrier(len(names))
+        # The in-memory test DB (SQLite shared cache) has no busy timeout: the DB steps
+        # run one thread at a time, the lock is released while waiting for the LLM.
+        db_lock = threading.Lock()
+        classify_name = section_assigner._classify_name
+
+        def classify_unlocked(name):
+            db_lock.release()
+            try:
+                return classify_name(name)
+            finally:
+                db_lock.acquire()
+
+        def assign(name):
+            try:
+                start.wait(5)
+                with db_lock:
+                    results[name] = assign_section(name).name_slug
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        with (
+            mock.patch(
+                "lists_app.services.section_assigner.call_llm",
+                side_effect=_fake_batch_llm,
+            ) as llm,
+            mock.patch.object(section_assigner, "_classify_name", classify_unlocked),
+        ):
+            threads = [threading.Thread(target=assign, args=(n,)) for n in names]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(10)
+        self.assertEqual(errors, [])
+        self.assertEqual(llm.call_count, 1)
+        self.assertEqual(results, {n: "boissons" for n in names})
+        self.assertEqual(
+            set(
+                SectionKeyword.objects.filter(section__name_slug="boissons")
+                .filter(keyword__in=[n.lower() for n in names])
+                .values_list("keyword", flat=True)
+            ),
+            {n.lower() for n in names},
+        )
+
+
+@override_settings(LLM_API_KEY="test-key")
+class AsyncAssignSectionTest(TestCase):
+    def setUp(self):
+        clear_local_classification_cache()
+
+    def test_llm_is_awaited_and_keyword_learned(self):
+        acall = mock.AsyncMock(return_value="epicerie")
+        with (
+            mock.patch("lists_app.services.section_assigner._acall_llm", acall),
+            mock.patch("lists_app.services.section_assigner._call_llm") as sync_call,
+        ):
+            section = async_to_sync(aassign_section)("Sarrasin")
+        self.assertEqual(section.name_slug, "epicerie")
+        acall.assert_awaited_once()
+        sync_call.assert_not_called()
+        self.assertTrue(SectionKeyword.objects.filter(keyword="sarrasin").exists())
+
+    def test_keyword_hit_skips_llm(self):
+        acall = mock.AsyncMock(return_value="epicerie")
+        with mock.patch("lists_app.services.section_assigner._acall_llm", acall):
+            section = async_to_sync(aassign_section)("Lait demi-écrémé")
+        self.assertEqual(section.name_slug, "produits_laitiers_oeufs")
+        acall.assert_not_awaited()
+
+    def test_llm_failure_falls_back_to_default(self):
+        acall = mock.AsyncMock(return_value=None)
+        with mock.patch("lists_app.services.section_assigner._acall_llm", acall):
+            section = async_to_sync(aassign_section)("Zzqx inconnu")
+        self.assertEqual(section.name_slug, "autre")
+        self.assertEqual(get_cached_classification("zzqx inconnu"), (True, None))
+
+
+@override_settings(LLM_API_KEY="test-key")
+class AssignSectionTransactionTest(TestCase):
+    def setUp(self):
+        clear_local_classification_cache()
+
+    def test_llm_call_happens_outside_transaction(self):
+        depth_before = len(connection.atomic_blocks)
+        depths = []
+
+        def fake_llm(name):
+            depths.append(len(connection.atomic_blocks))
+            return "epicerie"
+
+        with mock.patch(
+            "lists_app.services.section_assigner._call_llm", side_effect=fake_llm
+        ):
+            self.assertEqual(assign_section("Boulgour").name_slug, "epicerie")
+        self.assertEqual(depths, [depth_before])
+
+
+@override_settings(CACHE_GENERATION_CHECK_INTERVAL=60)
+class SectionRegistryTest(TestCase):
+    def tearDown(self):
+        # Section edits are rolled back without signals: drop the local copies too.
+        reset_local_caches()
+
+    def test_lookups_hit_no_queries_when_warm(self):
+        get_section_registry()
+        autre = Section.objects.get(name_slug="autre")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_section_by_slug("autre").id, autre.id)
+            self.assertEqual(get_section_by_id(autre.id).name_slug, "autre")
+            self.assertEqual(get_section_by_id(str(autre.id)).name_slug, "autre")
+            self.assertIsNone(get_section_by_slug("nope"))
+            self.assertIsNone(get_section_by_id("x"))
+            self.assertIn("autre=Autre", get_section_registry().prompt_list)
+
+    def test_section_edit_reloads_registry(self):
+        autre = Section.objects.get(name_slug="autre")
+        autre.label_fr = "Divers"
+        autre.save()
+        self.assertEqual(get_section_by_slug("autre").label_fr, "Divers")
+
+    def test_reorder_reloads_registry(self):
+        gl = GroceryList.objects.create(name="Test")
+        ids = [s.id for s in get_section_registry().sections]
+        item_svc.apply_reorder(gl, section_order=list(reversed(ids)))
+        self.assertEqual(
+            [s.id for s in get_section_registry().sections], list(reversed(ids))
+        )
+
+
+class LocalClassifierTest(TestCase):
+    SAMPLES = [
+        ("tomate", "fruits_legumes"),
+        ("tomates cerises", "fruits_legumes"),
+        ("carotte", "fruits_legumes"),
+        ("carottes rapées", "fruits_legumes"),
+        ("courgette", "fruits_legumes"),
+        ("poulet", "viande_volaille"),
+        ("filet de poulet", "viande_volaille"),
+        ("escalope de dinde", "viande_volaille"),
+        ("steak haché", "viande_volaille"),
+    ]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "model.json"
+        override = override_settings(LOCAL_CLASSIFIER_PATH=str(self.path))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_predicts_from_character_ngrams(self):
+        classifier = train_classifier(self.SAMPLES)
+        slug, confidence = classifier.predict("carottes")
+        self.assertEqual(slug, "fruits_legumes")
+        self.assertGreater(confidence, 0.5)
+        self.assertEqual(classifier.predict("")[0], None)
+        self.assertEqual(classifier.predict("§§§")[0], None)
+
+    def test_disabled_without_model_file(self):
+        self.assertIsNone(classify_locally("carottes"))
+
+    @override_settings(LOCAL_CLASSIFIER_MIN_CONFIDENCE=0.6)
+    def test_assign_section_uses_confident_prediction_before_llm(self):
+        save_classifier(train_classifier(self.SAMPLES))
+        with mock.patch("lists_app.services.section_assigner._call_llm") as llm:
+            section = assign_section("Escalopes de poulet")
+        llm.assert_not_called()
+        self.assertEqual(section.name_slug, "viande_volaille")
+
+    @override_settings(LOCAL_CLASSIFIER_MIN_CONFIDENCE=1.01)
+    def test_low_confidence_escalates(self):
+        save_classifier(train_classifier(self.SAMPLES))
+        self.assertIsNone(classify_locally("carottes"))
+
+    def test_train_and_benchmark_commands(self):
+        gl = GroceryList.objects.create(name="Historique")
+        for name, slug in self.SAMPLES:
+            Item.objects.create(
+                grocery_list=gl,
+                name=name.capitalize(),
+                section=Section.objects.get(name_slug=slug),
+            )
+        out = io.StringIO()
+        call_command("train_section_classifier", stdout=out)
+        self.assertTrue(self.path.exists())
+        self.assertIn("Modèle entraîné", out.getvalue())
+        out = io.StringIO()
+        call_command("benchmark_section_classifier", "--holdout", "0", stdout=out)
+        self.assertIn("Appels LLM", out.getvalue())
+        self.assertIn("µs", out.getvalue())
+
+
+def _batch_answer(prompt, slugs):
+    """Fake batch classification answer: slugs[name] for each numbered article."""
+    articles = prompt.split("Articles :\n", 1)[1].splitlines()
+    answer = {}
+    for article in articles:
+        n, name = article.split(". ", 1)
+        answer[n] = slugs.get(name.strip("« »"), "autre")
+    return json.dumps(answer)
+
+
+@override_settings(LLM_API_KEY="test-key")
+class SeedKeywordsTest(TestCase):
+    SLUGS = {"Kombucha": "boissons", "Tempeh": "epicerie", "Zzqx": "autre"}
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.corpus = Path(tmp.name) / "noms.txt"
+        self.corpus.write_text(
+            "# corpus\nKombucha\n\nTempeh\nzzqx\nLait\nkombucha\n", encoding="utf-8"
+        )
+
+    def _seed(self, *args):
+        out = io.StringIO()
+        with mock.patch(
+            "lists_app.services.section_assigner.call_llm",
+            side_effect=lambda prompt, **k: _batch_answer(prompt, self.SLUGS),
+        ) as llm:
+            call_command("seed_keywords", *args, stdout=out)
+        return out.getvalue(), llm
+
+    def test_seeds_unknown_names_in_batches(self):
+        out, llm = self._seed("--corpus", str(self.corpus), "--batch-size", "2")
+        # "Lait" already has a keyword; duplicates are dropped: 3 names, 2 batches.
+        self.assertEqual(llm.call_count, 2)
+        self.assertIn("2 mots-clés ajoutés", out)
+        reset_local_caches()
+        self.assertEqual(_match_keywords("kombucha"), "boissons")
+        self.assertEqual(_match_keywords("tempeh"), "epicerie")
+        self.assertFalse(SectionKeyword.objects.filter(keyword="zzqx").exists())
+
+    def test_dry_run_and_item_history(self):
+        gl = GroceryList.objects.create(name="Historique")
+        Item.objects.create(
+            grocery_list=gl,
+            name="Tempeh",
+            section=Section.objects.get(name_slug="autre"),
+        )
+        out, llm = self._seed("--from-items", "--dry-run")
+        self.assertEqual(llm.call_count, 1)
+        self.assertIn("tempeh → epicerie", out)
+        self.assertFalse(SectionKeyword.objects.filter(keyword="tempeh").exists())
+
+    def test_insert_counts_only_the_rows_created(self):
+        atomic = keyword_seeding.transaction.atomic
+        raced = []
+
+        def atomic_after_concurrent_insert(*args, **kwargs):
+            if not raced:
+                raced.append(True)
+                # Learned by a live assign_section after the existing-keyword check
+                SectionKeyword.objects.create(
+                    keyword="zzqx soda",
+                    section=Section.objects.get(name_slug="boissons"),
+                )
+            return atomic(*args, **kwargs)
+
+        with mock.patch.object(
+            keyword_seeding.transaction, "atomic", atomic_after_concurrent_insert
+        ):
+            created = keyword_seeding.insert_keywords(
+                {"zzqx soda": "boissons", "zzqx pâte": "epicerie"}
+            )
+        self.assertEqual(created, 1)
+        self.assertTrue(SectionKeyword.objects.filter(keyword="zzqx pâte").exists())
+
+    @override_settings(LLM_API_KEY="")
+    def test_requires_llm(self):
+        with self.assertRaises(CommandError):
+            call_command("seed_keywords", stdout=io.StringIO())
+
+
+class CompactKeywordsTest(TestCase):
+    PAIRS = {
+        "tomate": "fruits_legumes",
+        "tomates cerises bio": "fruits_legumes",
+        "sauce tomate": "epicerie",
+        "sauce tomate basilic": "epicerie",
+        "riz": "epicerie",
+        "au lait": "produits_laitiers_oeufs",
+        "riz au lait": "epicerie",
+        "poulet": "viande_volaille",
+        "poulet rôti": "viande_volaille",
+        "aux herbes": "epicerie",
+        "pommes de terre nouvelle": "fruits_legumes",
+        "pommes de terre nouvelles": "fruits_legumes",
+    }
+
+    def test_only_outcome_preserving_removals(self):
+        removable, kept = plan_compaction(self.PAIRS)
+        self.assertEqual(removable, {"pommes de terre nouvelles"})
+        # Another section's keyword ranks between each of these and its fallback:
+        # "sauce tomate" < "tomates cerises bio", "aux herbes" < "poulet rôti"...
+        self.assertEqual(
+            kept,
+            {
+                "tomates cerises bio",
+                "sauce tomate basilic",
+                "riz au lait",
+                "poulet rôti",
+            },
+        )
+        self._assert_same_sections(
+            self.PAIRS,
+            removable,
+            [
+                *self.PAIRS,
+                "poulet rôti aux herbes",
+                "sauce tomates cerises bio",
+                "pommes de terre nouvelles au riz",
+            ],
+        )
+
+    def test_removal_is_sound_for_unseen_names(self):
+        pairs = {
+            "tomate": "fruits_legumes",
+            "tomates cerises": "fruits_legumes",
+            "ketchup bio": "epicerie",
+        }
+        removable, kept = plan_compaction(pairs)
+        self.assertEqual((removable, kept), (set(), {"tomates cerises"}))
+        self._assert_same_sections(
+            pairs, removable, ["ketchup bio aux tomates cerises"]
+        )
+
+    def _assert_same_sections(self, pairs, removable, texts):
+        before = KeywordMatcher(pairs.items())
+        after = KeywordMatcher((k, v) for k, v in pairs.items() if k not in removable)
+        for text in texts:
+            self.assertEqual(after.match(text), before.match(text), text)
+
+    def test_command_deletes_and_reports(self):
+        fruits = Section.objects.get(name_slug="fruits_legumes")
+        # Longer than any seeded keyword: no other section ranks in between
+        base = "tomate ancienne variété cœur de bœuf"
+        SectionKeyword.objects.create(keyword=base, section=fruits)
+        for suffix in ("s", " bio"):
+            SectionKeyword.objects.create(keyword=base + suffix, section=fruits)
+        count = SectionKeyword.objects.count()
+        out = io.StringIO()
+        call_command("compact_keywords", "--dry-run", stdout=out)
+        self.assertIn(base + " bio", out.getvalue())
+        self.assertEqual(SectionKeyword.objects.count(), count)
+        generation = CacheGeneration.objects.get(key=KEYWORDS).value
+        out = io.StringIO()
+        call_command("compact_keywords", stdout=out)
+        self.assertFalse(
+            SectionKeyword.objects.filter(
+                keyword__in=[base + "s", base + " bio"]
+            ).exists()
+        )
+        # One generation bump for the whole deletion, not one per row
+        self.assertEqual(
+            CacheGeneration.objects.get(key=KEYWORDS).value, generation + 1
+        )
+        self.assertIn("octets", out.getvalue())
+        reset_local_caches()
+        self.assertEqual(_match_keywords(base + " bio"), "fruits_legumes")
+
+
+_real_get_session = llm_client._get_session
+
+
+def _llm_response(status=200, content="epicerie", headers=None):
+    resp = mock.Mock(status_code=status, headers=headers or {})
+    resp.json.return_value = {"choices": [{"message": {"content": content}}]}
+    resp.iter_content.return_value = iter([json.dumps(resp.json.return_value).encode()])
+    if status >= 400:
+        resp.raise_for_status.side_effect = llm_client.requests.HTTPError(
+            str(status), response=resp
+        )
+    return resp
+
+
+@override_settings(LLM_API_KEY="test-key", LLM_MAX_RETRIES=2, LLM_RETRY_BACKOFF=0)
+class LLMClientTest(TestCase):
+    def setUp(self):
+        llm_client.reset_llm_breaker()
+        self.addCleanup(llm_client.reset_llm_breaker)
+        self.session = mock.Mock()
+        patcher = mock.patch.object(
+            llm_client, "_get_session", return_value=self.session
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_session_is_shared(self):
+        with mock.patch.object(llm_client, "_session", None):
+            first = _real_get_session()
+            self.assertIs(_real_get_session(), first)
+            self.assertEqual(
+                first.get_adapter("https://x").poolmanager.connection_pool_kw[
+                    "maxsize"
+                ],
+                10,
+            )
+
+    def test_retries_on_5xx_then_succeeds(self):
+        self.session.post.side_effect = [_llm_response(503), _llm_response(200)]
+        self.assertEqual(llm_client.call_llm("x"), "epicerie")
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_retries_on_connection_error(self):
+        self.session.post.side_effect = [
+            llm_client.requests.ConnectionError("reset"),
+            _llm_response(200, "boissons"),
+        ]
+        self.assertEqual(llm_client.call_llm("x"), "boissons")
+
+    def test_gives_up_after_max_retries(self):
+        self.session.post.side_effect = [_llm_response(429)] * 5
+        self.assertIsNone(llm_client.call_llm("x"))
+        self.assertEqual(self.session.post.call_count, 3)
+
+    def test_client_errors_are_not_retried(self):
+        resp = _llm_response(400)
+        self.session.post.side_effect = [resp]
+        self.assertIsNone(llm_client.call_llm("x"))
+        self.assertEqual(self.session.post.call_count, 1)
+        # Streamed response: its connection goes back to the pool
+        resp.close.assert_called_once()
+
+    @override_settings(LLM_MAX_RETRIES=0, LLM_BREAKER_FAILURE_THRESHOLD=2)
+    def test_breaker_fails_fast_after_consecutive_failures(self):
+        llm_client.reset_llm_breaker()
+        self.session.post.side_effect = llm_client.requests.ConnectionError("down")
+        self.assertIsNone(llm_client.call_llm("x"))
+        self.assertIsNone(llm_client.call_llm("x"))
+        self.assertFalse(llm_client.is_llm_available())
+        self.assertIsNone(llm_client.call_llm("x"))
+        self.assertEqual(self.session.post.call_count, 2)
+        status = llm_client.llm_status()["breaker"]
+        self.assertEqual(status["state"], OPEN)
+        self.assertEqual(status["rejected"], 1)
+
+    @override_settings(LLM_BREAKER_FAILURE_THRESHOLD=1)
+    def test_client_errors_do_not_trip_breaker(self):
+        llm_client.reset_llm_breaker()
+        self.session.post.side_effect = [_llm_response(400)] * 2
+        llm_client.call_llm("x")
+        self.assertTrue(llm_client.is_llm_available())
+
+    def test_retry_after_beyond_deadline_stops(self):
+        self.session.post.side_effect = [
+            _llm_response(503, headers={"Retry-After": "60"}),
+            _llm_response(200),
+        ]
+        self.assertIsNone(llm_client.call_llm("x", timeout=5))
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_deadline_bounds_a_slowly_sent_body(self):
+        def drip():
+            yield b'{"choices": [{"message": '
+            while True:
+                time.sleep(0.05)
+                yield b" "
+
+        resp = _llm_response(200)
+        resp.iter_content.return_value = drip()
+        self.session.post.side_effect = [resp]
+        start = time.monotonic()
+        self.assertIsNone(llm_client.call_llm("x", timeout=0.3))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(self.session.post.call_args.kwargs["stream"])
+        resp.close.assert_called()
+        self.assertEqual(llm_client.llm_status()["breaker"]["failures"], 1)
+
+
+def _httpx_response(status=200, content="epicerie", headers=None):
+    return httpx.Response(
+        status,
+        json={"choices": [{"message": {"content": content}}]},
+        headers=headers,
+        request=httpx.Request("POST", "https://llm.test/v1/chat/completions"),
+    )
+
+
+class AsyncClientLifetimeTest(TestCase):
+    def test_async_client_is_closed_with_its_loop(self):
+        async def run():
+            client = llm_client._get_async_client()
+            self.assertIs(llm_client._get_async_client(), client)
+            return client
+
+        first = asyncio.run(run())
+        self.assertTrue(first.is_closed)
+        second = asyncio.run(run())
+        self.assertIsNot(second, first)
+        self.assertTrue(second.is_closed)
+
+
+@override_settings(LLM_API_KEY="test-key", LLM_MAX_RETRIES=2, LLM_RETRY_BACKOFF=0)
+class AsyncLLMClientTest(TestCase):
+    def setUp(self):
+        llm_client.reset_llm_breaker()
+        self.addCleanup(llm_client.reset_llm_breaker)
+        self.client_mock = mock.Mock()
+        self.client_mock.post = mock.AsyncMock()
+        patcher = mock.patch.object(
+            llm_client, "_get_async_client", return_value=self.client_mock
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_on_5xx_then_succeeds(self):
+        self.client_mock.post.side_effect = [_httpx_response(502), _httpx_response()]
+        self.assertEqual(asyncio.run(llm_client.acall_llm("x")), "epicerie")
+        self.assertEqual(self.client_mock.post.await_count, 2)
+
+    def test_retries_on_connect_error(self):
+        self.client_mock.post.side_effect = [
+            httpx.ConnectError("refused"),
+            _httpx_response(200, "boissons"),
+        ]
+        self.assertEqual(asyncio.run(llm_client.acall_llm("x")), "boissons")
+
+    def test_gives_up_after_max_retries(self):
+        self.client_mock.post.side_effect = [_httpx_response(429)] * 5
+        self.assertIsNone(asyncio.run(llm_client.acall_llm("x")))
+        self.assertEqual(self.client_mock.post.await_count, 3)
+
+    @override_settings(LLM_MAX_RETRIES=0)
+    def test_deadline_bounds_the_whole_call(self):
+        async def post(*args, **kwargs):
+            await asyncio.sleep(5)
+
+        self.client_mock.post.side_effect = post
+        start = time.monotonic()
+        self.assertIsNone(asyncio.run(llm_client.acall_llm("x", timeout=0.2)))
+        self.assertLess(time.monotonic() - start, 1)
+
+    @override_settings(LLM_API_KEY="")
+    def test_no_api_key(self):
+        self.assertIsNone(asyncio.run(llm_client.acall_llm("x")))
+        self.client_mock.post.assert_not_awaited()
+
+
+@override_settings(
+    LLM_API_KEY="test-key",
+    LLM_ENDPOINTS=[
+        {"url": "https://a.test/v1/chat/completions", "model": "m1", "name": "a"},
+        {"url": "https://b.test/v1/chat/completions", "model": "m2", "name": "b"},
+    ],
+    LLM_HEDGE_DELAY=0.05,
+    LLM_MAX_RETRIES=1,
+    LLM_RETRY_BACKOFF=0,
+)
+class HedgedLLMTest(TestCase):
+    def setUp(self):
+        llm_client.reset_llm_breaker()
+        self.addCleanup(llm_client.reset_llm_breaker)
+
+    def _patch(self, name, mock_obj):
+        patcher = mock.patch.object(llm_client, name, return_value=mock_obj)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_slow_endpoint_is_hedged_and_abandoned(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def post(url, **kwargs):
+            if url.startswith("https://a.test"):
+                release.wait(2)
+                return _llm_response(503)
+            self.assertEqual(kwargs["json"]["model"], "m2")
+            return _llm_response(200, "boissons")
+
+        session = mock.Mock()
+        session.post.side_effect = post
+        self._patch("_get_session", session)
+        start = time.monotonic()
+        self.assertEqual(llm_client.call_llm("x"), "boissons")
+        self.assertLess(time.monotonic() - start, 1)
+        release.set()
+        threading.Event().wait(0.1)
+        # The loser stops retrying and is not counted as a failure.
+        urls = [c.args[0] for c in session.post.call_args_list]
+        self.assertEqual(urls.count("https://a.test/v1/chat/completions"), 1)
+        primary, secondary = llm_client.llm_status()["endpoints"]
+        self.assertEqual(primary["breaker"]["failures"], 0)
+        self.assertEqual(secondary["latency"]["samples"], 1)
+
+    @override_settings(LLM_HEDGE_PERCENTILE=0, LLM_MAX_RETRIES=0)
+    def test_failed_endpoint_falls_over_without_hedging(self):
+        session = mock.Mock()
+        session.post.side_effect = [
+            llm_client.requests.ConnectionError("down"),
+            _llm_response(200, "surgeles"),
+        ]
+        self._patch("_get_session", session)
+        self.assertEqual(llm_client.call_llm("x"), "surgeles")
+        self.assertEqual(session.post.call_count, 2)
+
+    @override_settings(LLM_HEDGE_PERCENTILE=0, LLM_MAX_RETRIES=0)
+    def test_rejected_call_closes_its_response(self):
+        rejected = _llm_response(401)
+        session = mock.Mock()
+        session.post.side_effect = [rejected, _llm_response(200, "surgeles")]
+        self._patch("_get_session", session)
+        self.assertEqual(llm_client.call_llm("x"), "surgeles")
+        rejected.close.assert_called_once()
+
+    def test_hedge_delay_follows_latency_percentile(self):
+        primary = llm_client.get_llm_endpoints()[0]
+        self.assertEqual(primary.hedge_delay(), 0.05)
+        for ms in range(1, 41):
+            primary.latency.record(ms / 100)
+        with override_settings(LLM_HEDGE_PERCENTILE=90):
+            self.assertEqual(primary.hedge_delay(), 0.36)
+        with override_settings(LLM_HEDGE_PERCENTILE=0):
+            self.assertEqual(primary.hedge_delay(), math.inf)
+
+    def test_async_loser_is_cancelled(self):
+        cancelled = []
+
+        async def post(url, **kwargs):
+            if url.startswith("https://a.test"):
+                try:
+                    await asyncio.sleep(2)
+                except asyncio.CancelledError:
+                    cancelled.append(url)
+                    raise
+            return _httpx_response(200, "hygiene_maison")
+
+        client = mock.Mock()
+        client.post = mock.AsyncMock(side_effect=post)
+        self._patch("_get_async_client", client)
+
+        async def run():
+            content = await llm_client.acall_llm("x")
+            await asyncio.sleep(0)
+            return content
+
+        self.assertEqual(asyncio.run(run()), "hygiene_maison")
+        self.assertEqual(cancelled, ["https://a.test/v1/chat/completions"])
+
+
+class JsonArrayStreamTest(TestCase):
+    def test_elements_are_emitted_as_soon_as_complete(self):
+        text = (
+            '```json\n[{"name": "Oeufs", "quantity": "4"}, '
+            '{"name": "Sel, \\"fin\\" {x}", "quantity": ""}, {"a": [1, {"b": 2}]}]\n```'
+        )
+        parser = JsonArrayStream()
+        emitted = []
+        for i, ch in enumerate(text):
+            for element in parser.feed(ch):
+                emitted.append((i, element))
+        self.assertEqual(
+            [e for _, e in emitted],
+            [
+                {"name": "Oeufs", "quantity": "4"},
+                {"name": 'Sel, "fin" {x}', "quantity": ""},
+                {"a": [1, {"b": 2}]},
+            ],
+        )
+        # The first item is available long before the array ends.
+        self.assertEqual(emitted[0][0], text.index("},"))
+        self.assertTrue(parser.done)
+
+    def test_invalid_element_is_skipped(self):
+        parser = JsonArrayStream()
+        self.assertEqual(
+            parser.feed('[{"a": 1}, {oops}, {"b": 2}]'), [{"a": 1}, {"b": 2}]
+        )
+
+
+def _import_answer_for(prompt):
+    """Fake LLM import answer: one item per numbered pasted line, named after the line."""
+    pasted = prompt.split("(lignes numérotées) :\n", 1)[1]
+    answer = []
+    for numbered in pasted.splitlines():
+        n, line = numbered.split(". ", 1)
+        answer.append({"name": line.title(), "quantity": "", "line": int(n)})
+    return json.dumps(answer)
+
+
+@override_settings(
+    LLM_API_KEY="test-key", LLM_IMPORT_CHUNK_LENGTH=200, IMPORT_LOCAL_PARSER=False
+)
+class ChunkedImportTest(TestCase):
+    def test_split_on_line_boundaries_without_truncation(self):
+        lines = [f"article numero {i}" for i in range(100)]
+        chunks = split_import_text("\n".join(lines) + "\n\n")
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= 200 for c in chunks))
+        self.assertEqual("\n".join(chunks).splitlines(), lines)
+
+    def test_long_line_is_cut(self):
+        self.assertEqual(split_import_text("x" * 500), ["x" * 200])
+
+    def test_chunks_run_concurrently_and_merge_in_order(self):
+        lines = [f"article {i:03d}" for i in range(60)]
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_call_llm(prompt, **kwargs):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            threading.Event().wait(0.02)
+            with lock:
+                active.pop()
+            return _import_answer_for(prompt)
+
+        with (
+            override_settings(LLM_IMPORT_MAX_PARALLEL=3),
+            mock.patch(
+                "lists_app.services.import_normalizer.call_llm",
+                side_effect=fake_call_llm,
+            ) as llm,
+        ):
+            items = normalize_import_with_llm("\n".join(lines))
+        self.assertGreater(llm.call_count, 3)
+        self.assertLessEqual(max(peak), 3)
+        self.assertGreater(max(peak), 1)
+        self.assertEqual([it["name"] for it in items], [ln.title() for ln in lines])
+
+    def test_failed_chunk_keeps_the_other_chunks_uncached(self):
+        lines = [f"article {i:03d}" for i in range(30)]
+
+        def answer(prompt, **kwargs):
+            return None if "article 000" in prompt else _import_answer_for(prompt)
+
+        with mock.patch(
+            "lists_app.services.import_normalizer.call_llm", side_effect=answer
+        ) as llm:
+            items = normalize_import_with_llm("\n".join(lines))
+            calls = llm.call_count
+            self.assertGreater(calls, 1)
+            names = [it["name"] for it in items]
+            self.assertTrue(names)
+            self.assertEqual(names, [ln.title() for ln in lines[-len(names) :]])
+            # Partial result: not cached, the next paste asks again
+            normalize_import_with_llm("\n".join(lines))
+            self.assertEqual(llm.call_count, 2 * calls)
+
+    def test_closed_stream_stops_the_chunk_threads(self):
+        closed = threading.Event()
+
+        def fake_stream(prompt, **kwargs):
+            try:
+                yield '[{"name": "Lait", "quantity": "", "section_slug": null},'
+                for _ in range(500):
+                    time.sleep(0.01)
+                    yield " "
+            finally:
+                closed.set()
+
+        with mock.patch(
+            "lists_app.services.import_normalizer.stream_llm", side_effect=fake_stream
+        ):
+            stream = stream_import_with_llm("lait")
+            self.assertEqual(next(stream)["name"], "Lait")
+            stream.close()
+            self.assertTrue(closed.wait(1))
+
+    def test_stream_yields_in_paste_order(self):
+        lines = [f"article {i:03d}" for i in range(40)]
+
+        def fake_stream(prompt, **kwargs):
+            answer = _import_answer_for(prompt)
+            if "article 000" in prompt:
+                # First chunk is the slowest: later chunks must wait for it.
+                threading.Event().wait(0.05)
+            yield answer
+
+        with mock.patch(
+            "lists_app.services.import_normalizer.stream_llm", side_effect=fake_stream
+        ):
+            items = list(stream_import_with_llm("\n".join(lines)))
+        self.assertEqual([it["name"] for it in items], [ln.title() for ln in lines])
+
+    @override_settings(IMPORT_LOCAL_PARSER=True, IMPORT_CACHE_TTL=0)
+    def test_stream_interleaves_local_lines_in_paste_order(self):
+        def fake_stream(prompt, **kwargs):
+            yield _import_answer_for(prompt)
+
+        with mock.patch(
+            "lists_app.services.import_normalizer.stream_llm", side_effect=fake_stream
+        ):
+            items = list(
+                stream_import_with_llm(
+                    "2 oeufs\nsel et poivre\nLait 1 l\nhuile d olive"
+                )
+            )
+        self.assertEqual(
+            [it["name"] for it in items],
+            ["Oeufs", "Sel Et Poivre", "Lait", "Huile D Olive"],
+        )
+
+
+@override_settings(
+    LLM_API_KEY="test-key", IMPORT_CACHE_TTL=0, IMPORT_LOCAL_PARSER=False
+)
+class ImportLineTest(TestCase):
+    def test_line_pattern(self):
+        self.assertEqual(
+            line_pattern("- Farine  T55 : 500 g"), ("farine t# : # g", ["55", "500"])
+        )
+
+    def test_quantity_template(self):
+        self.assertEqual(quantity_template("500 g", ["55", "500"]), None)
+        self.assertEqual(quantity_template("500 g", ["500"]), "{0} g")
+        self.assertEqual(quantity_template("2 x 2", ["2", "2"]), "{0} x {1}")
+        self.assertIsNone(quantity_template("1 kg", ["1000"]))
+
+    def test_known_lines_skip_llm_and_keep_order(self):
+        prompts = []
+
+        def fake_call_llm(prompt, **kwargs):
+            prompts.append(prompt)
+            pasted = prompt.split("(lignes numérotées) :\n", 1)[1]
+            answer = []
+            for numbered in pasted.splitlines():
+                n, line = numbered.split(". ", 1)
+                if "olive" in line:
+                    item = {"name": "Huile d'olive", "quantity": "50 cl"}
+                elif "sel et poivre" in line:
+                    answer.append({"name": "Sel", "quantity": "", "line": int(n)})
+                    item = {"name": "Poivre", "quantity": ""}
+                else:
+                    item = {"name": line.title(), "quantity": ""}
+                answer.append({**item, "section_slug": "epicerie", "line": int(n)})
+            return json.dumps(answer)
+
+        with mock.patch(
+            "lists_app.services.import_normalizer.call_llm", side_effect=fake_call_llm
+        ):
+            normalize_import_with_llm("- Huile d olive 50 cl\nsel et poivre")
+            self.assertEqual(
+                set(ImportLine.objects.values_list("pattern", flat=True)),
+                {"huile d olive # cl"},
+            )
+            items = normalize_import_with_llm(
+                "Farine\nHuile d olive 75 cl\nsel et poivre"
+            )
+        self.assertEqual(
+            [(it["name"], it["quantity"]) for it in items],
+            [("Farine", ""), ("Huile d'olive", "75 cl"), ("Sel", ""), ("Poivre", "")],
+        )
+        self.assertTrue(prompts[-1].endswith(":\n1. Farine\n2. sel et poivre"))
+        self.assertEqual(ImportLine.objects.get(pattern="huile d olive # cl").hits, 1)
+
+
+class ImportParserTest(TestCase):
+    def _parse(self, text):
+        lines = text.splitlines()
+        parsed = parse_import_lines(lines, get_section_registry())
+        return [parsed.get(i) for i in range(len(lines))]
+
+    def test_quantity_forms(self):
+        parsed = self._parse(
+            "- 2 oeufs\n500 g de farine\nBeurre : 250g\nlait x2\n"
+            "Crème (20 cl)\n1 kg d'oranges\nSucre 1,5 kg\nSel\n- 2 x yaourts\n"
+            "pomme de terre"
+        )
+        self.assertEqual(
+            [(p[0]["name"], p[0]["quantity"]) for p in parsed],
+            [
+                ("Oeufs", "2"),
+                ("Farine", "500 g"),
+                ("Beurre", "250g"),
+                ("Lait", "2"),
+                ("Crème", "20 cl"),
+                ("Oranges", "1 kg"),
+                ("Sucre", "1,5 kg"),
+                ("Sel", ""),
+                ("Yaourts", "2"),
+                ("Pomme de terre", ""),
+            ],
+        )
+
+    def test_sections_and_headers(self):
+        parsed = self._parse(
+            "epicerie: Pâtes\nBoissons :\nLimonade\nPour la pâte :\nFarine"
+        )
+        self.assertEqual(parsed[0][0]["section_slug"], "epicerie")
+        self.assertEqual(parsed[1], [])
+        self.assertEqual(parsed[2][0]["section_slug"], "boissons")
+        self.assertIsNone(parsed[3])
+        self.assertIsNone(parsed[4][0]["section_slug"])
+
+    @override_settings(LLM_API_KEY="test-key", IMPORT_CACHE_TTL=0)
+    def test_header_is_a_hint_for_mixed_sections(self):
+        clear_local_classification_cache()
+        with mock.patch(
+            "lists_app.services.import_normalizer.call_llm",
+            side_effect=lambda prompt, **k: _import_answer_for(prompt),
+        ):
+            items = normalize_import_with_llm(
+                "Boissons :\nLimonade\nlait x2\nbeurre (250 g)\nSel\n"
+                "Zzqx\nsel et poivre"
+            )
+        self.assertEqual(
+            [(it["name"], it["section_slug"]) for it in items],
+            [
+                ("Limonade", "boissons"),
+                ("Lait", _match_keywords("lait")),
+                ("Beurre", _match_keywords("beurre")),
+                ("Sel", _match_keywords("sel")),
+                ("Zzqx", "boissons"),
+                ("Sel Et Poivre", "boissons"),
+            ],
+        )
+        self.assertNotIn("boissons", [it["section_slug"] for it in items[1:4]])
+
+    def test_ambiguous_lines_are_left_to_the_llm(self):
+        self.assertEqual(
+            self._parse(
+                "sel et poivre\nFarine T55 1 kg\nCrème (bio)\n2 x 3 yaourts\n"
+                "Huile d olive\nViande hachée de bœuf"
+            ),
+            [None] * 6,
+        )
+
+    @override_settings(LLM_API_KEY="test-key", IMPORT_CACHE_TTL=0)
+    def test_only_ambiguous_lines_reach_the_llm(self):
+        with mock.patch(
+            "lists_app.services.import_normalizer.call_llm",
+            side_effect=lambda prompt, **k: _import_answer_for(prompt),
+        ) as llm:
+            items = normalize_import_with_llm("2 oeufs\nsel et poivre\nLait 1 l")
+        self.assertEqual(llm.call_count, 1)
+        self.assertTrue(llm.call_args.args[0].endswith(":\n1. sel et poivre"))
+        self.assertEqual(
+            [it["name"] for it in items], ["Oeufs", "Sel Et Poivre", "Lait"]
+        )
+
+    @override_settings(LLM_API_KEY="", SECRET_URL_AUTH_REQUIRED=False)
+    def test_well_formed_paste_imports_without_llm(self):
+        gl = GroceryList.objects.create(name="Import")
+        response = self.client.post(
+            f"/api/lists/{gl.id}/parse-import/",
+            data=json.dumps({"text": "2 oeufs\nfarine : 500 g"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(it["name"], it["quantity"]) for it in response.json()["items"]],
+            [("Oeufs", "2"), ("Farine", "500 g")],
+        )
+        self.assertEqual(
+            normalize_import_with_llm("2 oeufs\nsel et poivre"),
+            [],
+        )
+
+    @override_settings(
+        LLM_API_KEY="test-key", SECRET_URL_AUTH_REQUIRED=False, IMPORT_CACHE_TTL=0
+    )
+    def test_parse_import_classifies_unknown_items_in_one_llm_call(self):
+        llm_client.reset_llm_breaker()
+        self.addCleanup(llm_client.reset_llm_breaker)
+        clear_local_classification_cache()
+        gl = GroceryList.objects.create(name="Import")
+        with (
+            mock.patch(
+                "lists_app.services.import_normalizer.call_llm",
+                side_effect=lambda prompt, **k: _import_answer_for(prompt),
+            ),
+            mock.patch(
+                "lists_app.services.section_assigner.call_llm",
+                return_value='{"1": "epicerie", "2": "boissons"}',
+            ) as classify,
+        ):
+            response = self.client.post(
+                f"/api/lists/{gl.id}/parse-import/",
+                data=json.dumps({"text": "zorblax\nquibbleade"}),
+                content_type="application/json",
+            )
+        self.assertEqual(
+            [it["section_slug"] for it in response.json()["items"]],
+            ["epicerie", "boissons"],
+        )
+        classify.assert_called_once()
+
+
+@override_settings(LLM_API_KEY="test-key", IMPORT_LOCAL_PARSER=False)
+class ImportCacheTest(TestCase):
+    def _normalize(self, text):
+        with mock.patch(
+            "lists_app.services.import_normalizer.call_llm",
+            side_effect=lambda prompt, **k: _import_answer_for(prompt),
+        ) as llm:
+            items = normalize_import_with_llm(text)
+        return items, llm.call_count
+
+    def test_repeated_paste_skips_llm(self):
+        items, calls = self._normalize("Oeufs\nFarine")
+        self.assertEqual(calls, 1)
+        again, calls = self._normalize("  oeufs \n\n FARINE  ")
+        self.assertEqual(calls, 0)
+        self.assertEqual(again, items)
+
+    def test_section_change_drops_cache(self):
+        # Names with digits are never learned as import lines: only the cache applies.
+        self._normalize("Article 1")
+        self.assertEqual(ImportNormalization.objects.count(), 1)
+        section = Section.objects.get(name_slug="epicerie")
+        section.label_fr = "Épicerie salée"
+        section.save()
+        self.assertEqual(ImportNormalization.objects.count(), 0)
+        reset_local_caches()
+        _, calls = self._normalize("Article 1")
+        self.assertEqual(calls, 1)
+
+    @override_settings(IMPORT_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_is_evicted(self):
+        cache_import("a", [{"name": "A"}])
+        cache_import("b", [{"name": "B"}])
+        ImportNormalization.objects.filter(key="a").update(
+            last_used_at=timezone.now() - timedelta(hours=1)
+        )
+        ImportNormalization.objects.filter(key="b").update(
+            last_used_at=timezone.now() - timedelta(hours=2)
+        )
+        self.assertIsNotNone(get_cached_import("b"))
+        cache_import("c", [{"name": "C"}])
+        self.assertEqual(
+            set(ImportNormalization.objects.values_list("key", flat=True)), {"b", "c"}
+        )
+
+    def test_expired_entry_is_a_miss(self):
+        cache_import("a", [{"name": "A"}])
+        ImportNormalization.objects.update(expires_at=timezone.now())
+        self.assertIsNone(get_cached_import("a"))
+
+    def test_stream_uses_cache_and_skips_incomplete_results(self):
+        with mock.patch(
+            "lists_app.services.import_normalizer.stream_llm",
+            return_value=iter(['[{"name": "Oeufs"}']),
+        ):
+            self.assertEqual(len(list(stream_import_with_llm("Oeufs"))), 1)
+        self.assertFalse(ImportNormalization.objects.exists())
+        with mock.patch(
+            "lists_app.services.import_normalizer.stream_llm",
+            return_value=iter(['[{"name": "Oeufs"}]']),
+        ):
+            list(stream_import_with_llm("Oeufs"))
+        with mock.patch("lists_app.services.import_normalizer.stream_llm") as stream:
+            items = list(stream_import_with_llm("oeufs"))
+        stream.assert_not_called()
+        self.assertEqual(items[0]["name"], "Oeufs")
+
+
+def _sse_lines(*deltas):
+    lines = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": d}}]}) for d in deltas
+    ]
+    return [": keep-alive", *lines, "", "data: [DONE]"]
+
+
+class _LLMStreamMixin:
+    def setUp(self):
+        llm_client.reset_llm_breaker()
+        self.addCleanup(llm_client.reset_llm_breaker)
+        self.session = mock.Mock()
+        patcher = mock.patch.object(
+            llm_client, "_get_session", return_value=self.session
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _stream(self, *deltas):
+        resp = mock.Mock(status_code=200, headers={}, encoding=None)
+        resp.iter_lines.return_value = iter(_sse_lines(*deltas))
+        self.session.post.return_value = resp
+        return resp
+
+
+@override_settings(
+    LLM_API_KEY="test-key", SECRET_URL_AUTH_REQUIRED=False, IMPORT_LOCAL_PARSER=False
+)
+class StreamingImportTest(_LLMStreamMixin, TestCase):
+    def test_stream_llm_yields_deltas(self):
+        resp = self._stream("[{", '"name"', "}]")
+        self.assertEqual(list(llm_client.stream_llm("x")), ["[{", '"name"', "}]"])
+        self.assertTrue(self.session.post.call_args.kwargs["stream"])
+        self.assertTrue(self.session.post.call_args.kwargs["json"]["stream"])
+        resp.close.assert_called_once()
+
+    def test_stream_import_yields_items(self):
+        self._stream(
+            '[{"name": "Pâtes", "quantity": "500 g", ',
+            '"section_slug": "epicerie"}, {"name": "Tru',
+            'c", "section_slug": "inconnu"}]',
+        )
+        items = list(stream_import_with_llm("pates 500g\ntruc"))
+        self.assertEqual(
+            items,
+            [
+                {"name": "Pâtes", "quantity": "500 g", "section_slug": "epicerie"},
+                {"name": "Truc", "quantity": "", "section_slug": None},
+            ],
+        )
+
+
+@override_settings(
+    LLM_API_KEY="test-key", SECRET_URL_AUTH_REQUIRED=False, IMPORT_LOCAL_PARSER=False
+)
+class StreamingImportAsgiTest(_LLMStreamMixin, TransactionTestCase):
+    serialized_rollback = True
+
+    def _asgi_stream(self, path, body, on_line=None):
+        """
+        NDJSON lines of a POST served by the ASGI application (as under daphne), read
+        body message by body message; on_line(line) is called as each one arrives.
+        """
+        from grocery_project.asgi import application
+
+        async def run():
+            communicator = HttpCommunicator(
+                application,
+                "POST",
+                path,
+                body=json.dumps(body).encode(),
+                headers=[
+                    (b"host", b"testserver"),
+                    (b"content-type", b"application/json"),
+                ],
+            )
+            await communicator.send_input(
+                {"type": "http.request", "body": communicator.body}
+            )
+            start = await communicator.receive_output(timeout=5)
+            headers = dict(start["headers"])
+            lines, more = [], True
+            while more:
+                message = await communicator.receive_output(timeout=2)
+                more = message.get("more_body", False)
+                for line in message.get("body", b"").decode().splitlines():
+                    lines.append(json.loads(line))
+                    if on_line:
+                        on_line(lines[-1])
+            await communicator.wait()
+            return headers, lines
+
+        return asyncio.run(run())
+
+    def test_parse_import_stream_endpoint(self):
+        self._stream('[{"name": "Lait", "quantity": "1 L", "section_slug": null}', "]")
+        gl = GroceryList.objects.create(name="Stream")
+        headers, lines = self._asgi_stream(
+            f"/api/lists/{gl.id}/parse-import/", {"text": "lait 1L", "stream": True}
+        )
+        self.assertEqual(headers[b"Content-Type"], b"application/x-ndjson")
+        self.assertEqual(lines[0]["item"]["name"], "Lait")
+        # Missing section resolved locally (keywords)
+        self.assertEqual(lines[0]["item"]["section_slug"], "produits_laitiers_oeufs")
+        self.assertEqual(lines[-1], {"done": True, "count": 1})
+
+    def test_parse_import_stream_sends_items_before_the_llm_finishes(self):
+        first_sent = threading.Event()
+
+        def fake_stream(prompt, **kwargs):
+            yield '[{"name": "Lait", "quantity": "1 L", "section_slug": null},'
+            # Blocks until the client got the first item: a buffered body never does.
+            self.assertTrue(first_sent.wait(5))
+            yield '{"name": "Pain", "quantity": "", "section_slug": null}]'
+
+        gl = GroceryList.objects.create(name="Stream")
+        with mock.patch(
+            "lists_app.services.import_normalizer.stream_llm", side_effect=fake_stream
+        ):
+            _, lines = self._asgi_stream(
+                f"/api/lists/{gl.id}/parse-import/",
+                {"text": "lait 1L\npain", "stream": True},
+                on_line=lambda line: first_sent.set(),
+            )
+        self.assertEqual(
+            [line["item"]["name"] for line in lines[:-1]], ["Lait", "Pain"]
+        )
+        self.assertEqual(lines[-1], {"done": True, "count": 2})
+
+    def test_parse_import_stream_classifies_unknown_items_in_one_llm_call(self):
+        self._stream(
+            '[{"name": "Zorblax", "quantity": "", "section_slug": null},',
+            '{"name": "Lait", "quantity": "1 L", "section_slug": null},',
+            '{"name": "Quibbleade", "quantity": "", "section_slug": null}]',
+        )
+        clear_local_classification_cache()
+        gl = GroceryList.objects.create(name="Stream")
+        with mock.patch(
+            "lists_app.services.section_assigner.call_llm",
+            return_value='{"1": "epicerie", "2": "boissons"}',
+        ) as classify:
+            _, lines = self._asgi_stream(
+                f"/api/lists/{gl.id}/parse-import/",
+                {"text": "zorblax\nlait 1L\nquibbleade", "stream": True},
+            )
+        # Keyword hits stream at once; the others follow the batched classification
+        self.assertEqual(
+            [
+                (line["item"]["name"], line["item"]["section_slug"])
+                for line in lines[:-1]
+            ],
+            [
+                ("Lait", "produits_laitiers_oeufs"),
+                ("Zorblax", "epicerie"),
+                ("Quibbleade", "boissons"),
+            ],
+        )
+        classify.assert_called_once()
+
+    def test_parse_import_stream_reports_unavailable_llm(self):
+        self.session.post.side_effect = llm_client.requests.ConnectionError("down")
+        gl = GroceryList.objects.create(name="Stream")
+        with override_settings(LLM_MAX_RETRIES=0):
+            _, lines = self._asgi_stream(
+                f"/api/lists/{gl.id}/parse-import/", {"text": "lait", "stream": True}
+            )
+        self.assertEqual(lines[0]["error"], "llm_unavailable")
+        self.assertEqual(lines[-1], {"done": True, "count": 0})
+
+
+class CircuitBreakerTest(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch(
+            "lists_app.services.circuit_breaker.time.monotonic",
+            side_effect=lambda: self.now,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test", failure_threshold=3, cooldown=30)
+
+    def _trip(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self._trip()
+        self.assertEqual(self.breaker.snapshot()["state"], OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertTrue(self.breaker.is_open())
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot["trips"], 1)
+        self.assertEqual(snapshot["rejected"], 1)
+        self.assertEqual(snapshot["retry_in"], 30)
+
+    def test_half_open_probe_success_closes(self):
+        self._trip()
+        self.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.snapshot()["state"], HALF_OPEN)
+        # Only one probe at a time
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.snapshot()["state"], CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_probe_failure_reopens(self):
+        self._trip()
+        self.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot["state"], OPEN)
+        self.assertEqual(snapshot["trips"], 2)
+
+    def test_release_frees_probe_slot(self):
+        self._trip()
+        self.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow())
+
+
+@override_settings(LLM_API_KEY="test-key", LLM_BREAKER_FAILURE_THRESHOLD=1)
+class LLMOutageTest(TestCase):
+    def setUp(self):
+        clear_local_classification_cache()
+        llm_client.reset_llm_breaker()
+        self.addCleanup(llm_client.reset_llm_breaker)
+        llm_client._get_breaker().record_failure()
+
+    def test_assign_section_skips_llm_without_caching_miss(self):
+        with mock.patch("lists_app.services.section_assigner._call_llm") as call:
+            section = assign_section("Sarrasin")
+        call.assert_not_called()
+        self.assertEqual(section.name_slug, "autre")
+        self.assertEqual(get_cached_classification("sarrasin"), (False, None))
+
+    def test_batch_assignment_skips_llm(self):
+        with mock.patch(
+            "lists_app.services.section_assigner._call_llm_batch"
+        ) as call_batch:
+            result = assign_sections_batch(["Sarrasin", "Lait"])
+        call_batch.assert_not_called()
+        self.assertEqual(result, {"sarrasin": None, "lait": "produits_laitiers_oeufs"})
+        self.assertFalse(LLMClassification.objects.exists())
+
+    def test_import_normalization_falls_back_without_calling_llm(self):
+        text = "Zzqx truc bidule machin chose\nBlorf qwix zapotte frumble"
+        with (
+            mock.patch("lists_app.services.import_normalizer.call_llm") as call,
+            mock.patch("lists_app.services.import_normalizer.stream_llm") as stream,
+        ):
+            self.assertEqual(normalize_import_with_llm(text), [])
+            self.assertEqual(list(stream_import_with_llm(text)), [])
+        call.assert_not_called()
+        stream.assert_not_called()
+
+    @override_settings(SECRET_URL_AUTH_REQUIRED=False)
+    def test_llm_status_endpoint(self):
+        response = self.client.get("/api/llm-status/")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["configured"])
+        self.assertEqual(data["breaker"]["state"], OPEN)
+        self.assertEqual(data["breaker"]["failures"], 1)
+
+
 class GateViewTest(TestCase):
     """Tests for /enter/<token>/ (secret URL gate)."""
 
@@ -397,6 +2194,107 @@ class WebSocketTest(TestCase):
         connected = asyncio.run(run())
         self.assertFalse(connected)
 
+    @override_settings(LLM_API_KEY="test-key")
+    def test_add_item_to_missing_list_skips_classification(self):
+        acall = mock.AsyncMock(return_value="epicerie")
+        with mock.patch("lists_app.consumers.aassign_section", acall):
+            result = async_to_sync(consumers.ws_add_item)(uuid.uuid4(), "Sarrasin")
+        self.assertEqual(result, (None, None))
+        acall.assert_not_awaited()
+
+
+@override_settings(LLM_API_KEY="test-key")
+class ProvisionalSectionTest(TestCase):
+    def setUp(self):
+        clear_local_classification_cache()
+        self.grocery_list = GroceryList.objects.create(name="Test")
+
+    def test_unknown_name_goes_to_provisional_section(self):
+        with mock.patch("lists_app.services.section_assigner._call_llm") as llm:
+            item = item_svc.create_item(
+                self.grocery_list, "Sarrasin", defer_classification=True
+            )
+        llm.assert_not_called()
+        self.assertEqual(item["section_slug"], "autre")
+        self.assertTrue(item["section_pending"])
+
+    def test_keyword_hit_is_not_deferred(self):
+        item = item_svc.create_item(
+            self.grocery_list, "Lait", defer_classification=True
+        )
+        self.assertEqual(item["section_slug"], "produits_laitiers_oeufs")
+        self.assertNotIn("section_pending", item)
+
+    def test_reclassify_moves_item(self):
+        item = item_svc.create_item(
+            self.grocery_list, "Sarrasin", defer_classification=True
+        )
+        with mock.patch(
+            "lists_app.services.section_assigner._acall_llm",
+            mock.AsyncMock(return_value="epicerie"),
+        ):
+            moved = async_to_sync(consumers.ws_reclassify_item)(
+                self.grocery_list.id, item["id"]
+            )
+        self.assertEqual(moved["section_slug"], "epicerie")
+        self.assertEqual(Item.objects.get(pk=item["id"]).section.name_slug, "epicerie")
+
+    def test_reclassify_leaves_manually_moved_item(self):
+        item = item_svc.create_item(
+            self.grocery_list, "Sarrasin", defer_classification=True
+        )
+        boissons = Section.objects.get(name_slug="boissons")
+        Item.objects.filter(pk=item["id"]).update(section=boissons)
+        with mock.patch(
+            "lists_app.services.section_assigner._acall_llm",
+            mock.AsyncMock(return_value="epicerie"),
+        ):
+            self.assertIsNone(
+                async_to_sync(consumers.ws_reclassify_item)(
+                    self.grocery_list.id, item["id"]
+                )
+            )
+        self.assertEqual(Item.objects.get(pk=item["id"]).section, boissons)
+
+
+@override_settings(
+    SECRET_URL_AUTH_REQUIRED=False,
+    PROVISIONAL_SECTION_ASSIGNMENT=True,
+    LLM_API_KEY="test-key",
+)
+class ProvisionalSectionWebSocketTest(TransactionTestCase):
+    serialized_rollback = True
+
+    def test_item_added_then_item_updated(self):
+        from grocery_project.asgi import application as ws_application
+
+        clear_local_classification_cache()
+        gl = GroceryList.objects.create(name="WS")
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                ws_application,
+                f"/ws/list/{gl.id}/",
+                headers=[(b"origin", b"http://localhost")],
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.send_json_to({"action": "add_item", "name": "Sarrasin"})
+            added = await communicator.receive_json_from(timeout=5)
+            updated = await communicator.receive_json_from(timeout=5)
+            await communicator.disconnect()
+            return added, updated
+
+        with mock.patch(
+            "lists_app.services.section_assigner._acall_llm",
+            mock.AsyncMock(return_value="epicerie"),
+        ):
+            added, updated = asyncio.run(run())
+        self.assertEqual(added["action"], "item_added")
+        self.assertEqual(added["item"]["section_slug"], "autre")
+        self.assertEqual(updated["action"], "item_updated")
+        self.assertEqual(updated["item"]["section_slug"], "epicerie")
+
 
 QUITOQUE_HTML_FRAGMENT = """
 <div id="ingredients-recipe">
@@ -444,6 +2342,328 @@ class QuitoqueParserTest(TestCase):
         self.assertEqual(ctx.exception.status_hint, 400)
 
 
+class _FakeElement:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def clear(self):
+        pass
+
+    def send_keys(self, value):
+        pass
+
+    def submit(self):
+        self.driver.logins += 1
+        self.driver.expired = False
+        self.driver.current_url = "https://www.quitoque.fr/"
+
+
+class _FakeFirefox:
+    """Stands in for webdriver.Firefox: recipe pages redirect to /login when expired."""
+
+    def __init__(self):
+        self.current_url = "about:blank"
+        self.page_source = QUITOQUE_HTML_FRAGMENT
+        self.visits = []
+        self.logins = 0
+        self.expired = False
+        self.quit_called = False
+        self.capabilities = {}
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    def get(self, url):
+        self.visits.append(url)
+        if self.expired and not url.endswith("/login"):
+            url = "https://www.quitoque.fr/login"
+        self.current_url = url
+
+    def find_element(self, by, value):
+        return _FakeElement(self)
+
+    def get_cookies(self):
+        return [{"name": "PHPSESSID", "value": "s1", "domain": ".quitoque.fr"}]
+
+    def quit(self):
+        self.quit_called = True
+
+
+class DriverPoolTest(TestCase):
+    def _pool(self, **kwargs):
+        self.created = []
+
+        def create():
+            driver = mock.Mock()
+            self.created.append(driver)
+            return driver
+
+        pool = DriverPool("test", create, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_reuses_driver_until_max_uses(self):
+        pool = self._pool(max_uses=2)
+        for _ in range(3):
+            with pool.driver(timeout=1):
+                pass
+        self.assertEqual(len(self.created), 2)
+        self.created[0].quit.assert_called_once()
+        self.assertEqual(pool.snapshot()["recycled"], 1)
+
+    def test_replaces_dead_or_broken_driver(self):
+        pool = self._pool()
+        with pool.driver(timeout=1) as pooled:
+            pass
+        type(pooled.driver).current_url = mock.PropertyMock(
+            side_effect=RuntimeError("browser gone")
+        )
+        with pool.driver(timeout=1) as pooled:
+            pooled.broken = True
+        with pool.driver(timeout=1):
+            pass
+        self.assertEqual(len(self.created), 3)
+        self.assertEqual(pool.snapshot()["discarded"], 2)
+
+    def test_bounded_size(self):
+        pool = self._pool(size=1)
+        with pool.driver(timeout=1):
+            with self.assertRaises(DriverPoolTimeout):
+                with pool.driver(timeout=0.05):
+                    pass
+        self.assertEqual(len(self.created), 1)
+
+    def test_close_quits_idle_drivers(self):
+        pool = self._pool(size=2)
+        with pool.driver(timeout=1), pool.driver(timeout=1):
+            pass
+        pool.close()
+        for driver in self.created:
+            driver.quit.assert_called_once()
+        self.assertEqual(pool.snapshot()["drivers"], 0)
+
+    def test_recycles_on_memory_growth(self):
+        pool = self._pool(max_rss_growth_mb=100)
+        with mock.patch(
+            "lists_app.services.driver_pool.process_tree_rss",
+            side_effect=[500 * 2**20, 650 * 2**20],
+        ):
+            with pool.driver(timeout=1):
+                pass
+        with pool.driver(timeout=1):
+            pass
+        self.assertEqual(len(self.created), 2)
+
+
+@override_settings(
+    QUITOQUE_EMAIL="chef@example.com",
+    QUITOQUE_PASSWORD="secret",
+    QUITOQUE_DRIVER_POOL_SIZE=1,
+    QUITOQUE_HTTP_FETCH=False,
+)
+class QuitoqueDriverPoolTest(TestCase):
+    def setUp(self):
+        self.drivers = []
+
+        def new_driver(timeout):
+            driver = _FakeFirefox()
+            self.drivers.append(driver)
+            return driver
+
+        patcher = mock.patch.object(quitoque_scraper, "_new_driver", new_driver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(quitoque_scraper.shutdown_driver_pool)
+
+    def test_import_costs_one_navigation_once_logged_in(self):
+        url = "https://www.quitoque.fr/products/r-1"
+        items = quitoque_scraper.fetch_quitoque_ingredients(url)
+        self.assertEqual(items[0]["name"], "accras de morue créole")
+        quitoque_scraper.fetch_quitoque_ingredients(url)
+        self.assertEqual(len(self.drivers), 1)
+        driver = self.drivers[0]
+        self.assertEqual(driver.logins, 1)
+        self.assertEqual(driver.visits, ["https://www.quitoque.fr/login", url, url])
+        quitoque_scraper.shutdown_driver_pool()
+        self.assertTrue(driver.quit_called)
+
+    def test_logs_in_again_when_session_expired(self):
+        url = "https://www.quitoque.fr/products/r-1"
+        quitoque_scraper.fetch_quitoque_ingredients(url)
+        self.drivers[0].expired = True
+        items = quitoque_scraper.fetch_quitoque_ingredients(url)
+        self.assertEqual(len(items), 2)
+        self.assertEqual(len(self.drivers), 1)
+        self.assertEqual(self.drivers[0].logins, 2)
+
+    @override_settings(QUITOQUE_DRIVER_POOL_SIZE=0)
+    def test_pool_disabled_starts_a_browser_per_import(self):
+        url = "https://www.quitoque.fr/products/r-1"
+        quitoque_scraper.fetch_quitoque_ingredients(url)
+        quitoque_scraper.fetch_quitoque_ingredients(url)
+        self.assertEqual(len(self.drivers), 2)
+        self.assertTrue(all(d.quit_called for d in self.drivers))
+
+
+def _http_response(url, status=200, text=QUITOQUE_HTML_FRAGMENT):
+    return mock.Mock(url=url, status_code=status, text=text)
+
+
+class _QuitoqueCookieFileMixin:
+    """Tmp QUITOQUE_COOKIE_FILE and fake browsers (self.drivers)."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cookie_file = Path(tmp.name) / "cookies.json"
+        settings_patch = override_settings(QUITOQUE_COOKIE_FILE=str(self.cookie_file))
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+        self.drivers = []
+
+        def new_driver(timeout):
+            driver = _FakeFirefox()
+            self.drivers.append(driver)
+            return driver
+
+        patcher = mock.patch.object(quitoque_scraper, "_new_driver", new_driver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(
+    QUITOQUE_EMAIL="chef@example.com",
+    QUITOQUE_PASSWORD="secret",
+    QUITOQUE_DRIVER_POOL_SIZE=0,
+    QUITOQUE_HTTP_FETCH=True,
+)
+class QuitoqueHttpFetchTest(_QuitoqueCookieFileMixin, TestCase):
+    url = "https://www.quitoque.fr/products/r-1"
+
+    def _get(self, *responses):
+        return mock.patch(
+            "lists_app.services.quitoque_session.requests.Session.get",
+            side_effect=list(responses),
+        )
+
+    def test_browser_login_cookies_are_replayed_without_browser(self):
+        quitoque_scraper.fetch_quitoque_ingredients(self.url)
+        self.assertEqual(len(self.drivers), 1)
+        self.assertEqual(self.cookie_file.stat().st_mode & 0o777, 0o600)
+        with self._get(_http_response(self.url)) as get:
+            items = quitoque_scraper.fetch_quitoque_ingredients(self.url)
+        self.assertEqual(items[1]["name"], "citron vert")
+        self.assertEqual(len(self.drivers), 1)
+        get.assert_called_once()
+
+    def test_rejected_session_falls_back_to_browser(self):
+        quitoque_scraper.fetch_quitoque_ingredients(self.url)
+        with self._get(_http_response("https://www.quitoque.fr/login")):
+            items = quitoque_scraper.fetch_quitoque_ingredients(self.url)
+        self.assertEqual(len(items), 2)
+        self.assertEqual(len(self.drivers), 2)
+        # The browser logged in again and stored a fresh session
+        self.assertTrue(self.cookie_file.exists())
+
+    @override_settings(QUITOQUE_LOGIN_URL="https://www.quitoque.fr/connexion")
+    def test_browser_and_http_agree_on_the_login_page(self):
+        self.assertTrue(
+            quitoque_session.is_login_page("https://www.quitoque.fr/connexion/")
+        )
+        self.assertTrue(
+            quitoque_session.is_login_page("https://www.quitoque.fr/connexion?next=/r")
+        )
+        self.assertFalse(
+            quitoque_session.is_login_page("https://www.quitoque.fr/login")
+        )
+        self.cookie_file.write_text(
+            json.dumps(
+                {
+                    "account": "chef@example.com",
+                    "cookies": [{"name": "s", "value": "1"}],
+                }
+            )
+        )
+        with self._get(_http_response("https://www.quitoque.fr/connexion/")):
+            self.assertIsNone(quitoque_session.fetch_recipe_html(self.url, 5))
+        self.assertFalse(self.cookie_file.exists())
+
+    def test_missing_ingredient_list_falls_back_to_browser(self):
+        quitoque_scraper.fetch_quitoque_ingredients(self.url)
+        with self._get(_http_response(self.url, text="<html></html>")):
+            items = quitoque_scraper.fetch_quitoque_ingredients(self.url)
+        self.assertEqual(len(items), 2)
+        self.assertEqual(len(self.drivers), 2)
+
+    def test_cookies_of_another_account_are_ignored(self):
+        quitoque_scraper.fetch_quitoque_ingredients(self.url)
+        with override_settings(QUITOQUE_EMAIL="autre@example.com"):
+            with self._get() as get:
+                quitoque_scraper.fetch_quitoque_ingredients(self.url)
+        get.assert_not_called()
+        self.assertEqual(len(self.drivers), 2)
+
+
+@override_settings(
+    QUITOQUE_EMAIL="chef@example.com",
+    QUITOQUE_PASSWORD="secret",
+    QUITOQUE_DRIVER_POOL_SIZE=1,
+    QUITOQUE_HTTP_FETCH=True,
+)
+class QuitoqueBatchFetchTest(_QuitoqueCookieFileMixin, TestCase):
+    urls = [f"https://www.quitoque.fr/products/r-{n}" for n in range(1, 6)]
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(quitoque_scraper.shutdown_driver_pool)
+
+    def test_logs_in_once_then_fans_out_over_https(self):
+        with mock.patch(
+            "lists_app.services.quitoque_session.requests.Session.get",
+            side_effect=lambda url, **kwargs: _http_response(url),
+        ) as get:
+            results = fetch_recipes(self.urls)
+        self.assertTrue(all(r["error"] is None and r["items"] for r in results))
+        # One browser, one login, one recipe page; the others over HTTPS
+        self.assertEqual(len(self.drivers), 1)
+        self.assertEqual(self.drivers[0].logins, 1)
+        self.assertEqual(self.drivers[0].visits[1:], [self.urls[0]])
+        self.assertEqual(get.call_count, len(self.urls) - 1)
+
+    @override_settings(QUITOQUE_HTTP_FETCH=False, QUITOQUE_IMPORT_MAX_PARALLEL=4)
+    def test_browser_only_batch_is_bounded_by_the_pool_size(self):
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def fetch(url, on_progress=None):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return [{"name": "Farine", "quantity": "", "notes": ""}]
+
+        with mock.patch(
+            "lists_app.services.recipe_cache.fetch_quitoque_ingredients", fetch
+        ):
+            results = fetch_recipes(self.urls)
+        self.assertTrue(all(r["items"] for r in results))
+        self.assertEqual(peak[0], 1)
+
+
+def _run_import_jobs_inline(test):
+    """Run queued import jobs synchronously, in the test thread and its transaction."""
+    inline = mock.Mock(submit=lambda fn, *args: fn(*args))
+    for name, value in (
+        ("_get_executor", lambda: inline),
+        ("close_old_connections", lambda: None),
+    ):
+        patcher = mock.patch.object(import_jobs, name, value)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
 @override_settings(
     SECRET_URL_AUTH_REQUIRED=False,
     QUITOQUE_EMAIL="",
@@ -475,3 +2695,315 @@ class QuitoqueApiTest(TestCase):
             content_type="application/json",
         )
         self.assertEqual(response.status_code, 400)
+
+    @override_settings(QUITOQUE_EMAIL="chef@example.com", QUITOQUE_PASSWORD="secret")
+    def test_import_quitoque_runs_as_job_and_fills_sections(self):
+        _run_import_jobs_inline(self)
+        fetched = [
+            {"name": "Citron vert", "quantity": "1", "notes": "", "section_slug": None},
+            {"name": "Poulet", "quantity": "2", "notes": "", "section_slug": None},
+        ]
+        with mock.patch(
+            "lists_app.services.recipe_cache.fetch_quitoque_ingredients",
+            return_value=fetched,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    f"/api/lists/{self.grocery_list.id}/import-quitoque/",
+                    data=json.dumps({"url": "https://www.quitoque.fr/products/r-1"}),
+                    content_type="application/json",
+                )
+        self.assertEqual(response.status_code, 202)
+        job = response.json()["job"]
+        self.assertEqual(job["status"], "pending")
+        status = self.client.get(
+            f"/api/lists/{self.grocery_list.id}/import-jobs/{job['id']}/"
+        ).json()
+        self.assertEqual(status["status"], "done")
+        slugs = [it["section_slug"] for it in status["result"]["items"]]
+        self.assertEqual(slugs, ["fruits_legumes", "viande_volaille"])
+        self.assertFalse(status["result"]["cached"])
+
+    def test_import_quitoque_cached_recipe_answers_at_once(self):
+        url = "https://www.quitoque.fr/products/r-1"
+        cache_recipe(
+            url,
+            [{"name": "Poulet", "quantity": "2", "notes": "", "section_slug": None}],
+        )
+        # No credentials needed: the recipe is not fetched again
+        response = self.client.post(
+            f"/api/lists/{self.grocery_list.id}/import-quitoque/",
+            data=json.dumps({"url": url + "/#ingredients"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["cached"])
+        items = response.json()["items"]
+        self.assertEqual(items[0]["name"], "Poulet")
+        self.assertEqual(items[0]["section_slug"], "viande_volaille")
+        entry = RecipeIngredients.objects.get(url=url)
+        self.assertEqual(entry.hits, 1)
+        # Stored before section assignment
+        self.assertIsNone(entry.items[0]["section_slug"])
+
+
+@override_settings(
+    SECRET_URL_AUTH_REQUIRED=False,
+    QUITOQUE_EMAIL="chef@example.com",
+    QUITOQUE_PASSWORD="secret",
+    QUITOQUE_IMPORT_MAX_PARALLEL=4,
+)
+class QuitoqueBatchImportTest(TestCase):
+    recipes = {
+        "https://www.quitoque.fr/products/r-1": [
+            {"name": "Citron vert", "quantity": "1", "notes": "", "section_slug": None},
+            {"name": "Farine", "quantity": "100 g", "notes": "", "section_slug": None},
+        ],
+        "https://www.quitoque.fr/products/r-2": [
+            {"name": "citron vert", "quantity": "2", "notes": "", "section_slug": None},
+            {"name": "Farines", "quantity": "", "notes": "bio", "section_slug": None},
+        ],
+        "https://www.quitoque.fr/products/r-3": [
+            {"name": "farine", "quantity": "200 g", "notes": "", "section_slug": None},
+        ],
+    }
+
+    def setUp(self):
+        self.client = Client()
+        self.grocery_list = GroceryList.objects.create(name="Semaine")
+        self.calls = []
+
+        def fetch(url, on_progress=None):
+            self.calls.append(url)
+            time.sleep(0.2)
+            if url not in self.recipes:
+                raise QuitoqueScraperError("Impossible de lire les ingrédients.")
+            return [dict(it) for it in self.recipes[url]]
+
+        for target, new in (
+            ("lists_app.services.recipe_cache.fetch_quitoque_ingredients", fetch),
+            # The fake fetch stands for the HTTPS path: no browser to queue on
+            ("lists_app.services.recipe_cache.has_session", lambda: True),
+        ):
+            patcher = mock.patch(target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        _run_import_jobs_inline(self)
+
+    def _post(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f"/api/lists/{self.grocery_list.id}/import-quitoque-batch/",
+                data=json.dumps(body),
+                content_type="application/json",
+            )
+
+    def _result(self, response):
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(id=response.json()["job"]["id"])
+        self.assertEqual(job.status, ImportJob.DONE)
+        return job.result
+
+    def test_fetches_concurrently_and_merges(self):
+        start = time.monotonic()
+        data = self._result(self._post({"urls": list(self.recipes)}))
+        elapsed = time.monotonic() - start
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual([r["url"] for r in data["results"]], list(self.recipes))
+        merged = {it["name"]: it for it in data["items"]}
+        self.assertEqual(set(merged), {"Citron vert", "Farine"})
+        self.assertEqual(merged["Citron vert"]["quantity"], "3")
+        self.assertEqual(merged["Farine"]["quantity"], "300 g")
+        self.assertEqual(merged["Farine"]["notes"], "bio")
+        self.assertEqual(merged["Citron vert"]["section_slug"], "fruits_legumes")
+
+    def test_per_url_errors_and_cache(self):
+        self._post({"urls": ["https://www.quitoque.fr/products/r-1"]})
+        response = self._post(
+            {
+                "urls": [
+                    "https://www.quitoque.fr/products/r-1",
+                    "https://www.quitoque.fr/products/inconnue",
+                    "https://evil.example/r",
+                ]
+            }
+        )
+        results = self._result(response)["results"]
+        self.assertTrue(results[0]["cached"])
+        self.assertIsNone(results[0]["error"])
+        self.assertTrue(results[1]["error"])
+        self.assertIn("hôte attendu", results[2]["error"])
+        self.assertEqual(self.calls.count("https://www.quitoque.fr/products/r-1"), 1)
+
+    def test_imports_recipe_links_of_the_list(self):
+        self.grocery_list.recipe_links = [
+            "https://www.quitoque.fr/products/r-2",
+            "https://example.com/ma-recette",
+        ]
+        self.grocery_list.save()
+        results = self._result(self._post({}))["results"]
+        self.assertEqual(
+            [r["url"] for r in results], ["https://www.quitoque.fr/products/r-2"]
+        )
+
+    def test_rejects_empty_batch(self):
+        self.assertEqual(self._post({}).status_code, 400)
+        self.assertEqual(self._post({"urls": "https://x"}).status_code, 400)
+
+
+@override_settings(
+    SECRET_URL_AUTH_REQUIRED=False,
+    QUITOQUE_EMAIL="chef@example.com",
+    QUITOQUE_PASSWORD="secret",
+)
+class ImportJobTest(TestCase):
+    url = "https://www.quitoque.fr/products/r-1"
+
+    def setUp(self):
+        self.grocery_list = GroceryList.objects.create(name="Jobs")
+        _run_import_jobs_inline(self)
+        self.layer = get_channel_layer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(
+            f"list_{self.grocery_list.id}", self.channel
+        )
+
+    def _messages(self):
+        messages = []
+        while True:
+            try:
+                event = async_to_sync(asyncio.wait_for)(
+                    self.layer.receive(self.channel), 0.1
+                )
+            except asyncio.TimeoutError:
+                return messages
+            messages.append(event["payload"])
+
+    def _run(self, fetch):
+        with mock.patch(
+            "lists_app.services.recipe_cache.fetch_quitoque_ingredients", fetch
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = import_jobs.start_import_job(self.grocery_list, [self.url])
+        job.refresh_from_db()
+        return job
+
+    def test_progress_and_result_are_broadcast_to_the_list_group(self):
+        def fetch(url, on_progress=None):
+            on_progress("login", "Connexion à Quitoque…")
+            on_progress("parsed", "1 ingrédient(s) lu(s).")
+            return [
+                {"name": "Poulet", "quantity": "", "notes": "", "section_slug": None}
+            ]
+
+        job = self._run(fetch)
+        self.assertEqual(job.status, ImportJob.DONE)
+        messages = self._messages()
+        self.assertEqual(
+            [m["action"] for m in messages],
+            ["import_progress", "import_progress", "import_done"],
+        )
+        self.assertEqual([m.get("stage") for m in messages[:2]], ["login", "parsed"])
+        self.assertEqual(messages[0]["job_id"], str(job.id))
+        done = messages[2]["job"]
+        self.assertEqual(done["result"]["items"][0]["section_slug"], "viande_volaille")
+        self.assertIsNone(done["progress"])
+
+    def test_progress_keeps_a_long_running_job_alive(self):
+        seen = {}
+
+        def fetch(url, on_progress=None):
+            job = ImportJob.objects.get()
+            stale = timezone.now() - import_jobs.JOB_STALE_AFTER - timedelta(minutes=1)
+            ImportJob.objects.filter(id=job.id).update(updated_at=stale)
+            on_progress("loading", "Chargement de la recette…")
+            seen["job"] = import_jobs.get_import_job(self.grocery_list, job.id)
+            return []
+
+        with mock.patch.object(import_jobs, "JOB_HEARTBEAT", timedelta(0)):
+            self._run(fetch)
+        self.assertEqual(seen["job"].status, ImportJob.RUNNING)
+        self.assertGreater(
+            seen["job"].updated_at, timezone.now() - import_jobs.JOB_STALE_AFTER
+        )
+
+    def test_silent_job_is_marked_failed_once_stale(self):
+        job = ImportJob.objects.create(
+            grocery_list=self.grocery_list, urls=[self.url], status=ImportJob.RUNNING
+        )
+        stale = timezone.now() - import_jobs.JOB_STALE_AFTER - timedelta(minutes=1)
+        ImportJob.objects.filter(id=job.id).update(updated_at=stale)
+        job = import_jobs.get_import_job(self.grocery_list, job.id)
+        self.assertEqual(job.status, ImportJob.FAILED)
+
+    def test_failure_is_broadcast_with_its_message(self):
+        def fetch(url, on_progress=None):
+            raise QuitoqueScraperError("Échec de la connexion Quitoque.", 401)
+
+        job = self._run(fetch)
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertEqual(job.error, "Échec de la connexion Quitoque.")
+        self.assertEqual(self._messages()[-1]["action"], "import_failed")
+
+    def test_lost_job_is_reported_failed(self):
+        job = ImportJob.objects.create(
+            grocery_list=self.grocery_list, urls=[self.url], status=ImportJob.RUNNING
+        )
+        ImportJob.objects.filter(id=job.id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        response = Client().get(
+            f"/api/lists/{self.grocery_list.id}/import-jobs/{job.id}/"
+        )
+        self.assertEqual(response.json()["status"], "failed")
+        other = GroceryList.objects.create(name="Autre")
+        response = Client().get(f"/api/lists/{other.id}/import-jobs/{job.id}/")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(QUITOQUE_EMAIL="chef@example.com", QUITOQUE_PASSWORD="secret")
+class RecipeCacheTest(TestCase):
+    url = "https://www.quitoque.fr/products/r-1"
+    items = [
+        {"name": "Citron vert", "quantity": "1", "notes": "", "section_slug": None}
+    ]
+
+    def _fetch(self):
+        with mock.patch(
+            "lists_app.services.recipe_cache.fetch_quitoque_ingredients",
+            return_value=self.items,
+        ) as fetch:
+            result = fetch_recipe_ingredients(self.url)
+        return result, fetch.call_count
+
+    def test_expired_entry_is_fetched_again(self):
+        self._fetch()
+        RecipeIngredients.objects.update(expires_at=timezone.now())
+        (items, cached), calls = self._fetch()
+        self.assertFalse(cached)
+        self.assertEqual(calls, 1)
+
+    @override_settings(QUITOQUE_CACHE_TTL=0)
+    def test_ttl_zero_disables_cache(self):
+        self._fetch()
+        self.assertFalse(RecipeIngredients.objects.exists())
+
+    def test_invalidate(self):
+        self._fetch()
+        self.assertTrue(invalidate_recipe(self.url))
+        (items, cached), calls = self._fetch()
+        self.assertEqual((cached, calls), (False, 1))
+
+    def test_admin_action_invalidates_through_the_cache(self):
+        self._fetch()
+        modeladmin = mock.Mock()
+        with mock.patch(
+            "lists_app.admin.invalidate_recipe", wraps=invalidate_recipe
+        ) as invalidate:
+            admin.invalidate_recipes_action(
+                modeladmin, None, RecipeIngredients.objects.all()
+            )
+        invalidate.assert_called_once_with(self.url)
+        self.assertIn("1 recette", modeladmin.message_user.call_args.args[1])
+        (items, cached), calls = self._fetch()
+        self.assertEqual((cached, calls), (False, 1))
@@ -15,8 +15,17 @@ urlpatterns = [
         "lists/<uuid:list_id>/import-quitoque/",
         api_views.api_import_quitoque,
     ),
+    path(
+        "lists/<uuid:list_id>/import-quitoque-batch/",
+        api_views.api_import_quitoque_batch,
+    ),
+    path(
+        "lists/<uuid:list_id>/import-jobs/<uuid:job_id>/",
+        api_views.api_import_job_status,
+    ),
     path("lists/<uuid:list_id>/deduplicate/", api_views.api_deduplicate),
     path("lists/<uuid:list_id>/items/", api_views.api_create_item),
     path("lists/<uuid:list_id>/items/<uuid:item_id>/", api_views.api_item_detail),
     path("lists/<uuid:list_id>/reorder/", api_views.api_reorder),
+    path("llm-status/", api_views.api_llm_status),
 ]